@@ -154,6 +154,24 @@ cdef class IterableCoderImpl(SequenceCoderImpl):
   pass
 
 
+cdef class MapCoderImpl(StreamCoderImpl):
+  cdef CoderImpl _key_coder
+  cdef CoderImpl _value_coder
+
+
+cdef class DeterministicMapCoderImpl(MapCoderImpl):
+  pass
+
+
+cdef class NullableCoderImpl(StreamCoderImpl):
+  cdef CoderImpl _value_coder
+
+
+cdef class ColumnarBatchCoderImpl(StreamCoderImpl):
+  cdef tuple _column_kinds
+  cdef tuple _coder_impls
+
+
 cdef object IntervalWindow
 
 cdef class IntervalWindowCoderImpl(StreamCoderImpl):
@@ -37,6 +37,7 @@ from __future__ import absolute_import
 from __future__ import division
 
 import json
+import struct
 from builtins import chr
 from builtins import object
 from io import BytesIO
@@ -999,6 +1000,221 @@ class IterableCoderImpl(SequenceCoderImpl):
     return components
 
 
+class MapCoderImpl(StreamCoderImpl):
+  """For internal use only; no backwards-compatibility guarantees.
+
+  A coder for dict objects whose keys and values all have a single type.
+
+  The encoding is the big-endian int32 number of entries followed by the
+  nested encoding of each key and value in turn."""
+
+  def __init__(self, key_coder, value_coder):
+    # type: (CoderImpl, CoderImpl) -> None
+    self._key_coder = key_coder
+    self._value_coder = value_coder
+
+  def encode_to_stream(self, value, out, nested):
+    out.write_bigendian_int32(len(value))
+    for k, v in value.items():
+      self._key_coder.encode_to_stream(k, out, True)
+      self._value_coder.encode_to_stream(v, out, True)
+
+  def decode_from_stream(self, in_stream, nested):
+    size = in_stream.read_bigendian_int32()
+    result = {}
+    for _ in range(size):
+      k = self._key_coder.decode_from_stream(in_stream, True)
+      result[k] = self._value_coder.decode_from_stream(in_stream, True)
+    return result
+
+  def estimate_size(self, value, nested=False):
+    # type: (Any, bool) -> int
+    estimated_size = 4
+    for k, v in value.items():
+      estimated_size += self._key_coder.estimate_size(k, True)
+      estimated_size += self._value_coder.estimate_size(v, True)
+    return estimated_size
+
+
+class DeterministicMapCoderImpl(MapCoderImpl):
+  """For internal use only; no backwards-compatibility guarantees.
+
+  A MapCoderImpl that writes the entries in the order of their encoded keys."""
+
+  def encode_to_stream(self, value, out, nested):
+    out.write_bigendian_int32(len(value))
+    encoded_keys = []
+    values = []
+    for k, v in value.items():
+      encoded_keys.append(self._key_coder.encode_nested(k))
+      values.append(v)
+    for i in sorted(range(len(values)), key=encoded_keys.__getitem__):
+      out.write(encoded_keys[i])
+      self._value_coder.encode_to_stream(values[i], out, True)
+
+
+class NullableCoderImpl(StreamCoderImpl):
+  """For internal use only; no backwards-compatibility guarantees.
+
+  A coder for values of a single type that may also be None.
+
+  The encoding is a single 0 byte for None, otherwise a 1 byte followed by
+  the encoding of the value."""
+
+  def __init__(self, value_coder):
+    # type: (CoderImpl) -> None
+    self._value_coder = value_coder
+
+  def encode_to_stream(self, value, out, nested):
+    if value is None:
+      out.write_byte(0)
+    else:
+      out.write_byte(1)
+      self._value_coder.encode_to_stream(value, out, nested)
+
+  def decode_from_stream(self, in_stream, nested):
+    if in_stream.read_byte() == 0:
+      return None
+    return self._value_coder.decode_from_stream(in_stream, nested)
+
+  def estimate_size(self, value, nested=False):
+    # type: (Any, bool) -> int
+    if value is None:
+      return 1
+    return 1 + self._value_coder.estimate_size(value, nested)
+
+
+class ColumnarBatchCoderImpl(StreamCoderImpl):
+  """For internal use only; no backwards-compatibility guarantees.
+
+  A coder for lists of fixed-width tuples, encoded one column at a time.
+
+  The encoding is the varint number of rows followed by, for each column, a
+  length-prefixed null bitmap (empty if the column has no nulls) and the
+  non-null values of the column:
+
+    * INT64 columns as contiguous little-endian signed 64-bit integers,
+    * DOUBLE columns as contiguous little-endian 64-bit floats,
+    * BOOL columns as one byte per value,
+    * UTF8 and BYTES columns as little-endian unsigned 32-bit end offsets
+      followed by the concatenated value bytes,
+    * OTHER columns as the nested encoding of each value by the component
+      coder.
+  """
+
+  INT64 = 0
+  DOUBLE = 1
+  BOOL = 2
+  UTF8 = 3
+  BYTES = 4
+  OTHER = 5
+
+  _FIXED_WIDTH_FORMATS = {INT64: ('q', 8), DOUBLE: ('d', 8)}
+
+  def __init__(self, column_kinds, coder_impls):
+    # type: (Sequence[int], Sequence[CoderImpl]) -> None
+    assert len(column_kinds) == len(coder_impls)
+    self._column_kinds = tuple(column_kinds)
+    self._coder_impls = tuple(coder_impls)
+
+  def encode_to_stream(self, value, out, nested):
+    # type: (Sequence[tuple], create_OutputStream, bool) -> None
+    rows = value if isinstance(value, (list, tuple)) else list(value)
+    num_rows = len(rows)
+    out.write_var_int64(num_rows)
+    if not num_rows:
+      return
+    width = len(self._column_kinds)
+    for row in rows:
+      if len(row) != width:
+        raise ValueError(
+            'Expected rows with %d fields, got %r.' % (width, row))
+    for kind, coder_impl, column in zip(
+        self._column_kinds, self._coder_impls, zip(*rows)):
+      self._encode_column(kind, coder_impl, column, out)
+
+  def _encode_column(self, kind, coder_impl, column, out):
+    if None in column:
+      bitmap = bytearray((len(column) + 7) // 8)
+      for i, v in enumerate(column):
+        if v is None:
+          bitmap[i >> 3] |= 1 << (i & 7)
+      column = [v for v in column if v is not None]
+      out.write_var_int64(len(bitmap))
+      out.write(bytes(bitmap))
+    else:
+      out.write_var_int64(0)
+
+    if kind in self._FIXED_WIDTH_FORMATS:
+      try:
+        out.write(struct.pack(
+            '<%d%s' % (len(column), self._FIXED_WIDTH_FORMATS[kind][0]),
+            *column))
+      except struct.error as exn:
+        raise ValueError('Unable to encode column of %s values: %s' % (
+            'int64' if kind == self.INT64 else 'double', exn))
+    elif kind == self.BOOL:
+      out.write(bytes(bytearray(1 if v else 0 for v in column)))
+    elif kind == self.UTF8 or kind == self.BYTES:
+      if kind == self.UTF8:
+        column = [v.encode('utf-8') for v in column]
+      ends = []
+      end = 0
+      for v in column:
+        end += len(v)
+        ends.append(end)
+      out.write(struct.pack('<%dI' % len(ends), *ends))
+      out.write(b''.join(column))
+    else:
+      for v in column:
+        coder_impl.encode_to_stream(v, out, True)
+
+  def decode_from_stream(self, in_stream, nested):
+    # type: (create_InputStream, bool) -> List[tuple]
+    num_rows = in_stream.read_var_int64()
+    if not num_rows:
+      return []
+    columns = [
+        self._decode_column(kind, coder_impl, num_rows, in_stream)
+        for kind, coder_impl in zip(self._column_kinds, self._coder_impls)]
+    return list(zip(*columns))
+
+  def _decode_column(self, kind, coder_impl, num_rows, in_stream):
+    bitmap = bytearray(in_stream.read(in_stream.read_var_int64()))
+    if bitmap:
+      nulls = [bool(bitmap[i >> 3] & (1 << (i & 7))) for i in range(num_rows)]
+      num_values = num_rows - sum(nulls)
+    else:
+      nulls = None
+      num_values = num_rows
+
+    if kind in self._FIXED_WIDTH_FORMATS:
+      type_code, type_size = self._FIXED_WIDTH_FORMATS[kind]
+      values = struct.unpack(
+          '<%d%s' % (num_values, type_code),
+          in_stream.read(num_values * type_size))
+    elif kind == self.BOOL:
+      values = [b == 1 for b in bytearray(in_stream.read(num_values))]
+    elif kind == self.UTF8 or kind == self.BYTES:
+      ends = struct.unpack('<%dI' % num_values, in_stream.read(4 * num_values))
+      data = in_stream.read(ends[-1] if ends else 0)
+      values = []
+      start = 0
+      for end in ends:
+        values.append(data[start:end])
+        start = end
+      if kind == self.UTF8:
+        values = [v.decode('utf-8') for v in values]
+    else:
+      values = [coder_impl.decode_from_stream(in_stream, True)
+                for _ in range(num_values)]
+
+    if nulls is None:
+      return values
+    it = iter(values)
+    return [None if is_null else next(it) for is_null in nulls]
+
+
 class PaneInfoEncoding(object):
   """For internal use only; no backwards-compatibility guarantees.
 
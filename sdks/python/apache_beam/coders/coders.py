@@ -78,9 +78,11 @@ except ImportError:
 
 __all__ = [
     'Coder',
-    'AvroGenericCoder', 'BooleanCoder', 'BytesCoder', 'DillCoder',
-    'FastPrimitivesCoder', 'FloatCoder', 'IterableCoder', 'PickleCoder',
-    'ProtoCoder', 'SingletonCoder', 'StrUtf8Coder', 'TimestampCoder',
+    'AvroGenericCoder', 'BooleanCoder', 'BytesCoder', 'ColumnarBatchCoder',
+    'DillCoder',
+    'FastPrimitivesCoder', 'FloatCoder', 'IterableCoder', 'MapCoder',
+    'NullableCoder', 'PickleCoder', 'ProtoCoder', 'SingletonCoder',
+    'StrUtf8Coder', 'TimestampCoder',
     'TupleCoder', 'TupleSequenceCoder', 'VarIntCoder',
     'WindowedValueCoder', 'ParamWindowedValueCoder'
 ]
@@ -1124,6 +1126,210 @@ class IterableCoder(FastCoder):
 Coder.register_structured_urn(common_urns.coders.ITERABLE.urn, IterableCoder)
 
 
+class MapCoder(FastCoder):
+  """Coder of dicts whose keys and values have a single type each."""
+
+  def __init__(self, key_coder, value_coder):
+    # type: (Coder, Coder) -> None
+    self._key_coder = key_coder
+    self._value_coder = value_coder
+
+  def _create_impl(self):
+    return coder_impl.MapCoderImpl(
+        self._key_coder.get_impl(), self._value_coder.get_impl())
+
+  def is_deterministic(self):
+    # () -> bool
+    # Dict iteration order is not guaranteed to match for equal dicts.
+    return False
+
+  def as_deterministic_coder(self, step_label, error_message=None):
+    return DeterministicMapCoder(
+        self._key_coder.as_deterministic_coder(step_label, error_message),
+        self._value_coder.as_deterministic_coder(step_label, error_message))
+
+  def to_type_hint(self):
+    return typehints.Dict[
+        self._key_coder.to_type_hint(), self._value_coder.to_type_hint()]
+
+  @staticmethod
+  def from_type_hint(typehint, registry):
+    # type: (typehints.DictConstraint, CoderRegistry) -> MapCoder
+    return MapCoder(
+        registry.get_coder(typehint.key_type),
+        registry.get_coder(typehint.value_type))
+
+  def _get_component_coders(self):
+    # type: () -> Tuple[Coder, ...]
+    return (self._key_coder, self._value_coder)
+
+  def key_coder(self):
+    # type: () -> Coder
+    return self._key_coder
+
+  def value_coder(self):
+    # type: () -> Coder
+    return self._value_coder
+
+  def __repr__(self):
+    return 'MapCoder[%r, %r]' % (self._key_coder, self._value_coder)
+
+  def __eq__(self, other):
+    return (type(self) == type(other)
+            and self._key_coder == other.key_coder()
+            and self._value_coder == other.value_coder())
+
+  def __hash__(self):
+    return hash((type(self), self._key_coder, self._value_coder))
+
+
+class DeterministicMapCoder(MapCoder):
+  """Coder of dicts that writes their entries in the order of their keys.
+
+  The encoding is that of ``MapCoder``, with the entries sorted by their
+  encoded key, so that equal dicts always have the same encoding.
+  """
+
+  def _create_impl(self):
+    return coder_impl.DeterministicMapCoderImpl(
+        self._key_coder.get_impl(), self._value_coder.get_impl())
+
+  def is_deterministic(self):
+    # () -> bool
+    return (self._key_coder.is_deterministic()
+            and self._value_coder.is_deterministic())
+
+  def as_deterministic_coder(self, step_label, error_message=None):
+    if self.is_deterministic():
+      return self
+    return super(DeterministicMapCoder, self).as_deterministic_coder(
+        step_label, error_message)
+
+  def __repr__(self):
+    return 'DeterministicMapCoder[%r, %r]' % (
+        self._key_coder, self._value_coder)
+
+
+class NullableCoder(FastCoder):
+  """Coder of values of a single type that may also be None."""
+
+  def __init__(self, value_coder):
+    # type: (Coder) -> None
+    self._value_coder = value_coder
+
+  def _create_impl(self):
+    return coder_impl.NullableCoderImpl(self._value_coder.get_impl())
+
+  def is_deterministic(self):
+    # () -> bool
+    return self._value_coder.is_deterministic()
+
+  def as_deterministic_coder(self, step_label, error_message=None):
+    if self.is_deterministic():
+      return self
+    else:
+      return NullableCoder(
+          self._value_coder.as_deterministic_coder(step_label, error_message))
+
+  def to_type_hint(self):
+    return typehints.Optional[self._value_coder.to_type_hint()]
+
+  @staticmethod
+  def from_type_hint(typehint, registry):
+    # type: (typehints.UnionConstraint, CoderRegistry) -> NullableCoder
+    value_types = [t for t in typehint.union_types if t is not type(None)]
+    if len(value_types) != 1 or len(typehint.union_types) != 2:
+      raise ValueError('Expected an Optional type hint, got %s' % typehint)
+    return NullableCoder(registry.get_coder(value_types[0]))
+
+  def _get_component_coders(self):
+    # type: () -> Tuple[Coder, ...]
+    return (self._value_coder,)
+
+  def value_coder(self):
+    # type: () -> Coder
+    return self._value_coder
+
+  def __repr__(self):
+    return 'NullableCoder[%r]' % self._value_coder
+
+  def __eq__(self, other):
+    return (type(self) == type(other)
+            and self._value_coder == other.value_coder())
+
+  def __hash__(self):
+    return hash((type(self), self._value_coder))
+
+
+class ColumnarBatchCoder(FastCoder):
+  """Coder of lists of fixed-width tuples, encoded column by column.
+
+  Rather than encoding each tuple in turn, all values of a field are written
+  together: integer and float fields as contiguous 64-bit arrays, string and
+  bytes fields as an offsets array followed by the concatenated data, and
+  nulls as a per-field bitmap. This is considerably cheaper to encode and
+  decode, and more compact, than a list of TupleCoder-encoded rows when
+  batching homogeneous records such as numeric tuples.
+
+  VarIntCoder, FloatCoder, BooleanCoder, StrUtf8Coder and BytesCoder fields
+  use the columnar layout; fields of any other coder are encoded one value at
+  a time with that coder. Integer fields must fit in 64 bits and the string
+  or bytes data of a single field must be smaller than 4GB per batch.
+  """
+
+  _COLUMN_KINDS = {
+      VarIntCoder: coder_impl.ColumnarBatchCoderImpl.INT64,
+      FloatCoder: coder_impl.ColumnarBatchCoderImpl.DOUBLE,
+      BooleanCoder: coder_impl.ColumnarBatchCoderImpl.BOOL,
+      StrUtf8Coder: coder_impl.ColumnarBatchCoderImpl.UTF8,
+      BytesCoder: coder_impl.ColumnarBatchCoderImpl.BYTES,
+  }
+
+  def __init__(self, components):
+    # type: (Iterable[Coder]) -> None
+    self._coders = tuple(components)
+
+  def _create_impl(self):
+    other = coder_impl.ColumnarBatchCoderImpl.OTHER
+    return coder_impl.ColumnarBatchCoderImpl(
+        [self._COLUMN_KINDS.get(type(c), other) for c in self._coders],
+        [c.get_impl() for c in self._coders])
+
+  def is_deterministic(self):
+    # () -> bool
+    return all(c.is_deterministic() for c in self._coders)
+
+  def as_deterministic_coder(self, step_label, error_message=None):
+    if self.is_deterministic():
+      return self
+    else:
+      return ColumnarBatchCoder(
+          [c.as_deterministic_coder(step_label, error_message)
+           for c in self._coders])
+
+  def to_type_hint(self):
+    return typehints.List[
+        typehints.Tuple[tuple(c.to_type_hint() for c in self._coders)]]
+
+  def _get_component_coders(self):
+    # type: () -> Tuple[Coder, ...]
+    return self._coders
+
+  def coders(self):
+    # type: () -> Tuple[Coder, ...]
+    return self._coders
+
+  def __repr__(self):
+    return 'ColumnarBatchCoder[%s]' % ', '.join(str(c) for c in self._coders)
+
+  def __eq__(self, other):
+    return (type(self) == type(other)
+            and self._coders == other.coders())
+
+  def __hash__(self):
+    return hash((type(self), self._coders))
+
+
 class GlobalWindowCoder(SingletonCoder):
   """Coder for global windows."""
 
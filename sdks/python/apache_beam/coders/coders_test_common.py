@@ -22,6 +22,7 @@ from __future__ import absolute_import
 
 import logging
 import math
+import struct
 import sys
 import unittest
 from builtins import range
@@ -264,6 +265,77 @@ class CodersTest(unittest.TestCase):
         coders.TupleCoder((coders.VarIntCoder(), int_tuple_coder)),
         (1, (1, 2, 3)))
 
+  def test_columnar_batch_coder(self):
+    coder = coders.ColumnarBatchCoder((
+        coders.VarIntCoder(), coders.FloatCoder(), coders.BooleanCoder(),
+        coders.StrUtf8Coder(), coders.BytesCoder(), coders.PickleCoder()))
+    self.check_coder(
+        coder,
+        [],
+        [(1, 1.5, True, u'a', b'b', (1, 2))],
+        [(i, i / 3.0, i % 2 == 0, u'\u0101' * i, b'\0' * i, {'i': i})
+         for i in range(-5, 200)],
+        [(None, 1.0, None, u'', None, None),
+         (-1 << 63, None, False, None, b'', 'x'),
+         ((1 << 63) - 1, float('inf'), None, u'abc', b'xyz', None)])
+    # Test binary representation
+    self.assertEqual(
+        b'\x02\x00' + struct.pack('<2q', 1, -2) + b'\x00' +
+        struct.pack('<2I', 1, 3) + b'abc',
+        coders.ColumnarBatchCoder(
+            (coders.VarIntCoder(), coders.StrUtf8Coder())).encode(
+                [(1, u'a'), (-2, u'bc')]))
+    # Test nested
+    self.check_coder(
+        coders.TupleCoder((coders.VarIntCoder(), coder)),
+        (1, [(1, 1.5, True, u'a', b'b', 1)]),
+        (2, []))
+    with self.assertRaises(ValueError):
+      coder.encode([(1, 1.5)])
+    with self.assertRaises(ValueError):
+      coder.encode([(1 << 64, 1.5, True, u'a', b'b', 1)])
+
+  def test_map_coder(self):
+    map_coder = coders.MapCoder(coders.StrUtf8Coder(), coders.VarIntCoder())
+    # Test binary representation
+    self.assertEqual(b'\0\0\0\x01\x01a\x05', map_coder.encode({'a': 5}))
+    self.check_coder(map_coder, {}, {'a': 1, u'\u0101': -2},
+                     {str(i): i for i in range(1000)})
+    # Test nested
+    self.check_coder(
+        coders.TupleCoder((coders.VarIntCoder(), map_coder)),
+        (1, {'a': 1}), (2, {}))
+    self.assertFalse(map_coder.is_deterministic())
+
+  def test_deterministic_map_coder(self):
+    map_coder = coders.MapCoder(
+        coders.StrUtf8Coder(), coders.FastPrimitivesCoder())
+    deterministic_coder = map_coder.as_deterministic_coder('step')
+    self.assertTrue(deterministic_coder.is_deterministic())
+    self.check_coder(deterministic_coder, {}, {'a': 1, 'b': (2, 'c')})
+    self.check_coder(
+        coders.TupleCoder((deterministic_coder, coders.VarIntCoder())),
+        ({'a': 1}, 1), ({}, 2))
+    # Equal dicts built in a different order have the same encoding, which
+    # the MapCoder can still decode.
+    first = {str(i): i for i in range(100)}
+    second = {str(i): i for i in reversed(range(100))}
+    self.assertEqual(deterministic_coder.encode(first),
+                     deterministic_coder.encode(second))
+    self.assertEqual(first, map_coder.decode(deterministic_coder.encode(first)))
+
+  def test_nullable_coder(self):
+    nullable_coder = coders.NullableCoder(coders.VarIntCoder())
+    # Test binary representation
+    self.assertEqual(b'\0', nullable_coder.encode(None))
+    self.assertEqual(b'\x01\x05', nullable_coder.encode(5))
+    self.check_coder(nullable_coder, None, 0, -1, 1 << 40)
+    # Test nested
+    self.check_coder(
+        coders.TupleCoder(
+            (coders.NullableCoder(coders.BytesCoder()), nullable_coder)),
+        (None, None), (b'abc', None), (None, 1), (b'', 2))
+
   def test_base64_pickle_coder(self):
     self.check_coder(coders.Base64PickleCoder(), 'a', 1, 1.5, (1, 2, 3))
 
@@ -20,9 +20,12 @@
 from __future__ import absolute_import
 
 import itertools
+import operator
 from array import array
 
 from apache_beam.coders.coder_impl import StreamCoderImpl
+from apache_beam.coders.coder_impl import create_InputStream
+from apache_beam.coders.coder_impl import create_OutputStream
 from apache_beam.coders.coders import BytesCoder
 from apache_beam.coders.coders import Coder
 from apache_beam.coders.coders import FastCoder
@@ -109,18 +112,49 @@ class RowCoder(FastCoder):
 
 
 class RowCoderImpl(StreamCoderImpl):
-  """For internal use only; no backwards-compatibility guarantees."""
+  """For internal use only; no backwards-compatibility guarantees.
+
+  On construction, a specialized encoder and decoder are generated for the
+  schema, so that encoding or decoding a row does not dispatch through the
+  generic component coders for fields of primitive types.
+  """
   SIZE_CODER = VarIntCoder().get_impl()
   NULL_MARKER_CODER = BytesCoder().get_impl()
 
   def __init__(self, schema, components):
     self.schema = schema
     self.constructor = named_tuple_from_schema(schema)
+    self.component_coders = list(components)
     self.components = list(c.get_impl() for c in components)
     self.has_nullable_fields = any(
         field.type.nullable for field in self.schema.fields)
+    self._encode, self._decode = _compile_row_codec(self)
 
   def encode_to_stream(self, value, out, nested):
+    self._encode(value, out)
+
+  def decode_from_stream(self, in_stream, nested):
+    return self._decode(in_stream)
+
+  def encode_all(self, values):
+    """Returns the concatenated encodings of all the given rows."""
+    out = create_OutputStream()
+    encode = self._encode
+    for value in values:
+      encode(value, out)
+    return out.get()
+
+  def decode_all(self, encoded):
+    """Returns the list of rows encoded by :meth:`encode_all`."""
+    in_stream = create_InputStream(encoded)
+    decode = self._decode
+    size = in_stream.size
+    values = []
+    while size() > 0:
+      values.append(decode(in_stream))
+    return values
+
+  def _encode_generic(self, value, out):
     nvals = len(self.schema.fields)
     self.SIZE_CODER.encode_to_stream(nvals, out, True)
     attrs = [getattr(value, f.name) for f in self.schema.fields]
@@ -144,10 +178,16 @@ class RowCoderImpl(StreamCoderImpl):
         continue
       c.encode_to_stream(attr, out, True)
 
-  def decode_from_stream(self, in_stream, nested):
+  def _decode_generic(self, in_stream):
     nvals = self.SIZE_CODER.decode_from_stream(in_stream, True)
+    return self._decode_with_nulls(
+        in_stream,
+        nvals,
+        self.NULL_MARKER_CODER.decode_from_stream(in_stream, True))
+
+  def _decode_with_nulls(self, in_stream, nvals, null_markers):
     words = array('B')
-    words.fromstring(self.NULL_MARKER_CODER.decode_from_stream(in_stream, True))
+    words.fromstring(null_markers)
 
     if words:
       nulls = ((words[i // 8] >> (i % 8)) & 0x01 for i in range(nvals))
@@ -174,3 +214,108 @@ class RowCoderImpl(StreamCoderImpl):
         if not is_null
     ] if self.has_nullable_fields else self.components
     return TupleCoder(components).get_impl()
+
+
+def _null_markers(nulls, nvals):
+  """Returns the little-endian null bitmap for the given bit mask."""
+  return bytes(bytearray((nulls >> (8 * i)) & 0xFF
+                         for i in range((nvals + 7) // 8)))
+
+
+def _raise_null_in_non_nullable_field(name):
+  raise ValueError(
+      "Attempted to encode null for non-nullable field \"{}\".".format(name))
+
+
+def _compile_row_codec(impl):
+  """Generates an encoder and a decoder specialized to the schema of impl.
+
+  The generated functions produce exactly the same encoding as
+  RowCoderImpl._encode_generic and RowCoderImpl._decode_generic, but access
+  all fields with a single attrgetter, build the null bitmap with integer
+  arithmetic and inline the stream calls for VarIntCoder, FloatCoder,
+  StrUtf8Coder and BytesCoder fields. Values whose encoding has nulls, or
+  fewer fields than the schema, are decoded by the generic path.
+
+  Returns:
+    A tuple (encode, decode) of functions taking (value, out_stream) and
+    (in_stream) respectively.
+  """
+  fields = impl.schema.fields
+  nvals = len(fields)
+  if not nvals:
+    return impl._encode_generic, impl._decode_generic
+
+  namespace = {
+      '_get_fields': operator.attrgetter(*[f.name for f in fields]),
+      '_field_names': [f.name for f in fields],
+      '_components': impl.components,
+      '_constructor': impl.constructor,
+      '_null_markers': _null_markers,
+      '_raise_null': _raise_null_in_non_nullable_field,
+      '_decode_with_nulls': impl._decode_with_nulls,
+  }
+  values = ', '.join('v%d' % i for i in range(nvals))
+
+  encode_lines = [
+      'def encode(value, out):',
+      '  %s, = _get_fields(value)' % values if nvals > 1 else
+      '  v0 = _get_fields(value)',
+      '  out.write_var_int64(%d)' % nvals,
+  ]
+  if impl.has_nullable_fields:
+    encode_lines.append('  nulls = 0')
+    for i, field in enumerate(fields):
+      if field.type.nullable:
+        encode_lines.append('  if v%d is None: nulls |= %d' % (i, 1 << i))
+    encode_lines.extend([
+        '  if nulls:',
+        '    out.write(_null_markers(nulls, %d), True)' % nvals,
+        '  else:',
+        '    out.write_var_int64(0)',
+    ])
+  else:
+    encode_lines.append('  out.write_var_int64(0)')
+  for i, field in enumerate(fields):
+    if not field.type.nullable:
+      encode_lines.append(
+          '  if v%d is None: _raise_null(_field_names[%d])' % (i, i))
+  decode_args = []
+  for i, (field, coder) in enumerate(zip(fields, impl.component_coders)):
+    if isinstance(coder, VarIntCoder):
+      encode_value = 'out.write_var_int64(v%d)' % i
+      decode_value = 'in_stream.read_var_int64()'
+    elif isinstance(coder, FloatCoder):
+      encode_value = 'out.write_bigendian_double(v%d)' % i
+      decode_value = 'in_stream.read_bigendian_double()'
+    elif isinstance(coder, StrUtf8Coder):
+      encode_value = "out.write(v%d.encode('utf-8'), True)" % i
+      decode_value = "in_stream.read_all(True).decode('utf-8')"
+    elif isinstance(coder, BytesCoder):
+      encode_value = 'out.write(v%d, True)' % i
+      decode_value = 'in_stream.read_all(True)'
+    else:
+      encode_value = '_components[%d].encode_to_stream(v%d, out, True)' % (
+          i, i)
+      decode_value = '_components[%d].decode_from_stream(in_stream, True)' % i
+    if field.type.nullable:
+      encode_lines.append('  if v%d is not None: %s' % (i, encode_value))
+    else:
+      encode_lines.append('  ' + encode_value)
+    decode_args.append('      %s,' % decode_value)
+
+  decode_lines = [
+      'def decode(in_stream):',
+      '  nvals = in_stream.read_var_int64()',
+      '  null_markers = in_stream.read_all(True)',
+      '  if null_markers or nvals < %d:' % nvals,
+      '    return _decode_with_nulls(in_stream, nvals, null_markers)',
+      '  return _constructor(',
+  ] + decode_args + ['  )']
+
+  source = '\n'.join(encode_lines + decode_lines) + '\n'
+  # The generated source refers to fields by position only; their names and
+  # coders are passed in the namespace, so no user supplied text is run.
+  code = compile(source, '<row_coder %s>' % impl.schema.id, 'exec')
+  exec(code, namespace)  # pylint: disable=exec-used
+  return namespace['encode'], namespace['decode']
@@ -27,6 +27,8 @@ import numpy as np
 from past.builtins import unicode
 
 from apache_beam.coders import RowCoder
+from apache_beam.coders.coder_impl import create_InputStream
+from apache_beam.coders.coder_impl import create_OutputStream
 from apache_beam.coders.typecoders import registry as coders_registry
 from apache_beam.portability.api import schema_pb2
 from apache_beam.typehints.schemas import typing_to_runner_api
@@ -87,6 +89,27 @@ class RowCoderTest(unittest.TestCase):
     for test_case in self.TEST_CASES:
       self.assertEqual(test_case, coder.decode(coder.encode(test_case)))
 
+  def test_specialized_codec_matches_generic(self):
+    impl = coders_registry.get_coder(Person).get_impl()
+
+    for test_case in self.TEST_CASES:
+      out = create_OutputStream()
+      impl._encode_generic(test_case, out)
+      self.assertEqual(out.get(), impl.encode(test_case))
+      self.assertEqual(
+          test_case,
+          impl._decode_generic(create_InputStream(impl.encode(test_case))))
+
+  def test_encode_all_decode_all(self):
+    impl = coders_registry.get_coder(Person).get_impl()
+
+    encoded = impl.encode_all(self.TEST_CASES)
+    self.assertEqual(
+        b''.join(impl.encode(test_case) for test_case in self.TEST_CASES),
+        encoded)
+    self.assertEqual(self.TEST_CASES, impl.decode_all(encoded))
+    self.assertEqual([], impl.decode_all(impl.encode_all([])))
+
   @unittest.skip(
       "BEAM-8030 - Overflow behavior in VarIntCoder is currently inconsistent"
   )
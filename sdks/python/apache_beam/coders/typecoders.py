@@ -99,6 +99,7 @@ class CoderRegistry(object):
     self._register_coder_internal(bool, coders.BooleanCoder)
     self._register_coder_internal(unicode, coders.StrUtf8Coder)
     self._register_coder_internal(typehints.TupleConstraint, coders.TupleCoder)
+    self._register_coder_internal(typehints.DictConstraint, coders.MapCoder)
     # Default fallback coders applied in that order until the first matching
     # coder found.
     default_fallback_coders = [coders.ProtoCoder, coders.FastPrimitivesCoder]
@@ -134,6 +135,17 @@ class CoderRegistry(object):
       if isinstance(typehint, (typehints.IterableTypeConstraint,
                                typehints.ListConstraint)):
         return coders.IterableCoder.from_type_hint(typehint, self)
+      elif (isinstance(typehint, typehints.TupleSequenceConstraint)
+            and not isinstance(typehint.inner_type,
+                               typehints.AnyTypeConstraint)):
+        # Tuple[Any, ...] is inferred for any call to tuple(), including
+        # key-value pairs, so it keeps the fallback coder, which can act as a
+        # KV coder.
+        return coders.TupleSequenceCoder.from_type_hint(typehint, self)
+      elif (isinstance(typehint, typehints.UnionConstraint)
+            and len(typehint.union_types) == 2
+            and type(None) in typehint.union_types):
+        return coders.NullableCoder.from_type_hint(typehint, self)
       elif typehint is None:
         # In some old code, None is used for Any.
         # TODO(robertwb): Clean this up.
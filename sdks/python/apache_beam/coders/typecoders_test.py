@@ -153,6 +153,34 @@ class TypeCodersTest(unittest.TestCase):
     self.assertIs(list,
                   type(expected_coder.decode(expected_coder.encode(values))))
 
+  def test_tuple_sequence_coder(self):
+    real_coder = typecoders.registry.get_coder(typehints.Tuple[int, ...])
+    expected_coder = coders.TupleSequenceCoder(coders.VarIntCoder())
+    self.assertEqual(expected_coder, real_coder)
+    self.assertEqual((1, 2, 3), real_coder.decode(real_coder.encode((1, 2, 3))))
+    # Tuple[Any, ...] is also inferred for key-value pairs.
+    self.assertTrue(
+        typecoders.registry.get_coder(
+            typehints.Tuple[typehints.Any, ...]).is_kv_coder())
+
+  def test_dict_coder(self):
+    real_coder = typecoders.registry.get_coder(typehints.Dict[bytes, float])
+    expected_coder = coders.MapCoder(coders.BytesCoder(), coders.FloatCoder())
+    values = {b'abc': 1.5, b'xyz': -2.0}
+    self.assertEqual(expected_coder, real_coder)
+    self.assertEqual(values, real_coder.decode(real_coder.encode(values)))
+
+  def test_optional_coder(self):
+    real_coder = typecoders.registry.get_coder(typehints.Optional[int])
+    expected_coder = coders.NullableCoder(coders.VarIntCoder())
+    self.assertEqual(expected_coder, real_coder)
+    self.assertEqual(None, real_coder.decode(real_coder.encode(None)))
+    self.assertEqual(5, real_coder.decode(real_coder.encode(5)))
+    self.assertEqual(
+        coders.FastPrimitivesCoder,
+        typecoders.registry.get_coder(
+            typehints.Union[int, bytes, None]).__class__)
+
 
 if __name__ == '__main__':
   unittest.main()
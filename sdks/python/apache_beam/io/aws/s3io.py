@@ -32,6 +32,7 @@ from builtins import object
 from apache_beam.io.aws.clients.s3 import messages
 from apache_beam.io.filesystemio import Downloader
 from apache_beam.io.filesystemio import DownloaderStream
+from apache_beam.io.filesystemio import PrefetchingDownloaderStream
 from apache_beam.io.filesystemio import Uploader
 from apache_beam.io.filesystemio import UploaderStream
 from apache_beam.utils import retry
@@ -46,6 +47,14 @@ except ImportError:
 
 MAX_BATCH_OPERATION_SIZE = 100
 
+# Maximum number of concurrent partial-file reads issued ahead of the current
+# position when reading a file sequentially.
+DEFAULT_READ_AHEAD_REQUESTS = 4
+
+# Size of the first partial-file read after opening or seeking. Subsequent
+# sequential reads double in size up to the read buffer size.
+MIN_READ_AHEAD_CHUNK_SIZE = 1024 * 1024
+
 
 def parse_s3_path(s3_path, object_optional=False):
   """Return the bucket and object names of the given s3:// path."""
@@ -72,7 +81,8 @@ class S3IO(object):
            filename,
            mode='r',
            read_buffer_size=16*1024*1024,
-           mime_type='application/octet-stream'):
+           mime_type='application/octet-stream',
+           read_ahead_requests=DEFAULT_READ_AHEAD_REQUESTS):
     """Open an S3 file path for reading or writing.
 
     Args:
@@ -80,6 +90,9 @@ class S3IO(object):
       mode (str): ``'r'`` for reading or ``'w'`` for writing.
       read_buffer_size (int): Buffer size to use during read operations.
       mime_type (str): Mime type to set for write operations.
+      read_ahead_requests (int): Maximum number of concurrent partial-file
+        reads issued ahead of the current position. If 0, each read waits
+        for its own request.
 
     Returns:
       S3 file object.
@@ -90,8 +103,15 @@ class S3IO(object):
     if mode == 'r' or mode == 'rb':
       downloader = S3Downloader(self.client, filename,
                                 buffer_size=read_buffer_size)
-      return io.BufferedReader(DownloaderStream(downloader, mode=mode),
-                               buffer_size=read_buffer_size)
+      if read_ahead_requests:
+        stream = PrefetchingDownloaderStream(
+            downloader, mode=mode,
+            max_concurrent_requests=read_ahead_requests,
+            min_chunk_size=MIN_READ_AHEAD_CHUNK_SIZE,
+            max_chunk_size=read_buffer_size)
+      else:
+        stream = DownloaderStream(downloader, mode=mode)
+      return io.BufferedReader(stream, buffer_size=read_buffer_size)
     elif mode == 'w' or mode == 'wb':
       uploader = S3Uploader(self.client, filename, mime_type)
       return io.BufferedWriter(UploaderStream(uploader, mode=mode),
@@ -21,20 +21,24 @@
 from __future__ import absolute_import
 
 import abc
+import collections
 import io
 import os
 from builtins import object
+from concurrent import futures
 
 from future.utils import with_metaclass
 
-__all__ = ['Downloader', 'Uploader', 'DownloaderStream', 'UploaderStream',
-           'PipeStream']
+__all__ = ['Downloader', 'Uploader', 'DownloaderStream',
+           'PrefetchingDownloaderStream', 'UploaderStream', 'PipeStream']
 
 
 class Downloader(with_metaclass(abc.ABCMeta, object)):  # type: ignore[misc]
   """Download interface for a single file.
 
-  Implementations should support random access reads.
+  Implementations should support random access reads. Implementations used
+  with ``PrefetchingDownloaderStream`` must also support concurrent calls to
+  ``get_range`` from multiple threads.
   """
 
   @abc.abstractproperty
@@ -175,6 +179,117 @@ class DownloaderStream(io.RawIOBase):
     return b''.join(res)
 
 
+class PrefetchingDownloaderStream(DownloaderStream):
+  """A DownloaderStream that reads ahead with concurrent range requests.
+
+  Sequential reads are served from a window of up to
+  ``max_concurrent_requests`` chunks that are fetched in the background. The
+  chunk size starts at ``min_chunk_size`` and doubles with every chunk
+  requested while reading sequentially, up to ``max_chunk_size``. Seeking
+  outside of the window discards it and starts over with the smallest chunk
+  size, so random access does not download much more than it reads.
+
+  The chunks are downloaded on ``executor`` if one is given, which lets many
+  streams share threads. Otherwise the stream starts threads of its own.
+  """
+
+  def __init__(self,
+               downloader,
+               read_buffer_size=io.DEFAULT_BUFFER_SIZE,
+               mode='rb',
+               max_concurrent_requests=4,
+               min_chunk_size=1024 * 1024,
+               max_chunk_size=16 * 1024 * 1024,
+               executor=None):
+    """Initializes the stream.
+
+    Args:
+      downloader: (Downloader) Filesystem dependent implementation.
+      read_buffer_size: (int) Buffer size to use during read operations.
+      mode: (string) Python mode attribute for this stream.
+      max_concurrent_requests: (int) Maximum number of chunks that are being
+        downloaded or held in memory at any time.
+      min_chunk_size: (int) Size of the first chunk requested after opening
+        or seeking.
+      max_chunk_size: (int) Maximum size of a chunk.
+      executor: (concurrent.futures.Executor) Optional executor to download
+        the chunks on. It is not shut down when the stream is closed.
+    """
+    super(PrefetchingDownloaderStream, self).__init__(
+        downloader, read_buffer_size=read_buffer_size, mode=mode)
+    if max_concurrent_requests < 1:
+      raise ValueError('max_concurrent_requests must be positive: %d'
+                       % max_concurrent_requests)
+    self._max_concurrent_requests = max_concurrent_requests
+    self._min_chunk_size = max(1, min(min_chunk_size, max_chunk_size))
+    self._max_chunk_size = max(1, max_chunk_size)
+    self._chunk_size = self._min_chunk_size
+    # Deque of (start, end, future) for contiguous chunks in order.
+    self._chunks = collections.deque()
+    self._next_chunk_start = 0
+    self._executor = executor
+    self._owns_executor = executor is None
+
+  def _reset_chunks(self, position):
+    for _, _, future in self._chunks:
+      future.cancel()
+    self._chunks.clear()
+    self._next_chunk_start = position
+    self._chunk_size = self._min_chunk_size
+
+  def _request_chunks(self):
+    if self._executor is None:
+      self._executor = futures.ThreadPoolExecutor(
+          max_workers=self._max_concurrent_requests)
+    size = self._downloader.size
+    while (len(self._chunks) < self._max_concurrent_requests
+           and self._next_chunk_start < size):
+      start = self._next_chunk_start
+      end = min(start + self._chunk_size, size)
+      self._chunks.append((start, end, self._executor.submit(
+          self._downloader.get_range, start, end)))
+      self._next_chunk_start = end
+      self._chunk_size = min(self._chunk_size * 2, self._max_chunk_size)
+
+  def readinto(self, b):
+    """Read up to len(b) bytes into b.
+
+    Returns number of bytes read (0 for EOF).
+
+    Args:
+      b: (bytearray/memoryview) Buffer to read into.
+    """
+    self._checkClosed()
+    if self._position >= self._downloader.size:
+      return 0
+
+    # Drop the chunks before the current position. If it is not within the
+    # remaining chunks, start a new window at the current position.
+    while self._chunks and self._chunks[0][1] <= self._position:
+      self._chunks.popleft()
+    if not self._chunks or self._chunks[0][0] > self._position:
+      self._reset_chunks(self._position)
+    self._request_chunks()
+
+    start, end, future = self._chunks[0]
+    data = memoryview(future.result())
+    offset = self._position - start
+    num_bytes = min(len(b), len(data) - offset)
+    b[:num_bytes] = data[offset:offset + num_bytes]
+    self._position += num_bytes
+    if self._position >= end:
+      self._chunks.popleft()
+    return num_bytes
+
+  def close(self):
+    if not self.closed:
+      self._reset_chunks(self._position)
+      if self._owns_executor and self._executor is not None:
+        self._executor.shutdown(wait=False)
+      self._executor = None
+    super(PrefetchingDownloaderStream, self).close()
+
+
 class UploaderStream(io.RawIOBase):
   """Provides a stream interface for Uploader objects."""
 
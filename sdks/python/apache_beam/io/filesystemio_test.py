@@ -27,6 +27,7 @@ import os
 import threading
 import unittest
 from builtins import range
+from concurrent import futures
 
 from apache_beam.io import filesystemio
 
@@ -38,13 +39,17 @@ class FakeDownloader(filesystemio.Downloader):
   def __init__(self, data):
     self._data = data
     self.last_read_size = -1
+    self.read_sizes = []
+    self._lock = threading.Lock()
 
   @property
   def size(self):
     return len(self._data)
 
   def get_range(self, start, end):
-    self.last_read_size = end - start
+    with self._lock:
+      self.last_read_size = end - start
+      self.read_sizes.append(end - start)
     return self._data[start:end]
 
 
@@ -106,6 +111,68 @@ class TestDownloaderStream(unittest.TestCase):
     self.assertEqual(stream.read(), data[1:])
 
 
+class TestPrefetchingDownloaderStream(unittest.TestCase):
+
+  def _stream(self, downloader, **kwargs):
+    stream = filesystemio.PrefetchingDownloaderStream(downloader, **kwargs)
+    self.addCleanup(stream.close)
+    return stream
+
+  def test_read_empty(self):
+    downloader = FakeDownloader(data=b'')
+    stream = self._stream(downloader)
+    self.assertEqual(stream.read(), b'')
+
+  def test_read_sequential(self):
+    data = os.urandom(1000)
+    downloader = FakeDownloader(data)
+    stream = io.BufferedReader(
+        self._stream(downloader, max_concurrent_requests=3, min_chunk_size=10,
+                     max_chunk_size=100),
+        buffer_size=7)
+    read_data = []
+    while True:
+      chunk = stream.read(13)
+      if not chunk:
+        break
+      read_data.append(chunk)
+    self.assertEqual(b''.join(read_data), data)
+    # Chunk sizes double up to max_chunk_size.
+    self.assertEqual(
+        sorted(downloader.read_sizes),
+        sorted([10, 20, 40, 80] + [100] * 8 + [50]))
+
+  def test_read_with_seek(self):
+    data = os.urandom(1000)
+    downloader = FakeDownloader(data)
+    stream = io.BufferedReader(
+        self._stream(downloader, max_concurrent_requests=2, min_chunk_size=16,
+                     max_chunk_size=64),
+        buffer_size=5)
+    for position, size in [(0, 10), (500, 100), (20, 30), (990, 20), (0, 1)]:
+      stream.seek(position)
+      self.assertEqual(stream.read(size), data[position:position + size])
+    stream.seek(100)
+    self.assertEqual(stream.read(), data[100:])
+
+  def test_read_on_shared_executor(self):
+    data = os.urandom(1000)
+    executor = futures.ThreadPoolExecutor(max_workers=2)
+    self.addCleanup(executor.shutdown)
+    for _ in range(2):
+      stream = self._stream(FakeDownloader(data), min_chunk_size=100,
+                            executor=executor)
+      self.assertEqual(stream.read(), data)
+      stream.close()
+    # Closing the streams leaves the executor running.
+    self.assertEqual(1, executor.submit(lambda: 1).result())
+
+  def test_invalid_max_concurrent_requests(self):
+    with self.assertRaises(ValueError):
+      filesystemio.PrefetchingDownloaderStream(
+          FakeDownloader(b'a'), max_concurrent_requests=0)
+
+
 class TestUploaderStream(unittest.TestCase):
 
   def test_file_attributes(self):
@@ -238,6 +238,7 @@ import decimal
 import itertools
 import json
 import logging
+import threading
 import time
 import uuid
 from builtins import object
@@ -251,6 +252,7 @@ from apache_beam import coders
 from apache_beam import pvalue
 from apache_beam.internal.gcp.json_value import from_json_value
 from apache_beam.internal.gcp.json_value import to_json_value
+from apache_beam.io.avroio import _create_avro_source as create_avro_source
 from apache_beam.io.filesystems import CompressionTypes
 from apache_beam.io.filesystems import FileSystems
 from apache_beam.io.gcp import bigquery_tools
@@ -274,6 +276,7 @@ from apache_beam.transforms.window import GlobalWindows
 from apache_beam.utils import retry
 from apache_beam.utils.annotations import deprecated
 from apache_beam.utils.annotations import experimental
+from apache_beam.utils.thread_pool_executor import shared_bounded_executor
 
 __all__ = [
     'TableRowJsonCoder',
@@ -591,7 +594,8 @@ class _JsonToDictCoder(coders.Coder):
 class _CustomBigQuerySource(BoundedSource):
   def __init__(self, gcs_location=None, table=None, dataset=None,
                project=None, query=None, validate=False, coder=None,
-               use_standard_sql=False, flatten_results=True, kms_key=None):
+               use_standard_sql=False, flatten_results=True, kms_key=None,
+               export_file_format=None):
     if table is not None and query is not None:
       raise ValueError('Both a BigQuery table and a query were specified.'
                        ' Please specify only one of these.')
@@ -614,6 +618,13 @@ class _CustomBigQuerySource(BoundedSource):
     self.flatten_results = flatten_results
     self.coder = coder or _JsonToDictCoder
     self.kms_key = kms_key
+    self.export_file_format = (export_file_format or
+                               bigquery_tools.FileFormat.JSON)
+    if self.export_file_format not in (bigquery_tools.FileFormat.JSON,
+                                       bigquery_tools.FileFormat.AVRO):
+      raise ValueError(
+          'Only JSON and AVRO exports are supported, got %r.'
+          % self.export_file_format)
     self.split_result = None
 
   def estimate_size(self):
@@ -640,10 +651,15 @@ class _CustomBigQuerySource(BoundedSource):
         self.table_reference = self._execute_query(bq)
 
       schema, metadata_list = self._export_files(bq)
-      self.split_result = [TextSource(metadata.path, 0,
-                                      CompressionTypes.UNCOMPRESSED, True,
-                                      self.coder(schema))
-                           for metadata in metadata_list]
+      if self.export_file_format == bigquery_tools.FileFormat.AVRO:
+        self.split_result = [create_avro_source(metadata.path,
+                                                use_fastavro=True)
+                             for metadata in metadata_list]
+      else:
+        self.split_result = [TextSource(metadata.path, 0,
+                                        CompressionTypes.UNCOMPRESSED, True,
+                                        self.coder(schema))
+                             for metadata in metadata_list]
 
       if self.query is not None:
         bq.clean_up_temporary_dataset(self.project)
@@ -688,7 +704,7 @@ class _CustomBigQuerySource(BoundedSource):
     job_id = uuid.uuid4().hex
     job_ref = bq.perform_extract_job([self.gcs_location], job_id,
                                      self.table_reference,
-                                     bigquery_tools.ExportFileFormat.JSON,
+                                     self.export_file_format,
                                      include_header=False)
     bq.wait_for_bq_job(job_ref)
     metadata_list = FileSystems.match([self.gcs_location])[0].metadata_list
@@ -878,7 +894,9 @@ class BigQueryWriteFn(DoFn):
       test_client=None,
       max_buffered_rows=None,
       retry_strategy=None,
-      additional_bq_parameters=None):
+      additional_bq_parameters=None,
+      batch_size_bytes=None,
+      max_inserts_in_flight=None):
     """Initialize a WriteToBigQuery transform.
 
     Args:
@@ -914,6 +932,14 @@ class BigQueryWriteFn(DoFn):
         to be passed when creating a BigQuery table. These are passed when
         triggering a load job for FILE_LOADS, and when creating a new table for
         STREAMING_INSERTS.
+      batch_size_bytes: If set, the approximate maximum size in bytes of the
+        rows written to a destination per streaming API insert. Batches are
+        flushed when either this or batch_size is reached.
+      max_inserts_in_flight: If set, insert requests are issued asynchronously
+        from a pool of this many threads shared by the worker, and the bundle
+        only blocks when that many requests are already in flight. All pending
+        requests are awaited in finish_bundle. By default every insert is
+        issued synchronously while processing the bundle.
     """
     self.schema = schema
     self.test_client = test_client
@@ -930,12 +956,18 @@ class BigQueryWriteFn(DoFn):
                                or BigQueryWriteFn.DEFAULT_MAX_BUFFERED_ROWS)
     self._retry_strategy = (
         retry_strategy or bigquery_tools.RetryStrategy.RETRY_ALWAYS)
+    self._max_batch_size_bytes = batch_size_bytes
+    self._max_inserts_in_flight = max_inserts_in_flight
+    self._pending_inserts = []
+    self._insert_local = None
 
     self.additional_bq_parameters = additional_bq_parameters or {}
 
   def display_data(self):
     return {'max_batch_size': self._max_batch_size,
+            'max_batch_size_bytes': str(self._max_batch_size_bytes),
             'max_buffered_rows': self._max_buffered_rows,
+            'max_inserts_in_flight': str(self._max_inserts_in_flight),
             'retry_strategy': self._retry_strategy,
             'create_disposition': str(self.create_disposition),
             'write_disposition': str(self.write_disposition),
@@ -943,6 +975,7 @@ class BigQueryWriteFn(DoFn):
 
   def _reset_rows_buffer(self):
     self._rows_buffer = collections.defaultdict(lambda: [])
+    self._rows_buffer_bytes = collections.defaultdict(int)
 
   @staticmethod
   def get_table_schema(schema):
@@ -973,11 +1006,24 @@ class BigQueryWriteFn(DoFn):
 
     self._observed_tables = set()
 
-    self._backoff_calculator = iter(retry.FuzzedExponentialIntervals(
+    self._backoff_calculator = self._new_backoff_calculator()
+
+    self._pending_inserts = []
+    if self._max_inserts_in_flight and self._insert_local is None:
+      self._insert_local = threading.local()
+
+  @staticmethod
+  def _new_backoff_calculator():
+    return iter(retry.FuzzedExponentialIntervals(
         initial_delay_secs=0.2,
         num_retries=10000,
         max_delay_secs=1500))
 
+  @staticmethod
+  def _get_row_byte_size(row):
+    # An estimate of the size of the row in the JSON payload of the request.
+    return len(json.dumps(row, default=str))
+
   def _create_table_if_needed(self, table_reference, schema=None):
     str_table_reference = '%s:%s.%s' % (
         table_reference.projectId,
@@ -1026,15 +1072,31 @@ class BigQueryWriteFn(DoFn):
     destination = bigquery_tools.get_hashable_destination(destination)
 
     row_and_insert_id = element[1]
+    outputs = []
+    row_byte_size = 0
+    if self._max_batch_size_bytes:
+      row_byte_size = self._get_row_byte_size(row_and_insert_id[0])
+      if (self._rows_buffer[destination] and
+          self._rows_buffer_bytes[destination] + row_byte_size >
+          self._max_batch_size_bytes):
+        outputs.extend(self._flush_batch(destination))
+
     self._rows_buffer[destination].append(row_and_insert_id)
+    self._rows_buffer_bytes[destination] += row_byte_size
     self._total_buffered_rows += 1
     if len(self._rows_buffer[destination]) >= self._max_batch_size:
-      return self._flush_batch(destination)
+      outputs.extend(self._flush_batch(destination))
     elif self._total_buffered_rows >= self._max_buffered_rows:
-      return self._flush_all_batches()
+      outputs.extend(self._flush_all_batches())
+
+    if self._pending_inserts:
+      outputs.extend(self._collect_inserts(wait=False))
+    return outputs
 
   def finish_bundle(self):
-    return self._flush_all_batches()
+    outputs = list(self._flush_all_batches())
+    outputs.extend(self._collect_inserts(wait=True))
+    return outputs
 
   def _flush_all_batches(self):
     _LOGGER.debug('Attempting to flush to all destinations. Total buffered: %s',
@@ -1047,7 +1109,9 @@ class BigQueryWriteFn(DoFn):
   def _flush_batch(self, destination):
 
     # Flush the current batch of rows to BigQuery.
-    rows_and_insert_ids = self._rows_buffer[destination]
+    rows_and_insert_ids = self._rows_buffer.pop(destination)
+    self._rows_buffer_bytes.pop(destination, None)
+    self._total_buffered_rows -= len(rows_and_insert_ids)
     table_reference = bigquery_tools.parse_table_reference(destination)
 
     if table_reference.projectId is None:
@@ -1057,11 +1121,53 @@ class BigQueryWriteFn(DoFn):
     _LOGGER.debug('Flushing data to %s. Total %s rows.',
                   destination, len(rows_and_insert_ids))
 
+    if self._max_inserts_in_flight:
+      self._submit_insert(destination, table_reference, rows_and_insert_ids)
+      return []
+
+    failed_rows = self._insert_rows(
+        self.bigquery_wrapper, self._backoff_calculator, table_reference,
+        rows_and_insert_ids)
+    return self._failed_rows_outputs(destination, failed_rows)
+
+  def _submit_insert(self, destination, table_reference, rows_and_insert_ids):
+    pool = shared_bounded_executor(
+        BigQueryWriteFn, self._max_inserts_in_flight)
+    future = pool.submit(
+        self._insert_rows_async, table_reference, rows_and_insert_ids)
+    self._pending_inserts.append((destination, future))
+
+  def _insert_rows_async(self, table_reference, rows_and_insert_ids):
+    # API clients are not thread-safe, so each pool thread uses its own.
+    bigquery_wrapper = getattr(self._insert_local, 'bigquery_wrapper', None)
+    if bigquery_wrapper is None:
+      bigquery_wrapper = bigquery_tools.BigQueryWrapper(
+          client=self.test_client)
+      self._insert_local.bigquery_wrapper = bigquery_wrapper
+    return self._insert_rows(
+        bigquery_wrapper, self._new_backoff_calculator(), table_reference,
+        rows_and_insert_ids)
+
+  def _collect_inserts(self, wait):
+    """Returns the failed rows of completed inserts, optionally awaiting all."""
+    outputs = []
+    pending_inserts = []
+    for destination, future in self._pending_inserts:
+      if wait or future.done():
+        outputs.extend(
+            self._failed_rows_outputs(destination, future.result()))
+      else:
+        pending_inserts.append((destination, future))
+    self._pending_inserts = pending_inserts
+    return outputs
+
+  def _insert_rows(self, bigquery_wrapper, backoff_calculator, table_reference,
+                   rows_and_insert_ids):
     rows = [r[0] for r in rows_and_insert_ids]
     insert_ids = [r[1] for r in rows_and_insert_ids]
 
     while True:
-      passed, errors = self.bigquery_wrapper.insert_rows(
+      passed, errors = bigquery_wrapper.insert_rows(
           project_id=table_reference.projectId,
           dataset_id=table_reference.datasetId,
           table_id=table_reference.tableId,
@@ -1082,14 +1188,15 @@ class BigQueryWriteFn(DoFn):
       if not should_retry:
         break
       else:
-        retry_backoff = next(self._backoff_calculator)
+        retry_backoff = next(backoff_calculator)
         _LOGGER.info('Sleeping %s seconds before retrying insertion.',
                      retry_backoff)
         time.sleep(retry_backoff)
 
-    self._total_buffered_rows -= len(self._rows_buffer[destination])
-    del self._rows_buffer[destination]
+    return failed_rows
 
+  @staticmethod
+  def _failed_rows_outputs(destination, failed_rows):
     return [pvalue.TaggedOutput(BigQueryWriteFn.FAILED_ROWS,
                                 GlobalWindows.windowed_value(
                                     (destination, row))) for row in failed_rows]
@@ -1108,7 +1215,9 @@ class _StreamToBigQuery(PTransform):
                kms_key,
                retry_strategy,
                additional_bq_parameters,
-               test_client=None):
+               test_client=None,
+               batch_size_bytes=None,
+               max_inserts_in_flight=None):
     self.table_reference = table_reference
     self.table_side_inputs = table_side_inputs
     self.schema_side_inputs = schema_side_inputs
@@ -1120,6 +1229,8 @@ class _StreamToBigQuery(PTransform):
     self.retry_strategy = retry_strategy
     self.test_client = test_client
     self.additional_bq_parameters = additional_bq_parameters
+    self.batch_size_bytes = batch_size_bytes
+    self.max_inserts_in_flight = max_inserts_in_flight
 
   class InsertIdPrefixFn(DoFn):
 
@@ -1144,7 +1255,9 @@ class _StreamToBigQuery(PTransform):
         kms_key=self.kms_key,
         retry_strategy=self.retry_strategy,
         test_client=self.test_client,
-        additional_bq_parameters=self.additional_bq_parameters)
+        additional_bq_parameters=self.additional_bq_parameters,
+        batch_size_bytes=self.batch_size_bytes,
+        max_inserts_in_flight=self.max_inserts_in_flight)
 
     return (input
             | 'AppendDestination' >> beam.ParDo(
@@ -1193,7 +1306,10 @@ class WriteToBigQuery(PTransform):
                table_side_inputs=None,
                schema_side_inputs=None,
                triggering_frequency=None,
-               validate=True):
+               validate=True,
+               batch_size_bytes=None,
+               max_inserts_in_flight=None,
+               temp_file_format=None):
     """Initialize a WriteToBigQuery transform.
 
     Args:
@@ -1292,6 +1408,19 @@ bigquery_v2_messages.TableSchema`. or a `ValueProvider` that has a JSON string,
         about BigQuery quotas.
       validate: Indicates whether to perform validation checks on
         inputs. This parameter is primarily used for testing.
+      batch_size_bytes (int): Approximate maximum size in bytes of the rows
+        written to a table per streaming API insert. By default batches are
+        only bounded by batch_size.
+      max_inserts_in_flight (int): If set, streaming API inserts are issued
+        asynchronously, with at most this many requests in flight per worker.
+        Bundles still wait for all of their inserts to complete before they
+        are committed. By default inserts are issued synchronously.
+      temp_file_format (str): The ``bigquery_tools.FileFormat`` of the files
+        written for FILE_LOADS. JSON (the default) or AVRO. Avro files are
+        smaller and cheaper to write, but require a schema, and values must
+        have the Python types of their Avro types: e.g. ``datetime.datetime``
+        for TIMESTAMP, ``decimal.Decimal`` for NUMERIC and raw ``bytes`` for
+        BYTES.
     """
     self.table_reference = bigquery_tools.parse_table_reference(
         table, dataset, project)
@@ -1304,6 +1433,9 @@ bigquery_v2_messages.TableSchema`. or a `ValueProvider` that has a JSON string,
     else:
       self.schema = WriteToBigQuery.get_dict_table_schema(schema)
     self.batch_size = batch_size
+    self.batch_size_bytes = batch_size_bytes
+    self.max_inserts_in_flight = max_inserts_in_flight
+    self.temp_file_format = temp_file_format
     self.kms_key = kms_key
     self.test_client = test_client
 
@@ -1444,7 +1576,11 @@ bigquery_v2_messages.TableSchema):
                                           self.kms_key,
                                           self.insert_retry_strategy,
                                           self.additional_bq_parameters,
-                                          test_client=self.test_client)
+                                          test_client=self.test_client,
+                                          batch_size_bytes=(
+                                              self.batch_size_bytes),
+                                          max_inserts_in_flight=(
+                                              self.max_inserts_in_flight))
 
       return {BigQueryWriteFn.FAILED_ROWS: outputs[BigQueryWriteFn.FAILED_ROWS]}
     else:
@@ -1463,7 +1599,8 @@ bigquery_v2_messages.TableSchema):
           schema_side_inputs=self.schema_side_inputs,
           additional_bq_parameters=self.additional_bq_parameters,
           validate=self._validate,
-          is_streaming_pipeline=is_streaming_pipeline)
+          is_streaming_pipeline=is_streaming_pipeline,
+          temp_file_format=self.temp_file_format)
 
   def display_data(self):
     res = {}
@@ -1507,7 +1644,7 @@ class _ReadFromBigQuery(PTransform):
   """Read data from BigQuery.
 
     This PTransform uses a BigQuery export job to take a snapshot of the table
-    on GCS, and then reads from each produced JSON file.
+    on GCS, and then reads from each produced JSON or Avro file.
 
     Do note that currently this source does not work with DirectRunner.
 
@@ -1535,7 +1672,7 @@ class _ReadFromBigQuery(PTransform):
     coder (~apache_beam.coders.coders.Coder): The coder for the table
       rows. If :data:`None`, then the default coder is
       _JsonToDictCoder, which will interpret every row as a JSON
-      serialized dictionary.
+      serialized dictionary. Not used for Avro exports.
     use_standard_sql (bool): Specifies whether to use BigQuery's standard SQL
       dialect for this query. The default value is :data:`False`.
       If set to :data:`True`, the query will use BigQuery's updated SQL
@@ -1549,6 +1686,11 @@ class _ReadFromBigQuery(PTransform):
       the extracted table should be written as a string or
       a :class:`~apache_beam.options.value_provider.ValueProvider`. If
       :data:`None`, then the temp_location parameter is used.
+    export_file_format (str): The ``bigquery_tools.FileFormat`` of the files
+      the table is exported to. JSON (the default) or AVRO. Avro files are
+      smaller and much cheaper to decode than JSON, but values are read with
+      the Python types of their Avro types: e.g. ``datetime.datetime`` for
+      TIMESTAMP, ``decimal.Decimal`` for NUMERIC and raw ``bytes`` for BYTES.
    """
   def __init__(self, gcs_location=None, validate=False, *args, **kwargs):
     if gcs_location:
@@ -1569,7 +1711,11 @@ class _ReadFromBigQuery(PTransform):
     """Returns the fully qualified Google Cloud Storage URI where the
     extracted table should be written.
     """
-    file_pattern = 'bigquery-table-dump-*.json'
+    if (self._kwargs.get('export_file_format') ==
+        bigquery_tools.FileFormat.AVRO):
+      file_pattern = 'bigquery-table-dump-*.avro'
+    else:
+      file_pattern = 'bigquery-table-dump-*.json'
 
     if self.gcs_location is not None:
       gcs_base = self.gcs_location.get()
@@ -100,7 +100,14 @@ def file_prefix_generator(with_validation=True,
   return _generate_file_prefix
 
 
-def _make_new_file_writer(file_prefix, destination):
+def _make_new_file_writer(file_prefix, destination, file_format=None,
+                          schema=None, schema_side_inputs=(), coder=None):
+  if file_format == bigquery_tools.FileFormat.AVRO:
+    if callable(schema):
+      schema = schema(destination, *schema_side_inputs)
+    elif isinstance(schema, vp.ValueProvider):
+      schema = schema.get()
+
   destination = bigquery_tools.get_hashable_destination(destination)
 
   # Windows does not allow : on filenames. Replacing with underscore.
@@ -116,7 +123,13 @@ def _make_new_file_writer(file_prefix, destination):
   file_name = str(uuid.uuid4())
   file_path = fs.FileSystems.join(file_prefix, destination, file_name)
 
-  return file_path, fs.FileSystems.create(file_path, 'application/text')
+  if file_format == bigquery_tools.FileFormat.AVRO:
+    writer = bigquery_tools.AvroRowWriter(
+        fs.FileSystems.create(file_path, 'application/avro'), schema)
+  else:
+    writer = bigquery_tools.JsonRowWriter(
+        fs.FileSystems.create(file_path, 'application/text'), coder)
+  return file_path, writer
 
 
 def _bq_uuid(seed=None):
@@ -168,7 +181,9 @@ class WriteRecordsToFile(beam.DoFn):
   def __init__(self,
                max_files_per_bundle=_DEFAULT_MAX_WRITERS_PER_BUNDLE,
                max_file_size=_DEFAULT_MAX_FILE_SIZE,
-               coder=None):
+               coder=None,
+               schema=None,
+               file_format=None):
     """Initialize a :class:`WriteRecordsToFile`.
 
     Args:
@@ -177,23 +192,31 @@ class WriteRecordsToFile(beam.DoFn):
         whelming the worker memory.
       max_file_size (int): The maximum size in bytes for a file to be used in
         an export job.
+      coder: The coder of rows written to JSON files.
+      schema: The schema of the destination tables, or a callable that returns
+        it for a destination. Required to write Avro files.
+      file_format: The ``bigquery_tools.FileFormat`` of the files. Either JSON
+        (the default) or AVRO.
 
     """
     self.max_files_per_bundle = max_files_per_bundle
     self.max_file_size = max_file_size
     self.coder = coder or bigquery_tools.RowAsDictJsonCoder()
+    self.schema = schema
+    self.file_format = file_format or bigquery_tools.FileFormat.JSON
 
   def display_data(self):
     return {
         'max_files_per_bundle': self.max_files_per_bundle,
         'max_file_size': str(self.max_file_size),
-        'coder': self.coder.__class__.__name__
+        'coder': self.coder.__class__.__name__,
+        'file_format': self.file_format,
     }
 
   def start_bundle(self):
     self._destination_to_file_writer = {}
 
-  def process(self, element, file_prefix):
+  def process(self, element, file_prefix, *schema_side_inputs):
     """Take a tuple with (destination, row) and write to file or spill out.
 
     Destination may be a ``TableReference`` or a string, and row is a
@@ -204,7 +227,8 @@ class WriteRecordsToFile(beam.DoFn):
     if destination not in self._destination_to_file_writer:
       if len(self._destination_to_file_writer) < self.max_files_per_bundle:
         self._destination_to_file_writer[destination] = _make_new_file_writer(
-            file_prefix, destination)
+            file_prefix, element[0], self.file_format, self.schema,
+            schema_side_inputs, self.coder)
       else:
         yield pvalue.TaggedOutput(
             WriteRecordsToFile.UNWRITTEN_RECORD_TAG, element)
@@ -213,8 +237,7 @@ class WriteRecordsToFile(beam.DoFn):
     (file_path, writer) = self._destination_to_file_writer[destination]
 
     # TODO(pabloem): Is it possible for this to throw exception?
-    writer.write(self.coder.encode(row))
-    writer.write(b'\n')
+    writer.write(row)
 
     file_size = writer.tell()
     if file_size > self.max_file_size:
@@ -247,11 +270,13 @@ class WriteGroupedRecordsToFile(beam.DoFn):
   """
 
   def __init__(self, max_file_size=_DEFAULT_MAX_FILE_SIZE,
-               coder=None):
+               coder=None, schema=None, file_format=None):
     self.max_file_size = max_file_size
     self.coder = coder or bigquery_tools.RowAsDictJsonCoder()
+    self.schema = schema
+    self.file_format = file_format or bigquery_tools.FileFormat.JSON
 
-  def process(self, element, file_prefix):
+  def process(self, element, file_prefix, *schema_side_inputs):
     destination = element[0]
     rows = element[1]
 
@@ -259,10 +284,11 @@ class WriteGroupedRecordsToFile(beam.DoFn):
 
     for row in rows:
       if writer is None:
-        (file_path, writer) = _make_new_file_writer(file_prefix, destination)
+        (file_path, writer) = _make_new_file_writer(
+            file_prefix, destination, self.file_format, self.schema,
+            schema_side_inputs, self.coder)
 
-      writer.write(self.coder.encode(row))
-      writer.write(b'\n')
+      writer.write(row)
 
       file_size = writer.tell()
       if file_size > self.max_file_size:
@@ -350,11 +376,13 @@ class TriggerLoadJobs(beam.DoFn):
                write_disposition=None,
                test_client=None,
                temporary_tables=False,
-               additional_bq_parameters=None):
+               additional_bq_parameters=None,
+               source_format=None):
     self.schema = schema
     self.test_client = test_client
     self.temporary_tables = temporary_tables
     self.additional_bq_parameters = additional_bq_parameters or {}
+    self.source_format = source_format
     if self.temporary_tables:
       # If we are loading into temporary tables, we rely on the default create
       # and write dispositions, which mean that a new table will be created.
@@ -368,6 +396,7 @@ class TriggerLoadJobs(beam.DoFn):
     result = {'create_disposition': str(self.create_disposition),
               'write_disposition': str(self.write_disposition)}
     result['schema'] = str(self.schema)
+    result['source_format'] = str(self.source_format)
 
     return result
 
@@ -427,7 +456,8 @@ class TriggerLoadJobs(beam.DoFn):
         schema=schema,
         write_disposition=self.write_disposition,
         create_disposition=self.create_disposition,
-        additional_load_parameters=additional_parameters)
+        additional_load_parameters=additional_parameters,
+        source_format=self.source_format)
     yield (destination, job_reference)
 
 
@@ -552,7 +582,8 @@ class BigQueryBatchFileLoads(beam.PTransform):
       schema_side_inputs=None,
       test_client=None,
       validate=True,
-      is_streaming_pipeline=False):
+      is_streaming_pipeline=False,
+      temp_file_format=None):
     self.destination = destination
     self.create_disposition = create_disposition
     self.write_disposition = write_disposition
@@ -575,6 +606,17 @@ class BigQueryBatchFileLoads(beam.PTransform):
     self.test_client = test_client
     self.schema = schema
     self.coder = coder or bigquery_tools.RowAsDictJsonCoder()
+    self.temp_file_format = (temp_file_format or
+                             bigquery_tools.FileFormat.JSON)
+    if self.temp_file_format not in (bigquery_tools.FileFormat.JSON,
+                                     bigquery_tools.FileFormat.AVRO):
+      raise ValueError(
+          'Only JSON and AVRO temporary files are supported for file loads, '
+          'got %r.' % self.temp_file_format)
+    if (self.temp_file_format == bigquery_tools.FileFormat.AVRO and
+        (schema is None or schema == 'SCHEMA_AUTODETECT')):
+      raise ValueError(
+          'A schema must be provided to write AVRO files for file loads.')
 
     # If we have multiple destinations, then we will have multiple load jobs,
     # thus we will need temporary tables for atomicity.
@@ -637,8 +679,10 @@ class BigQueryBatchFileLoads(beam.PTransform):
         | beam.ParDo(
             WriteRecordsToFile(max_files_per_bundle=self.max_files_per_bundle,
                                max_file_size=self.max_file_size,
-                               coder=self.coder),
-            file_prefix=file_prefix_pcv).with_outputs(
+                               coder=self.coder,
+                               schema=self.schema,
+                               file_format=self.temp_file_format),
+            file_prefix_pcv, *self.schema_side_inputs).with_outputs(
                 WriteRecordsToFile.UNWRITTEN_RECORD_TAG,
                 WriteRecordsToFile.WRITTEN_FILE_TAG))
 
@@ -657,8 +701,11 @@ class BigQueryBatchFileLoads(beam.PTransform):
         | beam.ParDo(_ShardDestinations())
         | "GroupShardedRows" >> beam.GroupByKey()
         | "DropShardNumber" >> beam.Map(lambda x: (x[0][0], x[1]))
-        | "WriteGroupedRecordsToFile" >> beam.ParDo(WriteGroupedRecordsToFile(
-            coder=self.coder), file_prefix=file_prefix_pcv))
+        | "WriteGroupedRecordsToFile" >> beam.ParDo(
+            WriteGroupedRecordsToFile(coder=self.coder,
+                                      schema=self.schema,
+                                      file_format=self.temp_file_format),
+            file_prefix_pcv, *self.schema_side_inputs))
 
     all_destination_file_pairs_pc = (
         (destination_files_kv_pc, more_destination_files_kv_pc)
@@ -705,7 +752,8 @@ class BigQueryBatchFileLoads(beam.PTransform):
                 create_disposition=self.create_disposition,
                 test_client=self.test_client,
                 temporary_tables=True,
-                additional_bq_parameters=self.additional_bq_parameters),
+                additional_bq_parameters=self.additional_bq_parameters,
+                source_format=self.temp_file_format),
             load_job_name_pcv, *self.schema_side_inputs)
         .with_outputs(TriggerLoadJobs.TEMP_TABLES, main='main')
     )
@@ -749,7 +797,8 @@ class BigQueryBatchFileLoads(beam.PTransform):
                 create_disposition=self.create_disposition,
                 test_client=self.test_client,
                 temporary_tables=False,
-                additional_bq_parameters=self.additional_bq_parameters),
+                additional_bq_parameters=self.additional_bq_parameters,
+                source_format=self.temp_file_format),
             load_job_name_pcv, *self.schema_side_inputs)
     )
 
@@ -29,6 +29,7 @@ import sys
 import time
 import unittest
 
+import fastavro
 import mock
 from hamcrest.core import assert_that as hamcrest_assert
 from hamcrest.core.core.allof import all_of
@@ -233,6 +234,38 @@ class TestWriteRecordsToFile(_TestCaseWithTempDirCleanUp):
 
     self._consume_input(fn, check_many_files)
 
+  def test_avro_files_created(self):
+    """Test that rows are written to Avro files of the destination schema."""
+    schema = {'fields': [
+        {'name': 'name', 'type': 'STRING', 'mode': 'NULLABLE'},
+        {'name': 'language', 'type': 'STRING', 'mode': 'NULLABLE'},
+        {'name': 'foundation', 'type': 'STRING', 'mode': 'NULLABLE'}]}
+    fn = bqfl.WriteRecordsToFile(
+        schema=lambda destination: schema,
+        file_format=bigquery_tools.FileFormat.AVRO)
+    self.tmpdir = self._new_tempdir()
+
+    fn.start_bundle()
+    for destination, row in _DESTINATION_ELEMENT_PAIRS:
+      self.assertEqual(
+          [], list(fn.process((destination, json.loads(row)), self.tmpdir)))
+    outputs = [output.value.value for output in fn.finish_bundle()]
+
+    self.assertEqual(sorted(_DISTINCT_DESTINATIONS),
+                     sorted(destination for destination, _ in outputs))
+    read_rows = []
+    for _, (file_path, file_size) in outputs:
+      # The size of Avro files is measured before their last block is flushed.
+      self.assertLessEqual(file_size, os.path.getsize(file_path))
+      with open(file_path, 'rb') as f:
+        read_rows.extend(fastavro.reader(f))
+    expected_rows = [
+        dict({'name': None, 'language': None, 'foundation': None}, **row)
+        for row in _ELEMENTS]
+    self.assertEqual(
+        sorted(expected_rows, key=lambda row: json.dumps(row, sort_keys=True)),
+        sorted(read_rows, key=lambda row: json.dumps(row, sort_keys=True)))
+
 
 @unittest.skipIf(HttpError is None, 'GCP dependencies are not installed')
 class TestWriteGroupedRecordsToFile(_TestCaseWithTempDirCleanUp):
@@ -27,6 +27,7 @@ import os
 import pickle
 import random
 import re
+import threading
 import time
 import unittest
 import uuid
@@ -40,7 +41,9 @@ from nose.plugins.attrib import attr
 import apache_beam as beam
 from apache_beam.internal import pickler
 from apache_beam.internal.gcp.json_value import to_json_value
+from apache_beam.io.avroio import _FastAvroSource
 from apache_beam.io.filebasedsink_test import _TestCaseWithTempDirCleanUp
+from apache_beam.io.filesystem import FileMetadata
 from apache_beam.io.gcp import bigquery_tools
 from apache_beam.io.gcp.bigquery import TableRowJsonCoder
 from apache_beam.io.gcp.bigquery import WriteToBigQuery
@@ -348,6 +351,33 @@ class TestReadFromBigQuery(unittest.TestCase):
     self.assertEqual('Invalid GCS location: fs://bad_location',
                      str(context.exception))
 
+  @mock.patch('apache_beam.io.gcp.bigquery.FileSystems.match')
+  @mock.patch('apache_beam.io.gcp.bigquery_tools.BigQueryWrapper')
+  def test_avro_export_is_read_with_avro_sources(self, BigQueryWrapper, match):
+    match.return_value = [mock.Mock(metadata_list=[
+        FileMetadata('gs://bucket/dump-000.avro', 10),
+        FileMetadata('gs://bucket/dump-001.avro', 10)])]
+    source = beam.io.gcp.bigquery._CustomBigQuerySource(
+        gcs_location='gs://bucket/dump-*.avro',
+        table='project:dataset.table',
+        export_file_format=bigquery_tools.FileFormat.AVRO)
+
+    bundles = list(source.split(1024))
+
+    self.assertEqual(
+        bigquery_tools.FileFormat.AVRO,
+        BigQueryWrapper.return_value.perform_extract_job.call_args[0][3])
+    self.assertEqual(2, len(bundles))
+    for bundle in bundles:
+      self.assertIsInstance(bundle.source, _FastAvroSource)
+
+  def test_unsupported_export_file_format(self):
+    with self.assertRaises(ValueError):
+      beam.io.gcp.bigquery._CustomBigQuerySource(
+          gcs_location='gs://bucket/dump-*.csv',
+          table='project:dataset.table',
+          export_file_format=bigquery_tools.FileFormat.CSV)
+
 
 @unittest.skipIf(HttpError is None, 'GCP dependencies are not installed')
 class TestBigQuerySink(unittest.TestCase):
@@ -509,6 +539,28 @@ class TestWriteToBigQuery(unittest.TestCase):
     self.assertEqual(expected_dict_schema, dict_schema)
 
 
+class _FakeBigQueryWrapper(object):
+  """A BigQueryWrapper that records the rows passed to insert_rows."""
+
+  def __init__(self, latency_secs=0, failing_months=()):
+    self.latency_secs = latency_secs
+    self.failing_months = failing_months
+    self.inserted = []
+    self._lock = threading.Lock()
+
+  def insert_rows(self, project_id, dataset_id, table_id, rows,
+                  insert_ids=None, skip_invalid_rows=False):
+    time.sleep(self.latency_secs)
+    errors = [
+        bigquery.TableDataInsertAllResponse.InsertErrorsValueListEntry(
+            index=index, errors=[bigquery.ErrorProto(reason='invalid')])
+        for index, row in enumerate(rows)
+        if row['month'] in self.failing_months]
+    with self._lock:
+      self.inserted.append(list(rows))
+    return not errors, errors
+
+
 @unittest.skipIf(HttpError is None, 'GCP dependencies are not installed')
 class BigQueryStreamingInsertTransformTests(unittest.TestCase):
 
@@ -613,6 +665,72 @@ class BigQueryStreamingInsertTransformTests(unittest.TestCase):
     # InsertRows not called in finish bundle as no records
     self.assertFalse(client.tabledata.InsertAll.called)
 
+  def test_dofn_client_flushes_by_batch_size_bytes(self):
+    wrapper = _FakeBigQueryWrapper()
+    fn = beam.io.gcp.bigquery.BigQueryWriteFn(
+        batch_size=100,
+        batch_size_bytes=30,
+        create_disposition=beam.io.BigQueryDisposition.CREATE_NEVER,
+        write_disposition=beam.io.BigQueryDisposition.WRITE_APPEND)
+
+    with mock.patch('apache_beam.io.gcp.bigquery_tools.BigQueryWrapper',
+                    return_value=wrapper):
+      fn.start_bundle()
+      for i in range(5):
+        # Each row is 13 bytes, so only two of them fit in a batch.
+        fn.process(('project_id:dataset_id.table_id',
+                    ({'month': 10 + i}, 'insertid%s' % i)))
+      self.assertEqual([2, 2], [len(rows) for rows in wrapper.inserted])
+      fn.finish_bundle()
+
+    self.assertEqual([2, 2, 1], [len(rows) for rows in wrapper.inserted])
+
+  def test_dofn_client_async_inserts(self):
+    wrapper = _FakeBigQueryWrapper(latency_secs=0.05)
+    fn = beam.io.gcp.bigquery.BigQueryWriteFn(
+        batch_size=1,
+        max_inserts_in_flight=3,
+        create_disposition=beam.io.BigQueryDisposition.CREATE_NEVER,
+        write_disposition=beam.io.BigQueryDisposition.WRITE_APPEND)
+
+    with mock.patch('apache_beam.io.gcp.bigquery_tools.BigQueryWrapper',
+                    return_value=wrapper):
+      fn.start_bundle()
+      for i in range(10):
+        fn.process(('project_id:dataset_id.table_id',
+                    ({'month': i}, 'insertid%s' % i)))
+      self.assertEqual([], fn.finish_bundle())
+
+    self.assertEqual(
+        list(range(10)),
+        sorted(row['month'] for rows in wrapper.inserted for row in rows))
+    self.assertFalse(fn._pending_inserts)
+
+  def test_dofn_client_async_inserts_output_failed_rows(self):
+    wrapper = _FakeBigQueryWrapper(failing_months={1, 3})
+    fn = beam.io.gcp.bigquery.BigQueryWriteFn(
+        batch_size=2,
+        max_inserts_in_flight=2,
+        retry_strategy=RetryStrategy.RETRY_NEVER,
+        create_disposition=beam.io.BigQueryDisposition.CREATE_NEVER,
+        write_disposition=beam.io.BigQueryDisposition.WRITE_APPEND)
+
+    outputs = []
+    with mock.patch('apache_beam.io.gcp.bigquery_tools.BigQueryWrapper',
+                    return_value=wrapper):
+      fn.start_bundle()
+      for i in range(5):
+        outputs.extend(fn.process(('project_id:dataset_id.table_id',
+                                   ({'month': i}, 'insertid%s' % i))))
+      outputs.extend(fn.finish_bundle())
+
+    self.assertEqual(
+        [1, 3],
+        sorted(output.value.value[1]['month'] for output in outputs))
+    for output in outputs:
+      self.assertEqual(beam.io.gcp.bigquery.BigQueryWriteFn.FAILED_ROWS,
+                       output.tag)
+
 
 @unittest.skipIf(HttpError is None, 'GCP dependencies are not installed')
 class PipelineBasedStreamingInsertTest(_TestCaseWithTempDirCleanUp):
@@ -39,7 +39,9 @@ import time
 import uuid
 from builtins import object
 
+from fastavro.write import Writer
 from future.utils import iteritems
+from past.builtins import unicode
 
 from apache_beam import coders
 from apache_beam.internal.gcp import auth
@@ -71,12 +73,15 @@ MAX_RETRIES = 3
 JSON_COMPLIANCE_ERROR = 'NAN, INF and -INF values are not JSON compliant.'
 
 
-class ExportFileFormat(object):
+class FileFormat(object):
   CSV = 'CSV'
   JSON = 'NEWLINE_DELIMITED_JSON'
   AVRO = 'AVRO'
 
 
+ExportFileFormat = FileFormat
+
+
 class ExportCompression(object):
   GZIP = 'GZIP'
   DEFLATE = 'DEFLATE'
@@ -151,6 +156,73 @@ def parse_table_schema_from_json(schema_string):
   return bigquery.TableSchema(fields=fields)
 
 
+# The Avro types that BigQuery loads into each of its column types. See
+# https://cloud.google.com/bigquery/docs/loading-data-cloud-storage-avro
+_BIG_QUERY_TO_AVRO_TYPES = {
+    'STRING': 'string',
+    'GEOGRAPHY': 'string',
+    'DATETIME': 'string',
+    'BYTES': 'bytes',
+    'INTEGER': 'long',
+    'INT64': 'long',
+    'FLOAT': 'double',
+    'FLOAT64': 'double',
+    'BOOLEAN': 'boolean',
+    'BOOL': 'boolean',
+    'TIMESTAMP': {'type': 'long', 'logicalType': 'timestamp-micros'},
+    'DATE': {'type': 'int', 'logicalType': 'date'},
+    'TIME': {'type': 'long', 'logicalType': 'time-micros'},
+    'NUMERIC': {'type': 'bytes', 'logicalType': 'decimal',
+                'precision': 38, 'scale': 9},
+}
+
+
+def get_avro_schema_from_table_schema(schema):
+  """Transforms a BigQuery table schema into an Avro record schema.
+
+  Args:
+    schema: A ``bigquery.TableSchema``, its dictionary representation, or its
+      JSON-serialized string.
+
+  Returns:
+    A dictionary with the Avro schema of the rows of the table.
+  """
+  if isinstance(schema, dict):
+    schema = json.dumps(schema)
+  if isinstance(schema, (str, unicode)):
+    schema = parse_table_schema_from_json(schema)
+
+  def _get_avro_record(name, namespace, fields):
+    full_name = '%s.%s' % (namespace, name) if namespace else name
+    record = {
+        'type': 'record',
+        'name': name,
+        'fields': [_get_avro_field(field, full_name) for field in fields],
+    }
+    if namespace:
+      record['namespace'] = namespace
+    return record
+
+  def _get_avro_field(field, namespace):
+    field_type = field.type.upper()
+    if field_type in ('RECORD', 'STRUCT'):
+      avro_type = _get_avro_record(field.name, namespace, field.fields)
+    elif field_type in _BIG_QUERY_TO_AVRO_TYPES:
+      avro_type = _BIG_QUERY_TO_AVRO_TYPES[field_type]
+    else:
+      raise ValueError(
+          'Unsupported type %s of field %s.' % (field.type, field.name))
+
+    mode = (field.mode or 'NULLABLE').upper()
+    if mode == 'REPEATED':
+      avro_type = {'type': 'array', 'items': avro_type}
+    elif mode == 'NULLABLE':
+      avro_type = ['null', avro_type]
+    return {'name': field.name, 'type': avro_type}
+
+  return _get_avro_record('root', None, schema.fields)
+
+
 def parse_table_reference(table, dataset=None, project=None):
   """Parses a table reference into a (project, dataset, table) tuple.
 
@@ -345,8 +417,15 @@ class BigQueryWrapper(object):
                        schema=None,
                        write_disposition=None,
                        create_disposition=None,
-                       additional_load_parameters=None):
-    additional_load_parameters = additional_load_parameters or {}
+                       additional_load_parameters=None,
+                       source_format=None):
+    load_parameters = {}
+    source_format = source_format or FileFormat.JSON
+    if source_format == FileFormat.AVRO:
+      # Rows are written with the logical types of their columns, so that
+      # TIMESTAMP, DATE, TIME and NUMERIC values are loaded as such.
+      load_parameters['useAvroLogicalTypes'] = True
+    load_parameters.update(additional_load_parameters or {})
     job_schema = None if schema == 'SCHEMA_AUTODETECT' else schema
     reference = bigquery.JobReference(jobId=job_id, projectId=project_id)
     request = bigquery.BigqueryJobsInsertRequest(
@@ -359,9 +438,9 @@ class BigQueryWrapper(object):
                     schema=job_schema,
                     writeDisposition=write_disposition,
                     createDisposition=create_disposition,
-                    sourceFormat='NEWLINE_DELIMITED_JSON',
+                    sourceFormat=source_format,
                     autodetect=schema == 'SCHEMA_AUTODETECT',
-                    **additional_load_parameters
+                    **load_parameters
                 )
             ),
             jobReference=reference,
@@ -633,7 +712,8 @@ class BigQueryWrapper(object):
                        schema=None,
                        write_disposition=None,
                        create_disposition=None,
-                       additional_load_parameters=None):
+                       additional_load_parameters=None,
+                       source_format=None):
     """Starts a job to load data into BigQuery.
 
     Returns:
@@ -644,7 +724,8 @@ class BigQueryWrapper(object):
         schema=schema,
         create_disposition=create_disposition,
         write_disposition=write_disposition,
-        additional_load_parameters=additional_load_parameters)
+        additional_load_parameters=additional_load_parameters,
+        source_format=source_format)
 
   @retry.with_exponential_backoff(
       num_retries=MAX_RETRIES,
@@ -1111,6 +1192,55 @@ class RowAsDictJsonCoder(coders.Coder):
     return json.loads(encoded_table_row.decode('utf-8'))
 
 
+class JsonRowWriter(object):
+  """Writes rows to a file as newline-delimited JSON."""
+
+  def __init__(self, file_handle, coder=None):
+    self._file_handle = file_handle
+    self._coder = coder or RowAsDictJsonCoder()
+
+  def write(self, row):
+    self._file_handle.write(self._coder.encode(row))
+    self._file_handle.write(b'\n')
+
+  def tell(self):
+    return self._file_handle.tell()
+
+  def close(self):
+    self._file_handle.close()
+
+
+class AvroRowWriter(object):
+  """Writes rows to a file as Avro records of the schema of their table.
+
+  Values must have the Python types that fastavro writes for the Avro type of
+  their column: e.g. ``datetime.datetime`` for TIMESTAMP, ``datetime.date``
+  for DATE, ``decimal.Decimal`` for NUMERIC, and raw ``bytes`` rather than
+  base64-encoded strings for BYTES.
+  """
+
+  def __init__(self, file_handle, schema):
+    self._file_handle = file_handle
+    self._avro_writer = Writer(
+        file_handle, get_avro_schema_from_table_schema(schema))
+
+  def write(self, row):
+    try:
+      self._avro_writer.write(row)
+    except (TypeError, ValueError) as e:
+      raise e.__class__(
+          'Error writing row to Avro: %s. Row: %s' % (e, row))
+
+  def tell(self):
+    # Records are buffered into blocks before they are written to the file, so
+    # this lags behind the final size of the file by at most one block.
+    return self._file_handle.tell()
+
+  def close(self):
+    self._avro_writer.flush()
+    self._file_handle.close()
+
+
 class RetryStrategy(object):
   RETRY_ALWAYS = 'RETRY_ALWAYS'
   RETRY_NEVER = 'RETRY_NEVER'
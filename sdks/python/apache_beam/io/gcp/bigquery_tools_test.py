@@ -23,12 +23,16 @@ import datetime
 import decimal
 import json
 import logging
+import os
 import re
+import shutil
+import tempfile
 import time
 import unittest
 
 # patches unittest.TestCase to be python3 compatible
 import future.tests.base  # pylint: disable=unused-import,ungrouped-imports
+import fastavro
 import mock
 from future.utils import iteritems
 
@@ -37,7 +41,10 @@ from apache_beam.internal.gcp.json_value import to_json_value
 from apache_beam.io.gcp.bigquery import TableRowJsonCoder
 from apache_beam.io.gcp.bigquery_test import HttpError
 from apache_beam.io.gcp.bigquery_tools import JSON_COMPLIANCE_ERROR
+from apache_beam.io.gcp.bigquery_tools import AvroRowWriter
+from apache_beam.io.gcp.bigquery_tools import FileFormat
 from apache_beam.io.gcp.bigquery_tools import RowAsDictJsonCoder
+from apache_beam.io.gcp.bigquery_tools import get_avro_schema_from_table_schema
 from apache_beam.io.gcp.bigquery_tools import parse_table_schema_from_json
 from apache_beam.io.gcp.internal.clients import bigquery
 from apache_beam.options.pipeline_options import PipelineOptions
@@ -215,6 +222,20 @@ class TestBigQueryWrapper(unittest.TestCase):
                                      max_retries=5)
     self.assertTrue(result)
 
+  def test_perform_load_job_with_avro_files(self):
+    client = mock.Mock()
+    wrapper = beam.io.gcp.bigquery_tools.BigQueryWrapper(client)
+    wrapper.perform_load_job(
+        bigquery.TableReference(
+            projectId='project_id', datasetId='dataset_id', tableId='table_id'),
+        ['gs://bucket/file.avro'], 'job_id',
+        source_format=FileFormat.AVRO)
+
+    request = client.jobs.Insert.call_args[0][0]
+    load = request.job.configuration.load
+    self.assertEqual(FileFormat.AVRO, load.sourceFormat)
+    self.assertTrue(load.useAvroLogicalTypes)
+
   def test_wait_for_job_retries_fail(self):
     client, response, job_ref = mock.Mock(), mock.Mock(), mock.Mock()
     response.status.state = 'RUNNING'
@@ -649,6 +670,73 @@ class TestBigQueryWriter(unittest.TestCase):
     self.assertEqual('myproject', writer.project_id)
 
 
+@unittest.skipIf(HttpError is None, 'GCP dependencies are not installed')
+class TestAvroRowWriter(unittest.TestCase):
+
+  SCHEMA = {'fields': [
+      {'name': 's', 'type': 'STRING', 'mode': 'REQUIRED'},
+      {'name': 'ts', 'type': 'TIMESTAMP', 'mode': 'NULLABLE'},
+      {'name': 'num', 'type': 'NUMERIC', 'mode': 'NULLABLE'},
+      {'name': 'f', 'type': 'FLOAT', 'mode': 'REPEATED'},
+      {'name': 'r', 'type': 'RECORD', 'mode': 'NULLABLE', 'fields': [
+          {'name': 'b', 'type': 'BOOLEAN', 'mode': 'NULLABLE'}]}]}
+
+  def setUp(self):
+    self.tmpdir = tempfile.mkdtemp()
+
+  def tearDown(self):
+    shutil.rmtree(self.tmpdir)
+
+  def test_avro_schema_from_table_schema(self):
+    avro_schema = get_avro_schema_from_table_schema(
+        parse_table_schema_from_json(json.dumps(self.SCHEMA)))
+    self.assertEqual('record', avro_schema['type'])
+    self.assertEqual(
+        [('s', 'string'),
+         ('ts', ['null', {'type': 'long', 'logicalType': 'timestamp-micros'}]),
+         ('num', ['null', {'type': 'bytes', 'logicalType': 'decimal',
+                           'precision': 38, 'scale': 9}]),
+         ('f', {'type': 'array', 'items': 'double'})],
+        [(f['name'], f['type']) for f in avro_schema['fields'][:-1]])
+    record_type = avro_schema['fields'][-1]['type'][1]
+    self.assertEqual('record', record_type['type'])
+    self.assertEqual([{'name': 'b', 'type': ['null', 'boolean']}],
+                     record_type['fields'])
+
+  def test_rows_are_written(self):
+    rows = [
+        {'s': 'abc',
+         # Microseconds since the epoch for 2020-01-02T03:04:05Z.
+         'ts': 1577934245000000,
+         'num': decimal.Decimal('1.5'),
+         'f': [1.0, 2.5],
+         'r': {'b': True}},
+        {'s': 'def', 'ts': None, 'num': None, 'f': [], 'r': None},
+    ]
+    path = os.path.join(self.tmpdir, 'rows.avro')
+    writer = AvroRowWriter(open(path, 'wb'), self.SCHEMA)
+    for row in rows:
+      writer.write(row)
+    writer.close()
+
+    with open(path, 'rb') as f:
+      read_rows = list(fastavro.reader(f))
+    self.assertEqual(2, len(read_rows))
+    self.assertEqual(rows[1], read_rows[1])
+    self.assertEqual((2020, 1, 2, 3, 4, 5),
+                     read_rows[0]['ts'].utctimetuple()[:6])
+    self.assertEqual(decimal.Decimal('1.5'), read_rows[0]['num'])
+    self.assertEqual([1.0, 2.5], read_rows[0]['f'])
+    self.assertEqual({'b': True}, read_rows[0]['r'])
+
+  def test_invalid_row(self):
+    writer = AvroRowWriter(
+        open(os.path.join(self.tmpdir, 'rows.avro'), 'wb'), self.SCHEMA)
+    with self.assertRaisesRegex(Exception, 'Error writing row to Avro'):
+      writer.write({'s': 1, 'ts': None, 'num': None, 'f': [], 'r': None})
+    writer.close()
+
+
 @unittest.skipIf(HttpError is None, 'GCP dependencies are not installed')
 class TestRowAsDictJsonCoder(unittest.TestCase):
 
@@ -32,9 +32,13 @@ This module is experimental, no backwards compatibility guarantees.
 from __future__ import absolute_import
 from __future__ import division
 
+import copy
 import logging
+import threading
 import time
+from builtins import object
 from builtins import round
+from concurrent import futures
 
 from apache_beam import typehints
 from apache_beam.io.gcp.datastore.v1 import util
@@ -49,6 +53,7 @@ from apache_beam.transforms import ParDo
 from apache_beam.transforms import PTransform
 from apache_beam.transforms import Reshuffle
 from apache_beam.utils import retry
+from apache_beam.utils.thread_pool_executor import shared_bounded_executor
 
 __all__ = ['ReadFromDatastore', 'WriteToDatastore', 'DeleteFromDatastore']
 
@@ -270,6 +275,22 @@ class ReadFromDatastore(PTransform):
         yield types.Entity.from_client_entity(client_entity)
 
 
+class _ThreadSafeThrottler(object):
+  """Serializes the calls of concurrent commits to an AdaptiveThrottler."""
+
+  def __init__(self, throttler):
+    self._throttler = throttler
+    self._lock = threading.Lock()
+
+  def throttle_request(self, now):
+    with self._lock:
+      return self._throttler.throttle_request(now)
+
+  def successful_request(self, now):
+    with self._lock:
+      self._throttler.successful_request(now)
+
+
 class _Mutate(PTransform):
   """A ``PTransform`` that writes mutations to Cloud Datastore.
 
@@ -298,13 +319,24 @@ class _Mutate(PTransform):
     an entity group, the commit will be retried. This means that the mutation
     should be idempotent (`upsert` and `delete` mutations) to prevent duplicate
     data or errors.
+
+    If `max_commits_in_flight` is set, batches are committed on a thread pool
+    shared by the worker, while the bundle goes on filling the next batch.
+    Batches in flight never contain the same key, so the mutations of an
+    entity are still committed in order. Throttling delays are spent on the
+    commit threads, and the batch size still follows the measured commit
+    latency.
     """
-    def __init__(self, project):
+
+    def __init__(self, project, max_commits_in_flight=None):
       """
       Args:
         project: (str) cloud project id
+        max_commits_in_flight: (int) Optional number of batches that a worker
+          commits concurrently. By default batches are committed one at a time.
       """
       self._project = project
+      self._max_commits_in_flight = max_commits_in_flight
       self._client = None
       self._rpc_successes = Metrics.counter(
           _Mutate.DatastoreMutateFn, "datastoreRpcSuccesses")
@@ -328,9 +360,16 @@ class _Mutate(PTransform):
       self._target_batch_size = self._batch_sizer.get_batch_size(
           time.time() * 1000)
 
+      self._pending_commits = []
+      self._in_flight_keys = set()
+      self._shared_throttler = _ThreadSafeThrottler(self._throttler)
+
     def element_to_client_batch_item(self, element):
       raise NotImplementedError
 
+    def client_batch_item_key(self, client_batch_item):
+      raise NotImplementedError
+
     def add_to_batch(self, client_batch_item):
       raise NotImplementedError
 
@@ -393,6 +432,11 @@ class _Mutate(PTransform):
 
     def process(self, element):
       client_element = self.element_to_client_batch_item(element)
+      if self._pending_commits:
+        self._collect_commits(wait=False)
+        if self.client_batch_item_key(client_element) in self._in_flight_keys:
+          # Commit the earlier mutations of this entity first.
+          self._collect_commits(wait=True)
       self._batch_elements.append(client_element)
       self.add_to_batch(client_element)
       self._batch_bytes_size += self._batch.mutations[-1].ByteSize()
@@ -404,6 +448,7 @@ class _Mutate(PTransform):
     def finish_bundle(self):
       if self._batch_elements:
         self._flush_batch()
+      self._collect_commits(wait=True)
 
     def _init_batch(self):
       self._batch_bytes_size = 0
@@ -412,20 +457,63 @@ class _Mutate(PTransform):
       self._batch_elements = []
 
     def _flush_batch(self):
-      # Flush the current batch of mutations to Cloud Datastore.
-      latency_ms = self.write_mutations(
-          self._throttler,
-          rpc_stats_callback=self._update_rpc_stats,
-          throttle_delay=util.WRITE_BATCH_TARGET_LATENCY_MS // 1000)
+      if self._max_commits_in_flight:
+        self._submit_batch()
+      else:
+        # Flush the current batch of mutations to Cloud Datastore.
+        latency_ms = self.write_mutations(
+            self._throttler,
+            rpc_stats_callback=self._update_rpc_stats,
+            throttle_delay=util.WRITE_BATCH_TARGET_LATENCY_MS // 1000)
+        self._report_latency(latency_ms, len(self._batch.mutations))
+
+      self._init_batch()
+
+    def _report_latency(self, latency_ms, num_mutations):
       _LOGGER.debug("Successfully wrote %d mutations in %dms.",
-                    len(self._batch.mutations), latency_ms)
+                    num_mutations, latency_ms)
 
       now = time.time() * 1000
-      self._batch_sizer.report_latency(
-          now, latency_ms, len(self._batch.mutations))
+      self._batch_sizer.report_latency(now, latency_ms, num_mutations)
       self._target_batch_size = self._batch_sizer.get_batch_size(now)
 
-      self._init_batch()
+    def _submit_batch(self):
+      # The commit runs write_mutations on a shallow copy of this DoFn that
+      # keeps the current batch, so that retries rebuild that batch rather than
+      # the one filled in the meantime. Metrics can only be updated from the
+      # bundle's thread, hence the RPC stats are reported once it completes.
+      commit_fn = copy.copy(self)
+      rpc_stats = []
+      keys = set(self.client_batch_item_key(client_batch_item)
+                 for client_batch_item in self._batch_elements)
+
+      pool = shared_bounded_executor(
+          _Mutate.DatastoreMutateFn, self._max_commits_in_flight)
+      future = pool.submit(
+          commit_fn.write_mutations,
+          self._shared_throttler,
+          rpc_stats_callback=lambda **stats: rpc_stats.append(stats),
+          throttle_delay=util.WRITE_BATCH_TARGET_LATENCY_MS // 1000)
+      self._pending_commits.append(
+          (future, keys, rpc_stats, len(self._batch.mutations)))
+      self._in_flight_keys.update(keys)
+
+    def _collect_commits(self, wait):
+      if wait:
+        futures.wait([commit[0] for commit in self._pending_commits])
+
+      pending_commits = []
+      for commit in self._pending_commits:
+        future, keys, rpc_stats, num_mutations = commit
+        if not future.done():
+          pending_commits.append(commit)
+          continue
+        for stats in rpc_stats:
+          self._update_rpc_stats(**stats)
+        self._in_flight_keys.difference_update(keys)
+        # Re-raises the error of a failed commit, so that the bundle is retried.
+        self._report_latency(future.result(), num_mutations)
+      self._pending_commits = pending_commits
 
 
 @typehints.with_input_types(types.Entity)
@@ -440,13 +528,17 @@ class WriteToDatastore(_Mutate):
   transform.
   """
 
-  def __init__(self, project):
+  def __init__(self, project, max_commits_in_flight=None):
     """Initialize the `WriteToDatastore` transform.
 
     Args:
       project: (:class:`str`) The ID of the project to write entities to.
+      max_commits_in_flight: (:class:`int`) Optional number of batches that
+        each worker commits concurrently. Useful for bulk loads, where
+        Datastore sustains far more parallel commits than one per DoFn.
     """
-    mutate_fn = WriteToDatastore._DatastoreWriteFn(project)
+    mutate_fn = WriteToDatastore._DatastoreWriteFn(project,
+                                                   max_commits_in_flight)
     super(WriteToDatastore, self).__init__(mutate_fn)
 
   class _DatastoreWriteFn(_Mutate.DatastoreMutateFn):
@@ -462,6 +554,9 @@ class WriteToDatastore(_Mutate):
                          'have complete keys:\n%s' % client_entity)
       return client_entity
 
+    def client_batch_item_key(self, client_entity):
+      return client_entity.key
+
     def add_to_batch(self, client_entity):
       self._batch.put(client_entity)
 
@@ -483,14 +578,17 @@ class DeleteFromDatastore(_Mutate):
   project ID passed to this transform. If ``project`` field in key is empty then
   it is filled with the project ID passed to this transform.
   """
-  def __init__(self, project):
+  def __init__(self, project, max_commits_in_flight=None):
     """Initialize the `DeleteFromDatastore` transform.
 
     Args:
       project: (:class:`str`) The ID of the project from which the entities will
         be deleted.
+      max_commits_in_flight: (:class:`int`) Optional number of batches that
+        each worker commits concurrently.
     """
-    mutate_fn = DeleteFromDatastore._DatastoreDeleteFn(project)
+    mutate_fn = DeleteFromDatastore._DatastoreDeleteFn(project,
+                                                       max_commits_in_flight)
     super(DeleteFromDatastore, self).__init__(mutate_fn)
 
   class _DatastoreDeleteFn(_Mutate.DatastoreMutateFn):
@@ -506,6 +604,9 @@ class DeleteFromDatastore(_Mutate):
                          'complete:\n%s' % client_key)
       return client_key
 
+    def client_batch_item_key(self, client_key):
+      return client_key
+
     def add_to_batch(self, client_key):
       self._batch.delete(client_key)
 
@@ -25,6 +25,8 @@ from __future__ import print_function
 
 import datetime
 import math
+import threading
+import time
 import unittest
 
 from mock import MagicMock
@@ -41,6 +43,7 @@ try:
   from apache_beam.io.gcp.datastore.v1new.datastoreio import DeleteFromDatastore
   from apache_beam.io.gcp.datastore.v1new.datastoreio import ReadFromDatastore
   from apache_beam.io.gcp.datastore.v1new.datastoreio import WriteToDatastore
+  from apache_beam.io.gcp.datastore.v1new.types import Entity
   from apache_beam.io.gcp.datastore.v1new.types import Key
   from google.cloud.datastore import client
   from google.cloud.datastore import entity
@@ -327,6 +330,76 @@ class DatastoreioTest(DatastoreioTestBase):
 
       self.assertEqual(2, commit_count[0])
 
+  def test_DatastoreWriteFn_with_commits_in_flight(self):
+    with patch.object(helper, 'get_client', return_value=self._mock_client):
+      entities = helper.create_entities(1000)
+      committed_keys = []
+      lock = threading.Lock()
+
+      class CommitRecordingBatch(FakeBatch):
+        def commit(self):
+          time.sleep(0.01)
+          with lock:
+            committed_keys.extend(m.entity.key for m in self.mutations)
+
+      self._mock_client.batch.side_effect = CommitRecordingBatch
+
+      datastore_write_fn = WriteToDatastore._DatastoreWriteFn(
+          self._PROJECT, max_commits_in_flight=3)
+      datastore_write_fn.start_bundle()
+      for entity in entities:
+        datastore_write_fn.process(entity)
+      datastore_write_fn.finish_bundle()
+
+      self.assertEqual(len(entities), len(committed_keys))
+      self.assertEqual(set(e.to_client_entity().key for e in entities),
+                       set(committed_keys))
+      self.assertFalse(datastore_write_fn._pending_commits)
+      self.assertFalse(datastore_write_fn._in_flight_keys)
+
+  def test_DatastoreWriteFn_waits_for_in_flight_keys(self):
+    with patch.object(helper, 'get_client', return_value=self._mock_client), \
+        patch.object(util.DynamicBatchSizer, 'get_batch_size', return_value=1):
+      entities = helper.create_entities(2)
+      update = Entity(entities[0].key)
+      update.set_properties({'version': 2})
+      first_version = entities[0].to_client_entity()
+      committed = []
+
+      class SlowFirstVersionBatch(FakeBatch):
+        def commit(self):
+          if first_version in [m.entity for m in self.mutations]:
+            time.sleep(0.1)
+          committed.extend(m.entity for m in self.mutations)
+
+      self._mock_client.batch.side_effect = SlowFirstVersionBatch
+
+      datastore_write_fn = WriteToDatastore._DatastoreWriteFn(
+          self._PROJECT, max_commits_in_flight=3)
+      datastore_write_fn.start_bundle()
+      for entity in entities + [update]:
+        datastore_write_fn.process(entity)
+      datastore_write_fn.finish_bundle()
+
+      # The update is only committed after the first version of its entity.
+      self.assertEqual(3, len(committed))
+      self.assertEqual(update.to_client_entity(), committed[-1])
+
+  def test_DatastoreWriteFn_failed_commit_in_flight(self):
+    with patch.object(helper, 'get_client', return_value=self._mock_client):
+      class FailingBatch(FakeBatch):
+        def commit(self):
+          raise ValueError('not retryable')
+
+      self._mock_client.batch.side_effect = FailingBatch
+
+      datastore_write_fn = WriteToDatastore._DatastoreWriteFn(
+          self._PROJECT, max_commits_in_flight=2)
+      datastore_write_fn.start_bundle()
+      datastore_write_fn.process(helper.create_entities(1)[0])
+      with self.assertRaises(ValueError):
+        datastore_write_fn.finish_bundle()
+
   def check_estimated_size_bytes(self, entity_bytes, timestamp, namespace=None):
     """A helper method to test get_estimated_size_bytes"""
     self._mock_client.namespace = namespace
@@ -26,6 +26,7 @@ from __future__ import absolute_import
 
 import errno
 import io
+import json
 import logging
 import multiprocessing
 import re
@@ -34,11 +35,13 @@ import threading
 import time
 import traceback
 from builtins import object
+from concurrent import futures
 
 from apache_beam.internal.http_client import get_new_http
 from apache_beam.io.filesystemio import Downloader
 from apache_beam.io.filesystemio import DownloaderStream
 from apache_beam.io.filesystemio import PipeStream
+from apache_beam.io.filesystemio import PrefetchingDownloaderStream
 from apache_beam.io.filesystemio import Uploader
 from apache_beam.io.filesystemio import UploaderStream
 from apache_beam.utils import retry
@@ -80,6 +83,18 @@ except ImportError:
 # +---------------+------------+-------------+-------------+-------------+
 DEFAULT_READ_BUFFER_SIZE = 16 * 1024 * 1024
 
+# This is the maximum number of concurrent partial-file reads issued ahead of
+# the current position when reading a file sequentially.
+DEFAULT_READ_AHEAD_REQUESTS = 4
+
+# This is the size of the first partial-file read after opening or seeking.
+# Subsequent sequential reads double in size up to the read buffer size.
+MIN_READ_AHEAD_CHUNK_SIZE = 1024 * 1024
+
+# This is the number of threads that issue the read-ahead requests of all the
+# files read by a process.
+READ_AHEAD_THREADS = 16
+
 # This is the number of seconds the library will wait for a partial-file read
 # operation from GCS to complete before retrying.
 DEFAULT_READ_SEGMENT_TIMEOUT_SECONDS = 60
@@ -117,19 +132,48 @@ class GcsIOError(IOError, retry.PermanentException):
   pass
 
 
+def _create_storage_client():
+  return storage.StorageV1(
+      credentials=auth.get_service_credentials(),
+      get_credentials=False,
+      http=get_new_http(),
+      response_encoding=None if sys.version_info[0] < 3 else 'utf8')
+
+
 class GcsIO(object):
   """Google Cloud Storage I/O client."""
 
+  # Read-ahead requests of all the files read by this process run on one pool
+  # of threads. Clients are not thread-safe, so each thread that downloads for
+  # a GcsIO with its own client uses a storage client of its own, which it
+  # keeps for later files.
+  _read_ahead_lock = threading.Lock()
+  _read_ahead_executor = None
+  _thread_clients = threading.local()
+
   def __init__(self, storage_client=None):
+    self._get_thread_client = None
     if storage_client is None:
-      storage_client = storage.StorageV1(
-          credentials=auth.get_service_credentials(),
-          get_credentials=False,
-          http=get_new_http(),
-          response_encoding=None if sys.version_info[0] < 3 else 'utf8')
+      self._get_thread_client = GcsIO._get_thread_storage_client
+      storage_client = _create_storage_client()
     self.client = storage_client
     self._rewrite_cb = None
 
+  @classmethod
+  def _get_read_ahead_executor(cls):
+    with cls._read_ahead_lock:
+      if cls._read_ahead_executor is None:
+        cls._read_ahead_executor = futures.ThreadPoolExecutor(
+            max_workers=READ_AHEAD_THREADS)
+      return cls._read_ahead_executor
+
+  @classmethod
+  def _get_thread_storage_client(cls):
+    thread_clients = cls._thread_clients
+    if not hasattr(thread_clients, 'client'):
+      thread_clients.client = _create_storage_client()
+    return thread_clients.client
+
   def _set_rewrite_response_callback(self, callback):
     """For testing purposes only. No backward compatibility guarantees.
 
@@ -142,7 +186,8 @@ class GcsIO(object):
            filename,
            mode='r',
            read_buffer_size=DEFAULT_READ_BUFFER_SIZE,
-           mime_type='application/octet-stream'):
+           mime_type='application/octet-stream',
+           read_ahead_requests=DEFAULT_READ_AHEAD_REQUESTS):
     """Open a GCS file path for reading or writing.
 
     Args:
@@ -150,6 +195,10 @@ class GcsIO(object):
       mode (str): ``'r'`` for reading or ``'w'`` for writing.
       read_buffer_size (int): Buffer size to use during read operations.
       mime_type (str): Mime type to set for write operations.
+      read_ahead_requests (int): Maximum number of concurrent partial-file
+        reads issued ahead of the current position. If 0, or if the object
+        is not larger than ``read_buffer_size``, each read waits for its own
+        request.
 
     Returns:
       GCS file object.
@@ -159,9 +208,19 @@ class GcsIO(object):
     """
     if mode == 'r' or mode == 'rb':
       downloader = GcsDownloader(self.client, filename,
-                                 buffer_size=read_buffer_size)
-      return io.BufferedReader(DownloaderStream(downloader, read_buffer_size=read_buffer_size, mode=mode),
-                               buffer_size=read_buffer_size)
+                                 buffer_size=read_buffer_size,
+                                 get_thread_client=self._get_thread_client)
+      if read_ahead_requests and downloader.size > read_buffer_size:
+        stream = PrefetchingDownloaderStream(
+            downloader, read_buffer_size=read_buffer_size, mode=mode,
+            max_concurrent_requests=read_ahead_requests,
+            min_chunk_size=MIN_READ_AHEAD_CHUNK_SIZE,
+            max_chunk_size=read_buffer_size,
+            executor=self._get_read_ahead_executor())
+      else:
+        stream = DownloaderStream(
+            downloader, read_buffer_size=read_buffer_size, mode=mode)
+      return io.BufferedReader(stream, buffer_size=read_buffer_size)
     elif mode == 'w' or mode == 'wb':
       uploader = GcsUploader(self.client, filename, mime_type)
       return io.BufferedWriter(UploaderStream(uploader, mode=mode),
@@ -482,11 +541,21 @@ class GcsIO(object):
 
 
 class GcsDownloader(Downloader):
-  def __init__(self, client, path, buffer_size):
+  """A Downloader for a GCS object.
+
+  Range reads are safe to issue from multiple threads. With a
+  ``get_thread_client``, every thread downloads through the client it returns
+  for that thread. Otherwise they are serialized on the given client.
+  """
+
+  def __init__(self, client, path, buffer_size, get_thread_client=None):
     self._client = client
     self._path = path
     self._bucket, self._name = parse_gcs_path(path)
     self._buffer_size = buffer_size
+    self._get_thread_client = get_thread_client
+    self._thread_local = threading.local()
+    self._lock = threading.Lock()
 
     # Get object state.
     self._get_request = (storage.StorageObjectsGetRequest(
@@ -512,6 +581,16 @@ class GcsDownloader(Downloader):
         num_retries=20)
     self._client.objects.Get(self._get_request, download=self._downloader)
 
+  def _create_thread_download(self):
+    # Downloads the same generation of the object as self._downloader, over
+    # the HTTP connection of the client of this thread.
+    download_stream = io.BytesIO()
+    downloader = transfer.Download.FromData(
+        download_stream, json.dumps(self._downloader.serialization_data),
+        http=self._get_thread_client().http, auto_transfer=False,
+        chunksize=self._buffer_size, num_retries=20)
+    return download_stream, downloader
+
   @retry.with_exponential_backoff(
       retry_filter=retry.retry_on_server_errors_and_timeout_filter)
   def _get_object_metadata(self, get_request):
@@ -522,10 +601,21 @@ class GcsDownloader(Downloader):
     return self._size
 
   def get_range(self, start, end):
-    self._download_stream.seek(0)
-    self._download_stream.truncate(0)
-    self._downloader.GetRange(start, end - 1)
-    return self._download_stream.getvalue()
+    if self._get_thread_client is None:
+      with self._lock:
+        return self._get_range(
+            self._download_stream, self._downloader, start, end)
+    local = self._thread_local
+    if not hasattr(local, 'downloader'):
+      local.download_stream, local.downloader = self._create_thread_download()
+    return self._get_range(local.download_stream, local.downloader, start, end)
+
+  @staticmethod
+  def _get_range(download_stream, downloader, start, end):
+    download_stream.seek(0)
+    download_stream.truncate(0)
+    downloader.GetRange(start, end - 1)
+    return download_stream.getvalue()
 
 
 class GcsUploader(Uploader):
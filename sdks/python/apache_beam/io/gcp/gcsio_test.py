@@ -27,10 +27,12 @@ import logging
 import os
 import random
 import sys
+import threading
 import time
 import unittest
 from builtins import object
 from builtins import range
+from concurrent import futures
 from email.message import Message
 
 # patches unittest.TestCase to be python3 compatible
@@ -43,6 +45,7 @@ import mock
 try:
   from apache_beam.io.gcp import gcsio
   from apache_beam.io.gcp.internal.clients import storage
+  from apitools.base.py import http_wrapper
   from apitools.base.py.exceptions import HttpError
 except ImportError:
   HttpError = None
@@ -85,6 +88,32 @@ class FakeFile(object):
         updated=last_updated_datetime)
 
 
+class FakeRangeHttp(object):
+  # Fake HTTP connection that serves range requests for the downloads of
+  # FakeGcsObjects.
+
+  def __init__(self, objects):
+    self.objects = objects
+    self.requests = 0
+
+  @staticmethod
+  def url(bucket, obj):
+    return 'https://fake.storage/%s/%s' % (bucket, obj)
+
+  def request(self, uri, method='GET', body=None, headers=None,
+              redirections=None, connection_type=None):
+    self.requests += 1
+    bucket, obj = uri[len('https://fake.storage/'):].split('/', 1)
+    contents = self.objects.get_file(bucket, obj).contents
+    start, end = [int(x) for x in headers['range'][len('bytes='):].split('-')]
+    data = contents[start:end + 1]
+    return httplib2.Response({
+        'status': 206,
+        'content-range': 'bytes %d-%d/%d' % (
+            start, start + len(data) - 1, len(contents)),
+    }), data
+
+
 class FakeGcsObjects(object):
 
   def __init__(self):
@@ -124,6 +153,11 @@ class FakeGcsObjects(object):
         stream.write(f.contents[start:end + 1])
 
       download.GetRange = get_range_callback
+      # Like the real client, leave the download initialized so that it can
+      # be serialized and cloned over another HTTP connection.
+      download.InitializeDownload(
+          http_wrapper.Request(url=FakeRangeHttp.url(f.bucket, f.object)),
+          http=object())
 
   def Insert(self, insert_request, upload=None):  # pylint: disable=invalid-name
     assert upload is not None
@@ -525,6 +559,60 @@ class TestGCSIO(unittest.TestCase):
     f.seek(0)
     self.assertEqual(f.read(), random_file.contents)
 
+  def test_small_file_read_without_read_ahead(self):
+    file_name = 'gs://gcsio-test/small_file'
+    random_file = self._insert_random_file(self.client, file_name, 1000)
+    f = self.gcs.open(file_name, read_buffer_size=1024)
+    self.assertNotIsInstance(f.raw, gcsio.PrefetchingDownloaderStream)
+    self.assertEqual(f.read(), random_file.contents)
+
+  def test_large_file_read_with_read_ahead(self):
+    file_name = 'gs://gcsio-test/large_file'
+    random_file = self._insert_random_file(self.client, file_name, 10000)
+    f = self.gcs.open(file_name, read_buffer_size=1024)
+    self.assertIsInstance(f.raw, gcsio.PrefetchingDownloaderStream)
+    self.assertEqual(f.read(), random_file.contents)
+
+  def test_thread_downloads_reuse_object_generation(self):
+    file_name = 'gs://gcsio-test/thread_file'
+    random_file = self._insert_random_file(self.client, file_name, 10000)
+    objects = self.client.objects
+    thread_http = FakeRangeHttp(objects)
+    with mock.patch.object(objects, 'Get', wraps=objects.Get) as get:
+      downloader = gcsio.GcsDownloader(
+          self.client, file_name, buffer_size=1024,
+          get_thread_client=lambda: mock.Mock(http=thread_http))
+      # Get the metadata and initialize the download of the first thread.
+      self.assertEqual(get.call_count, 2)
+
+      def get_range(start):
+        return downloader.get_range(start, start + 1000)
+
+      pool = futures.ThreadPoolExecutor(max_workers=4)
+      try:
+        chunks = list(pool.map(get_range, range(0, 10000, 1000)))
+      finally:
+        pool.shutdown()
+      self.assertEqual(get.call_count, 2)
+    self.assertEqual(b''.join(chunks), random_file.contents)
+    self.assertEqual(thread_http.requests, 10)
+
+  def test_thread_storage_client_is_reused(self):
+    with mock.patch.object(gcsio, '_create_storage_client',
+                           side_effect=lambda: object()) as create_client:
+      with mock.patch.object(gcsio.GcsIO, '_thread_clients',
+                             threading.local()):
+        client = gcsio.GcsIO._get_thread_storage_client()
+        self.assertIs(gcsio.GcsIO._get_thread_storage_client(), client)
+        other = []
+        thread = threading.Thread(
+            target=lambda: other.append(
+                gcsio.GcsIO._get_thread_storage_client()))
+        thread.start()
+        thread.join()
+        self.assertIsNot(other[0], client)
+    self.assertEqual(create_client.call_count, 2)
+
   def test_file_random_seek(self):
     file_name = 'gs://gcsio-test/seek_file'
     file_size = 5 * 1024 * 1024 - 100
@@ -31,14 +31,25 @@ Example usage::
                              db='testdb',
                              coll='input')
 
+The source splits the collection into ranges of ``_id`` that are read in
+parallel. Ranges are computed with the ``splitVector`` command, or, where that
+is not available (e.g. on MongoDB Atlas, or without the privileges it needs),
+with a ``$bucketAuto`` aggregation over ``_id``.
+
 
 Write to MongoDB:
 -----------------
 :class:`WriteToMongoDB` is a ``PTransform`` that writes MongoDB documents to
-configured sink, and the write is conducted through a mongodb bulk_write of
-``ReplaceOne`` operations. If the document's _id field already existed in the
-MongoDB collection, it results in an overwrite, otherwise, a new document
-will be inserted.
+configured sink, and the write is conducted through mongodb bulk_writes of
+``ReplaceOne`` operations, which are unordered unless a batch replaces the same
+document more than once. If the document's _id field already
+existed in the MongoDB collection, it results in an overwrite, otherwise, a new
+document will be inserted.
+
+Workers share a ``MongoClient``, and thus its connection pool, between all of
+the write steps that connect with the same parameters. Bulk writes can
+optionally be bounded by size in bytes, and be issued concurrently from a
+bounded pool of threads per worker.
 
 Example usage::
 
@@ -58,7 +69,9 @@ from __future__ import division
 
 import json
 import logging
+import math
 import struct
+import threading
 
 import apache_beam as beam
 from apache_beam.io import iobase
@@ -67,6 +80,7 @@ from apache_beam.transforms import DoFn
 from apache_beam.transforms import PTransform
 from apache_beam.transforms import Reshuffle
 from apache_beam.utils.annotations import experimental
+from apache_beam.utils.thread_pool_executor import shared_bounded_executor
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -76,6 +90,7 @@ try:
   # (https://github.com/py-bson/bson/issues/82). Try to import objectid and if
   # it fails because bson package is installed, MongoDB IO will not work but at
   # least rest of the SDK will work.
+  from bson import BSON
   from bson import objectid
 
   # pymongo also internally depends on bson.
@@ -83,6 +98,7 @@ try:
   from pymongo import DESCENDING
   from pymongo import MongoClient
   from pymongo import ReplaceOne
+  from pymongo.errors import OperationFailure
 except ImportError:
   objectid = None
   _LOGGER.warning("Could not find a compatible bson package.")
@@ -101,7 +117,10 @@ class ReadFromMongoDB(PTransform):
                coll=None,
                filter=None,
                projection=None,
-               extra_client_params=None):
+               extra_client_params=None,
+               bucket_auto=False,
+               cursor_batch_size=None,
+               output_batch_size=None):
     """Initialize a :class:`ReadFromMongoDB`
 
     Args:
@@ -117,6 +136,14 @@ class ReadFromMongoDB(PTransform):
       extra_client_params(dict): Optional `MongoClient
         <https://api.mongodb.com/python/current/api/pymongo/mongo_client.html>`_
         parameters
+      bucket_auto (bool): If True, split the collection with a ``$bucketAuto``
+        aggregation over the ``_id`` of the documents matching the filter,
+        instead of the ``splitVector`` command. ``$bucketAuto`` is also used
+        when ``splitVector`` fails.
+      cursor_batch_size (int): Optional number of documents the server returns
+        per batch of a cursor.
+      output_batch_size (int): If set, the PTransform outputs lists of up to
+        this many documents instead of single documents.
 
     Returns:
       :class:`~apache_beam.transforms.ptransform.PTransform`
@@ -135,7 +162,10 @@ class ReadFromMongoDB(PTransform):
         coll=coll,
         filter=filter,
         projection=projection,
-        extra_client_params=extra_client_params)
+        extra_client_params=extra_client_params,
+        bucket_auto=bucket_auto,
+        cursor_batch_size=cursor_batch_size,
+        output_batch_size=output_batch_size)
 
   def expand(self, pcoll):
     return pcoll | iobase.Read(self._mongo_source)
@@ -148,7 +178,10 @@ class _BoundedMongoSource(iobase.BoundedSource):
                coll=None,
                filter=None,
                projection=None,
-               extra_client_params=None):
+               extra_client_params=None,
+               bucket_auto=False,
+               cursor_batch_size=None,
+               output_batch_size=None):
     if extra_client_params is None:
       extra_client_params = {}
     if filter is None:
@@ -159,6 +192,9 @@ class _BoundedMongoSource(iobase.BoundedSource):
     self.filter = filter
     self.projection = projection
     self.spec = extra_client_params
+    self.bucket_auto = bucket_auto
+    self.cursor_batch_size = cursor_batch_size
+    self.output_batch_size = output_batch_size
 
   def estimate_size(self):
     with MongoClient(self.uri, **self.spec) as client:
@@ -196,13 +232,34 @@ class _BoundedMongoSource(iobase.BoundedSource):
 
   def read(self, range_tracker):
     with MongoClient(self.uri, **self.spec) as client:
-      all_filters = self._merge_id_filter(range_tracker)
-      docs_cursor = client[self.db][self.coll].find(filter=all_filters).sort(
-          [('_id', ASCENDING)])
+      all_filters = self._merge_id_filter(range_tracker.start_position(),
+                                          range_tracker.stop_position())
+      projection, exclude_id = self._get_projection_with_id()
+      docs_cursor = client[self.db][self.coll].find(
+          filter=all_filters,
+          projection=projection,
+          batch_size=self.cursor_batch_size or 0).sort([('_id', ASCENDING)])
+      if not self.output_batch_size:
+        for doc in docs_cursor:
+          if not range_tracker.try_claim(doc['_id']):
+            return
+          if exclude_id:
+            del doc['_id']
+          yield doc
+        return
+
+      batch = []
       for doc in docs_cursor:
         if not range_tracker.try_claim(doc['_id']):
-          return
-        yield doc
+          break
+        if exclude_id:
+          del doc['_id']
+        batch.append(doc)
+        if len(batch) >= self.output_batch_size:
+          yield batch
+          batch = []
+      if batch:
+        yield batch
 
   def display_data(self):
     res = super(_BoundedMongoSource, self).display_data()
@@ -212,6 +269,9 @@ class _BoundedMongoSource(iobase.BoundedSource):
     res['filter'] = json.dumps(self.filter)
     res['projection'] = str(self.projection)
     res['mongo_client_spec'] = json.dumps(self.spec)
+    res['bucket_auto'] = self.bucket_auto
+    res['cursor_batch_size'] = str(self.cursor_batch_size)
+    res['output_batch_size'] = str(self.output_batch_size)
     return res
 
   def _get_split_keys(self, desired_chunk_size_in_mb, start_pos, end_pos):
@@ -223,17 +283,50 @@ class _BoundedMongoSource(iobase.BoundedSource):
     if start_pos >= end_pos:
       # single document not splittable
       return []
+    if self.bucket_auto:
+      return self._get_auto_buckets_split_keys(desired_chunk_size_in_mb,
+                                               start_pos, end_pos)
     with MongoClient(self.uri, **self.spec) as client:
       name_space = '%s.%s' % (self.db, self.coll)
-      return (client[self.db].command(
-          'splitVector',
-          name_space,
-          keyPattern={'_id': 1},  # Ascending index
-          min={'_id': start_pos},
-          max={'_id': end_pos},
-          maxChunkSize=desired_chunk_size_in_mb)['splitKeys'])
-
-  def _merge_id_filter(self, range_tracker):
+      try:
+        return (client[self.db].command(
+            'splitVector',
+            name_space,
+            keyPattern={'_id': 1},  # Ascending index
+            min={'_id': start_pos},
+            max={'_id': end_pos},
+            maxChunkSize=desired_chunk_size_in_mb)['splitKeys'])
+      except OperationFailure as e:
+        # splitVector is not available on mongos routers, on MongoDB Atlas, or
+        # to users without the clusterManager role.
+        _LOGGER.info('splitVector failed, splitting with $bucketAuto: %s', e)
+    return self._get_auto_buckets_split_keys(desired_chunk_size_in_mb,
+                                             start_pos, end_pos)
+
+  def _get_auto_buckets_split_keys(self, desired_chunk_size_in_mb, start_pos,
+                                   end_pos):
+    # Uses the $bucketAuto aggregation stage to group the _ids of the
+    # documents in the range into buckets of about the same number of
+    # documents, and returns the boundaries between the buckets as split keys
+    # in the format of splitVector.
+    with MongoClient(self.uri, **self.spec) as client:
+      all_filters = self._merge_id_filter(start_pos, end_pos)
+      avg_document_size = client[self.db].command(
+          'collstats', self.coll).get('avgObjSize', 0)
+      documents_count = client[self.db][self.coll].count_documents(
+          all_filters)
+      size_in_mb = documents_count * avg_document_size / float(1 << 20)
+      bucket_count = int(math.ceil(size_in_mb / desired_chunk_size_in_mb))
+      if bucket_count <= 1:
+        return []
+      buckets = client[self.db][self.coll].aggregate(
+          [{'$match': all_filters},
+           {'$bucketAuto': {'groupBy': '$_id', 'buckets': bucket_count}}],
+          allowDiskUse=True)
+      # The max of every bucket but the last one is the min of the next one.
+      return [{'_id': bucket['_id']['max']} for bucket in buckets][:-1]
+
+  def _merge_id_filter(self, start_position, stop_position):
     # Merge the default filter with refined _id field range of range_tracker.
     # see more at https://docs.mongodb.com/manual/reference/operator/query/and/
     all_filters = {
@@ -246,8 +339,8 @@ class _BoundedMongoSource(iobase.BoundedSource):
             # https://docs.mongodb.com/manual/reference/operator/query/lt/
             {
                 '_id': {
-                    '$gte': range_tracker.start_position(),
-                    '$lt': range_tracker.stop_position()
+                    '$gte': start_position,
+                    '$lt': stop_position
                 }
             },
         ]
@@ -255,6 +348,20 @@ class _BoundedMongoSource(iobase.BoundedSource):
 
     return all_filters
 
+  def _get_projection_with_id(self):
+    # Documents are claimed by their _id, so it is always fetched. Returns the
+    # projection to query with, and whether _id must be dropped from the
+    # results because the user's projection excludes it.
+    if not isinstance(self.projection, dict) or self.projection.get('_id', 1):
+      return self.projection, False
+    # _id is included by default, so removing its exclusion is enough. Setting
+    # it to 1 instead would turn e.g. {'_id': 0} into an inclusion projection.
+    projection = {
+        field: value
+        for field, value in self.projection.items() if field != '_id'
+    }
+    return projection or None, True
+
   def _get_head_document_id(self, sort_order):
     with MongoClient(self.uri, **self.spec) as client:
       cursor = client[self.db][self.coll].find(filter={}, projection=[]).sort([
@@ -386,7 +493,9 @@ class WriteToMongoDB(PTransform):
                db=None,
                coll=None,
                batch_size=100,
-               extra_client_params=None):
+               extra_client_params=None,
+               batch_size_bytes=None,
+               max_concurrent_writes=None):
     """
 
     Args:
@@ -398,6 +507,13 @@ class WriteToMongoDB(PTransform):
       extra_client_params(dict): Optional `MongoClient
        <https://api.mongodb.com/python/current/api/pymongo/mongo_client.html>`_
        parameters as keyword arguments
+      batch_size_bytes(int): Optional maximum size of the BSON documents of a
+        bulk_write, in bytes. By default bulk_writes are only bounded by
+        batch_size.
+      max_concurrent_writes(int): Optional number of bulk_writes that a worker
+        can have in flight at once. By default each bulk_write is issued
+        synchronously while processing the bundle. Bundles always wait for all
+        of their writes to complete before they finish.
 
     Returns:
       :class:`~apache_beam.transforms.ptransform.PTransform`
@@ -415,13 +531,17 @@ class WriteToMongoDB(PTransform):
     self._coll = coll
     self._batch_size = batch_size
     self._spec = extra_client_params
+    self._batch_size_bytes = batch_size_bytes
+    self._max_concurrent_writes = max_concurrent_writes
 
   def expand(self, pcoll):
     return pcoll \
            | beam.ParDo(_GenerateObjectIdFn()) \
            | Reshuffle() \
            | beam.ParDo(_WriteMongoFn(self._uri, self._db, self._coll,
-                                      self._batch_size, self._spec))
+                                      self._batch_size, self._spec,
+                                      self._batch_size_bytes,
+                                      self._max_concurrent_writes))
 
 
 class _GenerateObjectIdFn(DoFn):
@@ -446,7 +566,9 @@ class _WriteMongoFn(DoFn):
                db=None,
                coll=None,
                batch_size=100,
-               extra_params=None):
+               extra_params=None,
+               batch_size_bytes=None,
+               max_concurrent_writes=None):
     if extra_params is None:
       extra_params = {}
     self.uri = uri
@@ -454,22 +576,57 @@ class _WriteMongoFn(DoFn):
     self.coll = coll
     self.spec = extra_params
     self.batch_size = batch_size
+    self.batch_size_bytes = batch_size_bytes
+    self.max_concurrent_writes = max_concurrent_writes
     self.batch = []
+    self.batch_bytes = 0
+    self._sink = None
+    self._pending_writes = []
+
+  def setup(self):
+    self._sink = _MongoSink(self.uri, self.db, self.coll, self.spec)
+    self._sink.__enter__()
+
+  def start_bundle(self):
+    self._pending_writes = []
 
   def finish_bundle(self):
     self._flush()
+    for future in self._pending_writes:
+      # Re-raises the errors of failed writes, so that the bundle is retried.
+      future.result()
+    self._pending_writes = []
 
   def process(self, element, *args, **kwargs):
+    if self.batch_size_bytes:
+      document_size = len(BSON.encode(element))
+      if (self.batch and
+          self.batch_bytes + document_size > self.batch_size_bytes):
+        self._flush()
+      self.batch_bytes += document_size
     self.batch.append(element)
     if len(self.batch) >= self.batch_size:
       self._flush()
 
+  def teardown(self):
+    if self._sink is not None:
+      self._sink.__exit__(None, None, None)
+      self._sink = None
+
   def _flush(self):
     if len(self.batch) == 0:
       return
-    with _MongoSink(self.uri, self.db, self.coll, self.spec) as sink:
-      sink.write(self.batch)
-      self.batch = []
+    if self._sink is None:
+      self.setup()
+    batch = self.batch
+    self.batch = []
+    self.batch_bytes = 0
+    if not self.max_concurrent_writes:
+      self._sink.write(batch)
+      return
+
+    pool = shared_bounded_executor(_WriteMongoFn, self.max_concurrent_writes)
+    self._pending_writes.append(pool.submit(self._sink.write, batch))
 
   def display_data(self):
     res = super(_WriteMongoFn, self).display_data()
@@ -478,9 +635,43 @@ class _WriteMongoFn(DoFn):
     res['collection'] = self.coll
     res['mongo_client_params'] = json.dumps(self.spec)
     res['batch_size'] = self.batch_size
+    res['batch_size_bytes'] = str(self.batch_size_bytes)
+    res['max_concurrent_writes'] = str(self.max_concurrent_writes)
     return res
 
 
+# MongoClient instances are thread-safe and keep their own connection pools, so
+# a worker process keeps a single client per connection spec for all of its
+# sinks, and only closes it once the last of them has been released.
+_clients_lock = threading.Lock()
+_clients = {}
+
+
+def _client_key(uri, spec):
+  return uri, json.dumps(spec, sort_keys=True, default=str)
+
+
+def _acquire_client(uri, spec):
+  key = _client_key(uri, spec)
+  with _clients_lock:
+    if key not in _clients:
+      _clients[key] = [MongoClient(host=uri, **spec), 0]
+    _clients[key][1] += 1
+    return _clients[key][0]
+
+
+def _release_client(uri, spec):
+  key = _client_key(uri, spec)
+  with _clients_lock:
+    client_and_refs = _clients.get(key)
+    if client_and_refs is None:
+      return
+    client_and_refs[1] -= 1
+    if client_and_refs[1] == 0:
+      del _clients[key]
+      client_and_refs[0].close()
+
+
 class _MongoSink(object):
   def __init__(self, uri=None, db=None, coll=None, extra_params=None):
     if extra_params is None:
@@ -490,19 +681,30 @@ class _MongoSink(object):
     self.coll = coll
     self.spec = extra_params
     self.client = None
+    self._shared_client = False
 
   def write(self, documents):
     if self.client is None:
       self.client = MongoClient(host=self.uri, **self.spec)
     requests = []
+    ids = []
     for doc in documents:
       # match document based on _id field, if not found in current collection,
       # insert new one, otherwise overwrite it.
+      ids.append(doc.get('_id', None))
       requests.append(
-          ReplaceOne(filter={'_id': doc.get('_id', None)},
+          ReplaceOne(filter={'_id': ids[-1]},
                      replacement=doc,
                      upsert=True))
-    resp = self.client[self.db][self.coll].bulk_write(requests)
+    # An unordered write lets the server apply the replacements in any order,
+    # and in parallel. That is only safe if no two of them target the same
+    # document; otherwise the last one must win, as in an ordered write.
+    try:
+      ordered = len(set(ids)) < len(ids)
+    except TypeError:
+      # Some _id values, e.g. embedded documents, are not hashable.
+      ordered = True
+    resp = self.client[self.db][self.coll].bulk_write(requests, ordered=ordered)
     _LOGGER.debug('BulkWrite to MongoDB result in nModified:%d, nUpserted:%d, '
                   'nMatched:%d, Errors:%s' %
                   (resp.modified_count, resp.upserted_count, resp.matched_count,
@@ -510,9 +712,15 @@ class _MongoSink(object):
 
   def __enter__(self):
     if self.client is None:
-      self.client = MongoClient(host=self.uri, **self.spec)
+      self.client = _acquire_client(self.uri, self.spec)
+      self._shared_client = True
     return self
 
   def __exit__(self, exc_type, exc_val, exc_tb):
     if self.client is not None:
-      self.client.close()
+      if self._shared_client:
+        _release_client(self.uri, self.spec)
+      else:
+        self.client.close()
+      self.client = None
+      self._shared_client = False
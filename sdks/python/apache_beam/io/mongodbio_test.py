@@ -21,8 +21,11 @@ from __future__ import division
 
 import datetime
 import logging
+import math
 import random
 import sys
+import threading
+import time
 import unittest
 from unittest import TestCase
 
@@ -30,10 +33,12 @@ import mock
 from bson import objectid
 from pymongo import ASCENDING
 from pymongo import ReplaceOne
+from pymongo.errors import OperationFailure
 
 import apache_beam as beam
 from apache_beam.io import ReadFromMongoDB
 from apache_beam.io import WriteToMongoDB
+from apache_beam.io import mongodbio
 from apache_beam.io import source_test_utils
 from apache_beam.io.mongodbio import _BoundedMongoSource
 from apache_beam.io.mongodbio import _GenerateObjectIdFn
@@ -70,8 +75,35 @@ class _MockMongoColl(object):
       match.append(doc)
     return match
 
-  def find(self, filter=None, **kwargs):
-    return _MockMongoColl(self._filter(filter))
+  def find(self, filter=None, projection=None, **kwargs):
+    # Like a server, return copies of the stored documents.
+    docs = [dict(doc) for doc in self._filter(filter)]
+    if isinstance(projection, dict):
+      # _id is included unless excluded; other fields are either all included
+      # or all excluded.
+      include_id = projection.get('_id', True)
+      fields = {k: v for k, v in projection.items() if k != '_id'}
+      inclusion = any(fields.values()) or (include_id and '_id' in projection
+                                           and not fields)
+      docs = [{k: v for k, v in doc.items()
+               if (include_id if k == '_id' else
+                   (k in fields) if inclusion else k not in fields)}
+              for doc in docs]
+    elif projection:
+      docs = [{k: v for k, v in doc.items() if k in projection or k == '_id'}
+              for doc in docs]
+    return _MockMongoColl(docs)
+
+  def aggregate(self, pipeline, **kwargs):
+    # simulate a $match stage followed by a $bucketAuto stage on _id.
+    match, bucket_auto = pipeline
+    ids = sorted(doc['_id'] for doc in self._filter(match['$match']))
+    bucket_count = min(bucket_auto['$bucketAuto']['buckets'], len(ids))
+    bucket_size = int(math.ceil(len(ids) / bucket_count))
+    mins = ids[::bucket_size]
+    maxs = mins[1:] + [ids[-1]]
+    return [{'_id': {'min': min_id, 'max': max_id}}
+            for min_id, max_id in zip(mins, maxs)]
 
   def sort(self, sort_items):
     key, order = sort_items[0]
@@ -93,16 +125,20 @@ class _MockMongoColl(object):
 class _MockMongoDb(object):
   """Fake Mongo Db."""
 
-  def __init__(self, docs):
+  def __init__(self, docs, split_vector_supported=True):
     self.docs = docs
+    self.split_vector_supported = split_vector_supported
 
   def __getitem__(self, coll_name):
     return _MockMongoColl(self.docs)
 
   def command(self, command, *args, **kwargs):
     if command == 'collstats':
-      return {'size': 5, 'avgSize': 1}
+      # For simplicity of tests every document is considered 1Mb.
+      return {'size': 5, 'avgObjSize': 1024 * 1024}
     elif command == 'splitVector':
+      if not self.split_vector_supported:
+        raise OperationFailure('splitVector is not supported')
       return self.get_split_keys(command, *args, **kwargs)
 
   def get_split_keys(self, command, ns, min, max, maxChunkSize, **kwargs):
@@ -130,11 +166,12 @@ class _MockMongoDb(object):
 
 
 class _MockMongoClient(object):
-  def __init__(self, docs):
+  def __init__(self, docs, split_vector_supported=True):
     self.docs = docs
+    self.split_vector_supported = split_vector_supported
 
   def __getitem__(self, db_name):
-    return _MockMongoDb(self.docs)
+    return _MockMongoDb(self.docs, self.split_vector_supported)
 
   def __enter__(self):
     return self
@@ -177,6 +214,62 @@ class MongoSourceTest(unittest.TestCase):
       source_test_utils.assert_sources_equal_reference_source(
           reference_info, sources_info)
 
+  @mock.patch('apache_beam.io.mongodbio.MongoClient')
+  def test_split_with_bucket_auto(self, mock_client):
+    mock_client.return_value = _MockMongoClient(self._docs)
+    source = _BoundedMongoSource('mongodb://test', 'testdb', 'testcoll',
+                                 bucket_auto=True)
+    for size, expected_count in ((1, 5), (2, 3), (10, 1)):
+      splits = list(
+          source.split(start_position=None,
+                       stop_position=None,
+                       desired_bundle_size=size * 1024 * 1024))
+      self.assertEqual(expected_count, len(splits))
+
+      reference_info = (source, None, None)
+      sources_info = ([(split.source, split.start_position, split.stop_position)
+                       for split in splits])
+      source_test_utils.assert_sources_equal_reference_source(
+          reference_info, sources_info)
+
+  @mock.patch('apache_beam.io.mongodbio.MongoClient')
+  def test_split_falls_back_to_bucket_auto(self, mock_client):
+    mock_client.return_value = _MockMongoClient(self._docs,
+                                                split_vector_supported=False)
+    splits = list(self.mongo_source.split(desired_bundle_size=2 * 1024 * 1024))
+    self.assertEqual(
+        [self._ids[0], self._ids[2], self._ids[4]],
+        [split.start_position for split in splits])
+
+  @mock.patch('apache_beam.io.mongodbio.MongoClient')
+  def test_read_projection_in_batches(self, mock_client):
+    docs = [dict(doc, y=-doc['x']) for doc in self._docs]
+    mock_client.return_value = _MockMongoClient(docs)
+    source = _BoundedMongoSource('mongodb://test', 'testdb', 'testcoll',
+                                 projection=['x'], output_batch_size=2)
+    batches = list(source.read(source.get_range_tracker(None, None)))
+    self.assertEqual(
+        [[{'_id': doc['_id'], 'x': doc['x']} for doc in self._docs[i:i + 2]]
+         for i in range(0, 5, 2)],
+        batches)
+
+  @mock.patch('apache_beam.io.mongodbio.MongoClient')
+  def test_read_projection_without_id(self, mock_client):
+    docs = [dict(doc, y=-doc['x']) for doc in self._docs]
+    mock_client.return_value = _MockMongoClient(docs)
+    for projection, expected in (
+        ({'_id': 0}, [{'x': doc['x'], 'y': doc['y']} for doc in docs]),
+        ({'_id': 0, 'x': 1}, [{'x': doc['x']} for doc in docs])):
+      source = _BoundedMongoSource('mongodb://test', 'testdb', 'testcoll',
+                                   projection=projection)
+      self.assertEqual(
+          expected, list(source.read(source.get_range_tracker(None, None))))
+      source.output_batch_size = 5
+      self.assertEqual(
+          [expected], list(source.read(source.get_range_tracker(None, None))))
+    # The projection of the source itself is left as it was given.
+    self.assertEqual({'_id': 0, 'x': 1}, source.projection)
+
   @mock.patch('apache_beam.io.mongodbio.MongoClient')
   def test_dynamic_work_rebalancing(self, mock_client):
     mock_client.return_value = _MockMongoClient(self._docs)
@@ -267,6 +360,20 @@ class GenerateObjectIdFnTest(unittest.TestCase):
       assert_that(output, equal_to([True] * 2))
 
 
+class _FakeMongoSink(object):
+  """A _MongoSink that records the batches written to it."""
+
+  def __init__(self, latency_secs=0):
+    self.latency_secs = latency_secs
+    self.batches = []
+    self._lock = threading.Lock()
+
+  def write(self, documents):
+    time.sleep(self.latency_secs)
+    with self._lock:
+      self.batches.append(list(documents))
+
+
 class WriteMongoFnTest(unittest.TestCase):
   @mock.patch('apache_beam.io.mongodbio._MongoSink')
   def test_process(self, mock_sink):
@@ -276,24 +383,96 @@ class WriteMongoFnTest(unittest.TestCase):
            | "Write" >> beam.ParDo(_WriteMongoFn(batch_size=2)))
       p.run()
 
-      self.assertEqual(
-          2, mock_sink.return_value.__enter__.return_value.write.call_count)
+      self.assertEqual(2, mock_sink.return_value.write.call_count)
 
   def test_display_data(self):
     data = _WriteMongoFn(batch_size=10).display_data()
     self.assertEqual(10, data['batch_size'])
 
+  def test_batch_size_bytes(self):
+    sink = _FakeMongoSink()
+    fn = _WriteMongoFn(batch_size=100, batch_size_bytes=50)
+    fn._sink = sink
+    fn.start_bundle()
+    for i in range(5):
+      # Each document is 21 bytes of BSON, so only two of them fit in a batch.
+      fn.process({'_id': i, 'x': i})
+    fn.finish_bundle()
+    self.assertEqual([2, 2, 1], [len(batch) for batch in sink.batches])
+
+  def test_concurrent_writes(self):
+    sink = _FakeMongoSink(latency_secs=0.05)
+    fn = _WriteMongoFn(batch_size=1, max_concurrent_writes=3)
+    fn._sink = sink
+    fn.start_bundle()
+    for i in range(10):
+      fn.process({'_id': i})
+    fn.finish_bundle()
+
+    self.assertEqual(
+        list(range(10)),
+        sorted(doc['_id'] for batch in sink.batches for doc in batch))
+
+  def test_failed_concurrent_write_fails_bundle(self):
+    sink = mock.Mock()
+    sink.write.side_effect = RuntimeError('write failed')
+    fn = _WriteMongoFn(batch_size=1, max_concurrent_writes=2)
+    fn._sink = sink
+    fn.start_bundle()
+    fn.process({'_id': 1})
+    with self.assertRaisesRegex(RuntimeError, 'write failed'):
+      fn.finish_bundle()
+
 
 class MongoSinkTest(unittest.TestCase):
   @mock.patch('apache_beam.io.mongodbio.MongoClient')
   def test_write(self, mock_client):
-    docs = [{'x': 1}, {'x': 2}, {'x': 3}]
+    docs = [{'_id': 1, 'x': 1}, {'_id': 2, 'x': 2}, {'_id': 3, 'x': 3}]
+    _MongoSink(uri='test', db='test', coll='test').write(docs)
+    bulk_write = (mock_client.return_value.__getitem__.return_value.
+                  __getitem__.return_value.bulk_write)
+    self.assertTrue(bulk_write.called)
+    self.assertEqual({'ordered': False}, bulk_write.call_args[1])
+
+  @mock.patch('apache_beam.io.mongodbio.MongoClient')
+  def test_write_with_duplicate_ids_is_ordered(self, mock_client):
+    docs = [{'_id': 1, 'x': 1}, {'_id': 2, 'x': 2}, {'_id': 1, 'x': 3}]
     _MongoSink(uri='test', db='test', coll='test').write(docs)
-    self.assertTrue(mock_client.return_value.__getitem__.return_value.
-                    __getitem__.return_value.bulk_write.called)
+    bulk_write = (mock_client.return_value.__getitem__.return_value.
+                  __getitem__.return_value.bulk_write)
+    self.assertEqual({'ordered': True}, bulk_write.call_args[1])
+
+  @mock.patch('apache_beam.io.mongodbio.MongoClient')
+  def test_client_is_shared(self, mock_client):
+    mock_client.side_effect = lambda *args, **kwargs: mock.Mock()
+    sinks = [_MongoSink(uri='test', db='test', coll='coll%d' % i)
+             for i in range(3)]
+    for sink in sinks:
+      sink.__enter__()
+    other_sink = _MongoSink(uri='test', db='test', coll='test',
+                            extra_params={'connect': False})
+    other_sink.__enter__()
+
+    self.assertEqual(2, mock_client.call_count)
+    client = sinks[0].client
+    self.assertTrue(all(sink.client is client for sink in sinks))
+    self.assertIsNot(client, other_sink.client)
+
+    for sink in sinks:
+      self.assertFalse(client.close.called)
+      sink.__exit__(None, None, None)
+    # The client is only closed once every sink using it has been released.
+    self.assertTrue(client.close.called)
+    self.assertFalse(other_sink.client.close.called)
+    other_sink.__exit__(None, None, None)
+    self.assertEqual({}, mongodbio._clients)
 
 
 class WriteToMongoDBTest(unittest.TestCase):
+  def tearDown(self):
+    # Drops the mock clients of pipelines that did not tear their DoFns down.
+    mongodbio._clients.clear()
+
   @mock.patch('apache_beam.io.mongodbio.MongoClient')
   def test_write_to_mongodb_with_existing_id(self, mock_client):
     id = objectid.ObjectId()
@@ -304,7 +483,8 @@ class WriteToMongoDBTest(unittest.TestCase):
            | "Write" >> WriteToMongoDB(db='test', coll='test'))
       p.run()
       mock_client.return_value.__getitem__.return_value.__getitem__. \
-        return_value.bulk_write.assert_called_with(expected_update)
+        return_value.bulk_write.assert_called_with(expected_update,
+                                                   ordered=False)
 
   @mock.patch('apache_beam.io.mongodbio.MongoClient')
   def test_write_to_mongodb_with_generated_id(self, mock_client):
@@ -320,7 +500,8 @@ class WriteToMongoDBTest(unittest.TestCase):
            | "Write" >> WriteToMongoDB(db='test', coll='test'))
       p.run()
       mock_client.return_value.__getitem__.return_value.__getitem__. \
-        return_value.bulk_write.assert_called_with(expected_update)
+        return_value.bulk_write.assert_called_with(expected_update,
+                                                   ordered=False)
 
 
 class ObjectIdHelperTest(TestCase):
@@ -31,6 +31,7 @@ Parquet file.
 
 from __future__ import absolute_import
 
+from concurrent import futures
 from functools import partial
 
 from apache_beam.io import filebasedsink
@@ -58,13 +59,10 @@ class _ArrowTableToRowDictionaries(DoFn):
   """ A DoFn that consumes an Arrow table and yields a python dictionary for
   each row in the table."""
   def process(self, table):
-    num_rows = table.num_rows
-    data_items = table.to_pydict().items()
-    for n in range(num_rows):
-      row = {}
-      for column, values in data_items:
-        row[column] = values[n]
-      yield row
+    data = table.to_pydict()
+    columns = list(data.keys())
+    for values in zip(*data.values()):
+      yield dict(zip(columns, values))
 
 
 class ReadFromParquetBatched(PTransform):
@@ -73,7 +71,7 @@ class ReadFromParquetBatched(PTransform):
      currently experimental. No backward-compatibility guarantees."""
 
   def __init__(self, file_pattern=None, min_bundle_size=0,
-               validate=True, columns=None):
+               validate=True, columns=None, filters=None):
     """ Initializes :class:`~ReadFromParquetBatched`
 
     An alternative to :class:`~ReadFromParquet` that yields each row group from
@@ -110,6 +108,13 @@ class ReadFromParquetBatched(PTransform):
       columns (List[str]): list of columns that will be read from files.
         A column name may be a prefix of a nested field, e.g. 'a' will select
         'a.b', 'a.c', and 'a.d.e'
+      filters (List[Tuple]): list of ``(column, op, value)`` predicates on
+        top-level columns, combined with AND. ``op`` is one of ``'='``,
+        ``'=='``, ``'!='``, ``'<'``, ``'<='``, ``'>'``, ``'>='``, ``'in'`` and
+        ``'not in'``. Row groups whose column statistics show that none of
+        their rows can match are skipped without being read. The row groups
+        that are read are returned in full, so rows must still be filtered
+        downstream if an exact result is needed.
     """
 
     super(ReadFromParquetBatched, self).__init__()
@@ -118,6 +123,7 @@ class ReadFromParquetBatched(PTransform):
         min_bundle_size,
         validate=validate,
         columns=columns,
+        filters=filters,
     )
 
   def expand(self, pvalue):
@@ -133,7 +139,7 @@ class ReadFromParquet(PTransform):
      currently experimental. No backward-compatibility guarantees."""
 
   def __init__(self, file_pattern=None, min_bundle_size=0,
-               validate=True, columns=None):
+               validate=True, columns=None, filters=None):
     """Initializes :class:`ReadFromParquet`.
 
     Uses source ``_ParquetSource`` to read a set of Parquet files defined by
@@ -178,6 +184,13 @@ class ReadFromParquet(PTransform):
       columns (List[str]): list of columns that will be read from files.
         A column name may be a prefix of a nested field, e.g. 'a' will select
         'a.b', 'a.c', and 'a.d.e'
+      filters (List[Tuple]): list of ``(column, op, value)`` predicates on
+        top-level columns, combined with AND. ``op`` is one of ``'='``,
+        ``'=='``, ``'!='``, ``'<'``, ``'<='``, ``'>'``, ``'>='``, ``'in'`` and
+        ``'not in'``. Row groups whose column statistics show that none of
+        their rows can match are skipped without being read. The row groups
+        that are read are returned in full, so rows must still be filtered
+        downstream if an exact result is needed.
     """
     super(ReadFromParquet, self).__init__()
     self._source = _create_parquet_source(
@@ -185,6 +198,7 @@ class ReadFromParquet(PTransform):
         min_bundle_size,
         validate=validate,
         columns=columns,
+        filters=filters,
     )
 
   def expand(self, pvalue):
@@ -208,6 +222,7 @@ class ReadAllFromParquetBatched(PTransform):
   def __init__(self, min_bundle_size=0,
                desired_bundle_size=DEFAULT_DESIRED_BUNDLE_SIZE,
                columns=None,
+               filters=None,
                label='ReadAllFiles'):
     """Initializes ``ReadAllFromParquet``.
 
@@ -219,12 +234,16 @@ class ReadAllFromParquetBatched(PTransform):
       columns: list of columns that will be read from files. A column name
                        may be a prefix of a nested field, e.g. 'a' will select
                        'a.b', 'a.c', and 'a.d.e'
+      filters: list of ``(column, op, value)`` predicates used to skip row
+                       groups that cannot contain matching rows. See
+                       :class:`~ReadFromParquetBatched`.
     """
     super(ReadAllFromParquetBatched, self).__init__()
     source_from_file = partial(
         _create_parquet_source,
         min_bundle_size=min_bundle_size,
-        columns=columns
+        columns=columns,
+        filters=filters
     )
     self._read_all_files = filebasedsource.ReadAllFiles(
         True, CompressionTypes.UNCOMPRESSED, desired_bundle_size,
@@ -247,13 +266,15 @@ class ReadAllFromParquet(PTransform):
 def _create_parquet_source(file_pattern=None,
                            min_bundle_size=0,
                            validate=False,
-                           columns=None):
+                           columns=None,
+                           filters=None):
   return \
     _ParquetSource(
         file_pattern=file_pattern,
         min_bundle_size=min_bundle_size,
         validate=validate,
         columns=columns,
+        filters=filters,
     )
 
 
@@ -279,17 +300,85 @@ class _ParquetUtils(object):
   def get_number_of_row_groups(pf):
     return pf.metadata.num_row_groups
 
+  # For each filter op, a function of (min, max, value) that is True if no
+  # value within [min, max] can satisfy the predicate.
+  _EXCLUDES = {
+      '=': lambda lo, hi, v: v < lo or v > hi,
+      '==': lambda lo, hi, v: v < lo or v > hi,
+      '!=': lambda lo, hi, v: lo == hi == v,
+      '<': lambda lo, hi, v: lo >= v,
+      '<=': lambda lo, hi, v: lo > v,
+      '>': lambda lo, hi, v: hi <= v,
+      '>=': lambda lo, hi, v: hi < v,
+      'in': lambda lo, hi, v: all(x < lo or x > hi for x in v),
+      'not in': lambda lo, hi, v: lo == hi and lo in v,
+  }
+
+  @staticmethod
+  def validate_filters(filters):
+    for column, op, value in filters:
+      if op not in _ParquetUtils._EXCLUDES:
+        raise ValueError(
+            'Unsupported operator %r in filter on column %r.' % (op, column))
+      if op in ('in', 'not in') and isinstance(value, (str, bytes)):
+        raise ValueError(
+            'Operator %r in filter on column %r requires a collection of '
+            'values.' % (op, column))
+
+  @staticmethod
+  def _as_stat_type(value, stat):
+    # String statistics may be reported as bytes.
+    if isinstance(stat, bytes) and not isinstance(value, bytes):
+      return value.encode('utf-8')
+    return value
+
+  @staticmethod
+  def row_group_may_match(pf, row_group_index, filters):
+    """Returns False if the row group statistics show that no row in it can
+    satisfy all of the filters."""
+    row_group = pf.metadata.row_group(row_group_index)
+    column_indices = {
+        row_group.column(i).path_in_schema: i
+        for i in range(row_group.num_columns)}
+    for column, op, value in filters:
+      if column not in column_indices:
+        continue
+      statistics = row_group.column(column_indices[column]).statistics
+      if statistics is None or not statistics.has_min_max:
+        continue
+      lo, hi = statistics.min, statistics.max
+      if op in ('in', 'not in'):
+        value = [_ParquetUtils._as_stat_type(v, lo) for v in value]
+      else:
+        value = _ParquetUtils._as_stat_type(value, lo)
+      try:
+        if _ParquetUtils._EXCLUDES[op](lo, hi, value):
+          return False
+      except TypeError:
+        # Statistics of a type that is not comparable with the value can not
+        # be used to skip the row group.
+        continue
+    return True
+
 
 class _ParquetSource(filebasedsource.FileBasedSource):
   """A source for reading Parquet files.
   """
-  def __init__(self, file_pattern, min_bundle_size, validate, columns):
+  def __init__(self, file_pattern, min_bundle_size, validate, columns,
+               filters=None):
     super(_ParquetSource, self).__init__(
         file_pattern=file_pattern,
         min_bundle_size=min_bundle_size,
         validate=validate
     )
     self._columns = columns
+    if filters:
+      _ParquetUtils.validate_filters(filters)
+    self._filters = filters
+
+  def _should_read(self, pf, row_group_index):
+    return not self._filters or _ParquetUtils.row_group_may_match(
+        pf, row_group_index, self._filters)
 
   def read_records(self, file_name, range_tracker):
     next_block_start = -1
@@ -323,16 +412,41 @@ class _ParquetSource(filebasedsource.FileBasedSource):
         next_block_start = range_tracker.stop_position()
       number_of_row_groups = _ParquetUtils.get_number_of_row_groups(pf)
 
-      while range_tracker.try_claim(next_block_start):
-        table = pf.read_row_group(index, self._columns)
-
-        if index + 1 < number_of_row_groups:
-          index = index + 1
-          next_block_start = _ParquetUtils.get_offset(pf, index)
-        else:
-          next_block_start = range_tracker.stop_position()
-
-        yield table
+      # The next row group to be read is fetched in the background while the
+      # current one is processed downstream.
+      with futures.ThreadPoolExecutor(max_workers=1) as executor:
+        prefetched = {}
+
+        def read_row_group(row_group_index):
+          if row_group_index in prefetched:
+            return prefetched.pop(row_group_index).result()
+          return pf.read_row_group(row_group_index, self._columns)
+
+        def prefetch_after(row_group_index):
+          stop_position = range_tracker.stop_position()
+          for i in range(row_group_index + 1, number_of_row_groups):
+            if _ParquetUtils.get_offset(pf, i) >= stop_position:
+              return
+            if self._should_read(pf, i):
+              prefetched[i] = executor.submit(
+                  pf.read_row_group, i, self._columns)
+              return
+
+        while range_tracker.try_claim(next_block_start):
+          current_index = index
+          if index + 1 < number_of_row_groups:
+            index = index + 1
+            next_block_start = _ParquetUtils.get_offset(pf, index)
+          else:
+            next_block_start = range_tracker.stop_position()
+
+          if not self._should_read(pf, current_index):
+            continue
+          table = read_row_group(current_index)
+          if not prefetched:
+            prefetch_after(current_index)
+
+          yield table
 
 
 class WriteToParquet(PTransform):
@@ -454,6 +454,41 @@ class TestParquet(unittest.TestCase):
                                             names=['name'])]
     self._run_parquet_test(file_name, ['name'], None, False, expected_result)
 
+  def test_filters_skip_row_groups(self):
+    # Row groups hold favorite_number [1, 3, 7] and [4, -1, 6] respectively.
+    file_name = self._write_data(count=6, row_group_size=3)
+    orig = self._records_as_arrow(count=6)
+    row_groups = [pa.Table.from_batches([batch])
+                  for batch in orig.to_batches(chunksize=3)]
+    for filters, expected_result in [
+        ([('favorite_number', '>', 6)], row_groups[:1]),
+        ([('favorite_number', '<', 0)], row_groups[1:]),
+        ([('favorite_number', 'in', [2, 5])], row_groups),
+        ([('favorite_number', '==', 100)], []),
+        ([('name', '==', 'Thomas')], row_groups[:1]),
+        ([('favorite_number', '>', 0), ('name', '>=', 'Toby')],
+         row_groups[:1])]:
+      source = _create_parquet_source(file_name, filters=filters)
+      self.assertCountEqual(
+          expected_result,
+          source_test_utils.read_from_source(source, None, None))
+
+  def test_filters_with_splitting(self):
+    file_name = self._write_data(count=12000, row_group_size=1000)
+    source = _create_parquet_source(
+        file_name, filters=[('favorite_number', '!=', 0)])
+    sources_info = [
+        (split.source, split.start_position, split.stop_position)
+        for split in source.split(desired_bundle_size=10000)]
+    source_test_utils.assert_sources_equal_reference_source(
+        (source, None, None), sources_info)
+
+  def test_invalid_filters(self):
+    with self.assertRaises(ValueError):
+      _create_parquet_source('some_file', filters=[('a', '~', 1)])
+    with self.assertRaises(ValueError):
+      _create_parquet_source('some_file', filters=[('a', 'in', 'abc')])
+
   def test_sink_transform_multiple_row_group(self):
     with tempfile.NamedTemporaryFile() as dst:
       path = dst.name
@@ -41,8 +41,10 @@ from apache_beam.io import iobase
 from apache_beam.io.filesystem import CompressionTypes
 from apache_beam.io.textio import _TextSink as TextSink
 from apache_beam.io.textio import _TextSource as TextSource
+from apache_beam.io.textio import _TextSourceBatched as TextSourceBatched
 # Importing following private classes for testing.
 from apache_beam.io.textio import ReadFromText
+from apache_beam.io.textio import ReadFromTextBatched
 from apache_beam.io.textio import ReadFromTextWithFilename
 from apache_beam.io.textio import WriteToText
 from apache_beam.testing.test_pipeline import TestPipeline
@@ -292,6 +294,19 @@ class TextSourceTest(unittest.TestCase):
     read_data = list(source.read(range_tracker))
     self.assertCountEqual([line + '\r\n' for line in written_data], read_data)
 
+  def test_read_single_file_one_byte_buffer(self):
+    # Every separator, including each '\r\n', straddles a buffer refill.
+    file_name, expected_data = write_data(TextSourceTest.DEFAULT_NUM_RECORDS,
+                                          eol=EOL.MIXED)
+    self._run_read_test(file_name, expected_data, buffer_size=1)
+
+  def test_read_single_file_long_lines(self):
+    lines = [b'x' * 100000, b'', b'y' * 50000]
+    with TempDir() as tempdir:
+      file_name = tempdir.create_temp_file(lines=[b'\r\n'.join(lines)])
+      self._run_read_test(
+          file_name, [line.decode('utf-8') for line in lines])
+
   def test_read_file_pattern_with_empty_files(self):
     pattern, expected_data = write_pattern(
         [5 * TextSourceTest.DEFAULT_NUM_RECORDS,
@@ -429,6 +444,38 @@ class TextSourceTest(unittest.TestCase):
     assert_that(pcoll, equal_to(expected_data))
     pipeline.run()
 
+  def test_read_batched(self):
+    file_name, expected_data = write_data(5)
+    source = TextSourceBatched(file_name, 0, CompressionTypes.UNCOMPRESSED,
+                               True, coders.StrUtf8Coder(), max_batch_size=2)
+    range_tracker = source.get_range_tracker(None, None)
+    read_data = list(source.read(range_tracker))
+    self.assertEqual([2, 2, 1], [len(batch) for batch in read_data])
+    self.assertEqual(expected_data, sum(read_data, []))
+
+  def test_read_batched_splits(self):
+    file_name, expected_data = write_data(100)
+    source = TextSourceBatched(file_name, 0, CompressionTypes.UNCOMPRESSED,
+                               True, coders.StrUtf8Coder(), max_batch_size=7)
+    splits = list(source.split(desired_bundle_size=100))
+    assert len(splits) > 1
+    read_data = []
+    for split in splits:
+      for batch in source_test_utils.read_from_source(
+          split.source, split.start_position, split.stop_position):
+        self.assertLessEqual(len(batch), 7)
+        read_data.extend(batch)
+    self.assertEqual(expected_data, read_data)
+
+  def test_read_from_text_batched(self):
+    file_name, expected_data = write_data(5)
+    pipeline = TestPipeline()
+    pcoll = (pipeline
+             | 'Read' >> ReadFromTextBatched(file_name, max_batch_size=2)
+             | 'Unbatch' >> beam.FlatMap(lambda batch: batch))
+    assert_that(pcoll, equal_to(expected_data))
+    pipeline.run()
+
   def test_read_from_text_with_file_name_single_file(self):
     file_name, data = write_data(5)
     expected_data = [(file_name, el) for el in data]
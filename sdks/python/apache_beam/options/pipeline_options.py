@@ -446,6 +446,20 @@ class DirectOptions(PipelineOptions):
         choices=['in_memory', 'multi_threading', 'multi_processing'],
         help='Workers running environment.'
         )
+    parser.add_argument(
+        '--direct_runner_grouping_buffer_bytes',
+        type=int,
+        default=None,
+        help='Approximate number of bytes each GroupByKey buffers in memory '
+        'before spilling sorted runs to local temporary files. If unset, all '
+        'grouped data is kept in memory.')
+    parser.add_argument(
+        '--direct_runner_max_parallel_stages',
+        type=int,
+        default=None,
+        help='Maximum number of independent stages to execute concurrently in '
+        'batch mode. Each concurrently executing stage uses its own workers. '
+        'If unset, stages are executed one at a time.')
 
 
 class GoogleCloudOptions(PipelineOptions):
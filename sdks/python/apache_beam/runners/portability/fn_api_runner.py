@@ -25,16 +25,20 @@ from __future__ import print_function
 import collections
 import contextlib
 import copy
+import heapq
 import itertools
 import logging
 import os
 import queue
+import struct
 import subprocess
 import sys
+import tempfile
 import threading
 import time
 import uuid
 from builtins import object
+from concurrent import futures
 from typing import TYPE_CHECKING
 from typing import Any
 from typing import Callable
@@ -46,6 +50,7 @@ from typing import List
 from typing import Mapping
 from typing import Optional
 from typing import Sequence
+from typing import Set
 from typing import Tuple
 from typing import Type
 from typing import TypeVar
@@ -76,6 +81,7 @@ from apache_beam.runners import pipeline_context
 from apache_beam.runners import runner
 from apache_beam.runners.portability import artifact_service
 from apache_beam.runners.portability import fn_api_runner_transforms
+from apache_beam.runners.portability import fn_api_runner_watermarks
 from apache_beam.runners.portability import portable_metrics
 from apache_beam.runners.portability.fn_api_runner_transforms import create_buffer_id
 from apache_beam.runners.portability.fn_api_runner_transforms import only_element
@@ -93,6 +99,7 @@ from apache_beam.transforms.window import GlobalWindow
 from apache_beam.transforms.window import GlobalWindows
 from apache_beam.utils import profiler
 from apache_beam.utils import proto_utils
+from apache_beam.utils import timestamp
 from apache_beam.utils import windowed_value
 from apache_beam.utils.thread_pool_executor import UnboundedThreadPoolExecutor
 
@@ -253,15 +260,74 @@ class _ListBuffer(list):
   """Used to support parititioning of a list."""
   def partition(self, n):
     # type: (int) -> List[List[bytes]]
-    return [self[k::n] for k in range(n)]
+    """Partitions the encoded chunks into n parts of roughly equal byte size.
+
+    Chunks are assigned greedily, largest first, to the part with the fewest
+    bytes so far. Each part keeps its chunks in their original order.
+    """
+    part_bytes = [0] * n
+    part_indices = [[] for _ in range(n)]  # type: List[List[int]]
+    for ix in sorted(
+        range(len(self)), key=lambda ix: len(self[ix]), reverse=True):
+      target = part_bytes.index(min(part_bytes))
+      part_bytes[target] += len(self[ix])
+      part_indices[target].append(ix)
+    return [[self[ix] for ix in sorted(indices)] for indices in part_indices]
+
+
+class _SpillFile(object):
+  """A re-iterable sequence of byte strings stored in a local temporary file.
+
+  Each appended byte string is written as a length-prefixed frame, and
+  iterating yields the frames back in the order they were appended.
+  """
+  _FRAME_HEADER = struct.Struct('>I')
+
+  def __init__(self):
+    # type: () -> None
+    self._file = tempfile.TemporaryFile()
+    self._lock = threading.Lock()
+
+  def append(self, data):
+    # type: (bytes) -> None
+    with self._lock:
+      self._file.seek(0, os.SEEK_END)
+      self._file.write(self._FRAME_HEADER.pack(len(data)))
+      self._file.write(data)
+
+  def __iter__(self):
+    # type: () -> Iterator[bytes]
+    position = 0
+    header_size = self._FRAME_HEADER.size
+    while True:
+      with self._lock:
+        self._file.seek(position)
+        header = self._file.read(header_size)
+        if not header:
+          return
+        size, = self._FRAME_HEADER.unpack(header)
+        data = self._file.read(size)
+      position += header_size + size
+      yield data
+
+  def close(self):
+    # type: () -> None
+    self._file.close()
 
 
 class _GroupingBuffer(object):
-  """Used to accumulate groupded (shuffled) results."""
+  """Used to accumulate groupded (shuffled) results.
+
+  If ``max_bytes`` is given, the table of grouped values is bounded to
+  (approximately) that many bytes of encoded input. Whenever it grows past the
+  limit, its contents are written to a local temporary file as a run sorted by
+  encoded key, and the runs are merge-streamed when the buffer is partitioned.
+  """
   def __init__(self,
                pre_grouped_coder,  # type: coders.Coder
                post_grouped_coder,  # type: coders.Coder
-               windowing
+               windowing,
+               max_bytes=None  # type: Optional[int]
               ):
     # type: (...) -> None
     self._key_coder = pre_grouped_coder.key_coder()
@@ -269,7 +335,10 @@ class _GroupingBuffer(object):
     self._post_grouped_coder = post_grouped_coder
     self._table = collections.defaultdict(list)  # type: Optional[DefaultDict[bytes, List[Any]]]
     self._windowing = windowing
-    self._grouped_output = None  # type: Optional[List[List[bytes]]]
+    self._grouped_output = None  # type: Optional[List[Iterable[bytes]]]
+    self._max_bytes = max_bytes
+    self._table_bytes = 0
+    self._spilled_runs = []  # type: List[_SpillFile]
 
   def append(self, elements_data):
     # type: (bytes) -> None
@@ -287,48 +356,191 @@ class _GroupingBuffer(object):
       self._table[key_coder_impl.encode(key)].append(
           value if is_trivial_windowing
           else windowed_key_value.with_value(value))
+    self._table_bytes += len(elements_data)
+    if self._max_bytes is not None and self._table_bytes > self._max_bytes:
+      self._spill()
+
+  def _spilled_value_coder_impl(self):
+    # type: () -> CoderImpl
+    value_coder = self._pre_grouped_coder.value_coder()
+    if not self._windowing.is_default():
+      value_coder = coders.WindowedValueCoder(
+          value_coder, self._pre_grouped_coder.window_coder)
+    return value_coder.get_impl()
+
+  def _spill(self):
+    # type: () -> None
+    """Writes the in-memory table to disk as a run sorted by encoded key."""
+    value_coder_impl = self._spilled_value_coder_impl()
+    run = _SpillFile()
+    for encoded_key in sorted(self._table):
+      values = self._table[encoded_key]
+      output_stream = create_OutputStream()
+      output_stream.write(encoded_key, True)
+      output_stream.write_var_int64(len(values))
+      for value in values:
+        value_coder_impl.encode_to_stream(value, output_stream, True)
+      run.append(output_stream.get())
+    self._spilled_runs.append(run)
+    self._table = collections.defaultdict(list)
+    self._table_bytes = 0
+
+  def _read_run(self, run_index, run):
+    # type: (int, _SpillFile) -> Iterator[Tuple[bytes, int, List[Any]]]
+    value_coder_impl = self._spilled_value_coder_impl()
+    for record in run:
+      input_stream = create_InputStream(record)
+      encoded_key = input_stream.read_all(True)
+      values = [value_coder_impl.decode_from_stream(input_stream, True)
+                for _ in range(input_stream.read_var_int64())]
+      yield encoded_key, run_index, values
+
+  def _grouped_items(self):
+    # type: () -> Iterator[Tuple[bytes, List[Any]]]
+    """Yields (encoded_key, values) pairs for every key in the buffer.
+
+    If nothing was spilled this is just the in-memory table. Otherwise the
+    spilled runs and the remaining in-memory table are merged by encoded key,
+    concatenating the values of each key in the order they were appended.
+    """
+    if not self._spilled_runs:
+      for item in self._table.items():
+        yield item
+      return
+    runs = [self._read_run(ix, run)
+            for ix, run in enumerate(self._spilled_runs)]
+    in_memory_index = len(runs)
+    runs.append(
+        (encoded_key, in_memory_index, self._table[encoded_key])
+        for encoded_key in sorted(self._table))
+    # The run index breaks ties between equal keys, so values are never
+    # compared and the original append order is kept.
+    for encoded_key, group in itertools.groupby(
+        heapq.merge(*runs), key=lambda record: record[0]):
+      yield encoded_key, list(itertools.chain.from_iterable(
+          values for _, _, values in group))
+
+  def _windowed_key_values_fn(self):
+    # type: () -> Callable[[Any, List[Any]], Iterable[windowed_value.WindowedValue]]
+    if self._windowing.is_default():
+      globally_window = GlobalWindows.windowed_value(
+          None,
+          timestamp=GlobalWindow().max_timestamp(),
+          pane_info=windowed_value.PaneInfo(
+              is_first=True,
+              is_last=True,
+              timing=windowed_value.PaneInfoTiming.ON_TIME,
+              index=0,
+              nonspeculative_index=0)).with_value
+      return lambda key, values: [globally_window((key, values))]
+    else:
+      # TODO(pabloem, BEAM-7514): Trigger driver needs access to the clock
+      #   note that this only comes through if windowing is default - but what
+      #   about having multiple firings on the global window.
+      #   May need to revise.
+      trigger_driver = trigger.create_trigger_driver(self._windowing, True)
+      return trigger_driver.process_entire_key
 
   def partition(self, n):
-    # type: (int) -> List[List[bytes]]
+    # type: (int) -> List[Iterable[bytes]]
     """ It is used to partition _GroupingBuffer to N parts. Once it is
     partitioned, it would not be re-partitioned with diff N. Re-partition
     is not supported now.
     """
     if not self._grouped_output:
-      if self._windowing.is_default():
-        globally_window = GlobalWindows.windowed_value(
-            None,
-            timestamp=GlobalWindow().max_timestamp(),
-            pane_info=windowed_value.PaneInfo(
-                is_first=True,
-                is_last=True,
-                timing=windowed_value.PaneInfoTiming.ON_TIME,
-                index=0,
-                nonspeculative_index=0)).with_value
-        windowed_key_values = lambda key, values: [
-            globally_window((key, values))]
-      else:
-        # TODO(pabloem, BEAM-7514): Trigger driver needs access to the clock
-        #   note that this only comes through if windowing is default - but what
-        #   about having multiple firings on the global window.
-        #   May need to revise.
-        trigger_driver = trigger.create_trigger_driver(self._windowing, True)
-        windowed_key_values = trigger_driver.process_entire_key
+      windowed_key_values = self._windowed_key_values_fn()
       coder_impl = self._post_grouped_coder.get_impl()
       key_coder_impl = self._key_coder.get_impl()
-      self._grouped_output = [[] for _ in range(n)]
+      # Once the buffer has spilled, the grouped output is also kept on disk,
+      # in chunks of at most (approximately) max_bytes per partition.
+      spilled = bool(self._spilled_runs)
+      spilled_output = [_SpillFile() for _ in range(n)] if spilled else None
       output_stream_list = []
       for _ in range(n):
         output_stream_list.append(create_OutputStream())
-      for idx, (encoded_key, windowed_values) in enumerate(self._table.items()):
+      # Each key goes to the partition with the fewest output bytes so far, so
+      # that hot keys do not end up sharing a partition with many others.
+      part_bytes = [0] * n
+      for encoded_key, windowed_values in self._grouped_items():
         key = key_coder_impl.decode(encoded_key)
+        target = part_bytes.index(min(part_bytes))
+        output_stream = output_stream_list[target]
+        size_before = output_stream.size()
         for wkvs in windowed_key_values(key, windowed_values):
-          coder_impl.encode_to_stream(wkvs, output_stream_list[idx % n], True)
-      for ix, output_stream in enumerate(output_stream_list):
-        self._grouped_output[ix] = [output_stream.get()]
+          coder_impl.encode_to_stream(wkvs, output_stream, True)
+        part_bytes[target] += output_stream.size() - size_before
+        if spilled and output_stream.size() > self._max_bytes:
+          spilled_output[target].append(output_stream.get())
+          output_stream_list[target] = create_OutputStream()
+      if spilled:
+        for ix, output_stream in enumerate(output_stream_list):
+          if output_stream.size():
+            spilled_output[ix].append(output_stream.get())
+        for run in self._spilled_runs:
+          run.close()
+        self._spilled_runs = []
+        self._grouped_output = spilled_output
+      else:
+        self._grouped_output = [
+            [output_stream.get()] for output_stream in output_stream_list]
       self._table = None
     return self._grouped_output
 
+  def extract_ready(self, watermark):
+    # type: (timestamp.Timestamp) -> List[bytes]
+    """Groups and removes the buffered values whose windows are complete.
+
+    This is used in streaming mode, where the buffer is read incrementally as
+    the watermark of its input advances. A window is complete once the
+    watermark has passed its end. Values in the global window, or in windows
+    that may still merge, are only complete once the watermark reaches
+    ``MAX_TIMESTAMP``. Spilling is not supported in this mode.
+    """
+    assert not self._spilled_runs, 'Spilled grouping buffers are read once.'
+    if watermark >= timestamp.MAX_TIMESTAMP:
+      ready, self._table = self._table, collections.defaultdict(list)
+    elif (self._windowing.is_default()
+          or self._windowing.windowfn.is_merging()):
+      return []
+    else:
+      ready = collections.defaultdict(list)  # type: DefaultDict[bytes, List[Any]]
+      for encoded_key in list(self._table):
+        pending = []
+        for wv in self._table[encoded_key]:
+          for window in wv.windows:
+            exploded = windowed_value.WindowedValue(
+                wv.value, wv.timestamp, (window,), wv.pane_info)
+            if window.max_timestamp() < watermark:
+              ready[encoded_key].append(exploded)
+            else:
+              pending.append(exploded)
+        if pending:
+          self._table[encoded_key] = pending
+        else:
+          del self._table[encoded_key]
+    self._table_bytes = 0
+    windowed_key_values = self._windowed_key_values_fn()
+    coder_impl = self._post_grouped_coder.get_impl()
+    key_coder_impl = self._key_coder.get_impl()
+    output_stream = create_OutputStream()
+    for encoded_key, values in ready.items():
+      key = key_coder_impl.decode(encoded_key)
+      for wkvs in windowed_key_values(key, values):
+        coder_impl.encode_to_stream(wkvs, output_stream, True)
+    return [output_stream.get()] if output_stream.size() else []
+
+  def watermark_hold(self):
+    # type: () -> Optional[timestamp.Timestamp]
+    """Returns the earliest timestamp of the buffered values, if any."""
+    if not self._table:
+      return None
+    elif self._windowing.is_default():
+      # Timestamps of values in the global window are not kept.
+      return timestamp.MIN_TIMESTAMP
+    else:
+      return min(wv.timestamp
+                 for values in self._table.values() for wv in values)
+
   def __iter__(self):
     # type: () -> Iterator[bytes]
     """ Since partition() returns a list of lists, add this __iter__ to return
@@ -386,6 +598,29 @@ class _WindowGroupingBuffer(object):
       yield encoded_key, encoded_window, output_stream.get()
 
 
+class _PreparedStage(object):
+  """A stage whose descriptor, side inputs and buffers have been set up."""
+  def __init__(self,
+               worker_handler_list,  # type: Sequence[WorkerHandler]
+               context,  # type: pipeline_context.PipelineContext
+               process_bundle_descriptor,  # type: beam_fn_api_pb2.ProcessBundleDescriptor
+               data_input,  # type: Dict[str, _ListBuffer]
+               data_output,  # type: DataOutput
+               get_buffer,  # type: Callable[[bytes], Any]
+               get_input_coder_impl,  # type: Callable[[str], CoderImpl]
+               input_for  # type: Callable[[str, str], str]
+              ):
+    # type: (...) -> None
+    self.worker_handler_list = worker_handler_list
+    self.context = context
+    self.process_bundle_descriptor = process_bundle_descriptor
+    self.data_input = data_input
+    self.data_output = data_output
+    self.get_buffer = get_buffer
+    self.get_input_coder_impl = get_input_coder_impl
+    self.input_for = input_for
+
+
 class FnApiRunner(runner.PipelineRunner):
 
   def __init__(
@@ -394,7 +629,9 @@ class FnApiRunner(runner.PipelineRunner):
       bundle_repeat=0,
       use_state_iterables=False,
       provision_info=None,  # type: Optional[ExtendedProvisionInfo]
-      progress_request_frequency=None):
+      progress_request_frequency=None,
+      grouping_buffer_bytes=None,
+      max_parallel_stages=1):
     # type: (...) -> None
     """Creates a new Fn API Runner.
 
@@ -407,15 +644,24 @@ class FnApiRunner(runner.PipelineRunner):
       provision_info: provisioning info to make available to workers, or None
       progress_request_frequency: The frequency (in seconds) that the runner
           waits before requesting progress from the SDK.
+      grouping_buffer_bytes: the approximate number of bytes each GroupByKey
+          buffers in memory before spilling sorted runs to local temporary
+          files, or None to keep all grouped data in memory
+      max_parallel_stages: the maximum number of stages without a data
+          dependency on each other to execute concurrently in batch mode
     """
     super(FnApiRunner, self).__init__()
     self._last_uid = -1
+    self._uid_lock = threading.Lock()
     self._default_environment = (
         default_environment
         or environments.EmbeddedPythonEnvironment())
     self._bundle_repeat = bundle_repeat
     self._num_workers = 1
     self._progress_frequency = progress_request_frequency
+    self._grouping_buffer_bytes = grouping_buffer_bytes
+    self._max_parallel_stages = max_parallel_stages
+    self._streaming = False
     self._profiler_factory = None  # type: Optional[Callable[..., profiler.Profile]]
     self._use_state_iterables = use_state_iterables
     self._provision_info = provision_info or ExtendedProvisionInfo(
@@ -425,8 +671,10 @@ class FnApiRunner(runner.PipelineRunner):
             retrieval_token='unused-retrieval-token'))
 
   def _next_uid(self):
-    self._last_uid += 1
-    return str(self._last_uid)
+    # Stages may be prepared concurrently, see _run_stages_concurrently.
+    with self._uid_lock:
+      self._last_uid += 1
+      return str(self._last_uid)
 
   def run_pipeline(self,
                    pipeline,  # type: Pipeline
@@ -452,6 +700,14 @@ class FnApiRunner(runner.PipelineRunner):
         pipeline_options.DirectOptions).direct_runner_bundle_repeat
     self._num_workers = options.view_as(
         pipeline_options.DirectOptions).direct_num_workers or self._num_workers
+    self._grouping_buffer_bytes = options.view_as(
+        pipeline_options.DirectOptions).direct_runner_grouping_buffer_bytes or (
+            self._grouping_buffer_bytes)
+    self._max_parallel_stages = options.view_as(
+        pipeline_options.DirectOptions).direct_runner_max_parallel_stages or (
+            self._max_parallel_stages)
+    self._streaming = options.view_as(
+        pipeline_options.StandardOptions).streaming
 
     # set direct workers running mode if it is defined with pipeline options.
     running_mode = \
@@ -475,8 +731,10 @@ class FnApiRunner(runner.PipelineRunner):
   def run_via_runner_api(self, pipeline_proto):
     # type: (beam_runner_api_pb2.Pipeline) -> RunnerResult
     stage_context, stages = self.create_stages(pipeline_proto)
-    # TODO(pabloem, BEAM-7514): Create a watermark manager (that has access to
-    #   the teststream (if any), and all the stages).
+    # TODO(pabloem, BEAM-7514): Give the watermark manager access to the
+    #   teststream (if any).
+    if self._streaming:
+      return self.run_stages_streaming(stage_context, stages)
     return self.run_stages(stage_context, stages)
 
   @contextlib.contextmanager
@@ -552,6 +810,8 @@ class FnApiRunner(runner.PipelineRunner):
       stage_context (fn_api_runner_transforms.TransformContext)
       stages (list[fn_api_runner_transforms.Stage])
     """
+    if self._max_parallel_stages > 1:
+      return self._run_stages_concurrently(stage_context, stages)
     worker_handler_manager = WorkerHandlerManager(
         stage_context.components.environments, self._provision_info)
     metrics_by_stage = {}
@@ -575,6 +835,103 @@ class FnApiRunner(runner.PipelineRunner):
     return RunnerResult(
         runner.PipelineState.DONE, monitoring_infos_by_stage, metrics_by_stage)
 
+  def _run_stages_concurrently(self,
+                               stage_context,  # type: fn_api_runner_transforms.TransformContext
+                               stages  # type: List[fn_api_runner_transforms.Stage]
+                              ):
+    # type: (...) -> RunnerResult
+    """Run a list of stages in batch mode, executing independent stages
+    concurrently.
+
+    A stage is started as soon as all stages it depends on have finished, up
+    to ``max_parallel_stages`` stages at a time. Concurrently executing stages
+    never share a worker: each one leases its own ``WorkerHandlerManager`` for
+    the duration of the stage.
+    """
+    dependencies = fn_api_runner_transforms.stage_dependencies(stages)
+    worker_handler_managers = [
+        WorkerHandlerManager(
+            stage_context.components.environments, self._provision_info)
+        for _ in range(self._max_parallel_stages)]
+    idle_managers = queue.Queue()  # type: queue.Queue[WorkerHandlerManager]
+    for worker_handler_manager in worker_handler_managers:
+      idle_managers.put(worker_handler_manager)
+    metrics_by_stage = {}
+    monitoring_infos_by_stage = {}
+    pcoll_buffers = collections.defaultdict(_ListBuffer)  # type: DefaultDict[bytes, _ListBuffer]
+
+    def run_stage(stage):
+      # type: (fn_api_runner_transforms.Stage) -> beam_fn_api_pb2.InstructionResponse
+      worker_handler_manager = idle_managers.get()
+      try:
+        return self._run_stage(
+            worker_handler_manager.get_worker_handlers,
+            stage_context.components,
+            stage,
+            pcoll_buffers,
+            stage_context.safe_coders)
+      finally:
+        idle_managers.put(worker_handler_manager)
+
+    try:
+      with self.maybe_profile(), UnboundedThreadPoolExecutor() as executor:
+        pending = list(stages)
+        finished = set()  # type: Set[str]
+        running = {}  # type: Dict[futures.Future, fn_api_runner_transforms.Stage]
+        while pending or running:
+          for stage in list(pending):
+            if len(running) >= self._max_parallel_stages:
+              break
+            if dependencies[stage.name] <= finished:
+              pending.remove(stage)
+              running[executor.submit(run_stage, stage)] = stage
+          if not running:
+            raise RuntimeError(
+                'Stages %s have unsatisfiable dependencies.'
+                % [stage.name for stage in pending])
+          done, _ = futures.wait(
+              list(running), return_when=futures.FIRST_COMPLETED)
+          for future in done:
+            stage = running.pop(future)
+            stage_results = future.result()
+            metrics_by_stage[stage.name] = stage_results.process_bundle.metrics
+            monitoring_infos_by_stage[stage.name] = (
+                stage_results.process_bundle.monitoring_infos)
+            finished.add(stage.name)
+    finally:
+      for worker_handler_manager in worker_handler_managers:
+        worker_handler_manager.close_all()
+    return RunnerResult(
+        runner.PipelineState.DONE, monitoring_infos_by_stage, metrics_by_stage)
+
+  def run_stages_streaming(self,
+                           stage_context,  # type: fn_api_runner_transforms.TransformContext
+                           stages  # type: List[fn_api_runner_transforms.Stage]
+                          ):
+    # type: (...) -> RunnerResult
+    """Run a list of topologically-sorted stages in streaming mode.
+
+    All stages are kept live and process their input incrementally, as it is
+    produced, with grouped data and timers being released by the watermarks.
+
+    Args:
+      stage_context (fn_api_runner_transforms.TransformContext)
+      stages (list[fn_api_runner_transforms.Stage])
+    """
+    worker_handler_manager = WorkerHandlerManager(
+        stage_context.components.environments, self._provision_info)
+    executor = _StreamingExecutor(
+        self, worker_handler_manager.get_worker_handlers, stage_context, stages)
+    try:
+      with self.maybe_profile():
+        executor.run()
+    finally:
+      worker_handler_manager.close_all()
+    return RunnerResult(
+        runner.PipelineState.DONE,
+        executor.monitoring_infos_by_stage,
+        executor.metrics_by_stage)
+
   def _store_side_inputs_in_state(self,
                                   worker_handler,  # type: WorkerHandler
                                   context,  # type: pipeline_context.PipelineContext
@@ -763,15 +1120,19 @@ class FnApiRunner(runner.PipelineRunner):
               create_buffer_id(transform.inputs[tag]), si.access_pattern)
     return data_input, data_side_input, data_output
 
-  def _run_stage(self,
-                 worker_handler_factory,  # type: Callable[[Optional[str], int], List[WorkerHandler]]
-                 pipeline_components,  # type: beam_runner_api_pb2.Components
-                 stage,  # type: fn_api_runner_transforms.Stage
-                 pcoll_buffers,  # type: DefaultDict[bytes, _ListBuffer]
-                 safe_coders
-                ):
-    # type: (...) -> beam_fn_api_pb2.InstructionResponse
-    """Run an individual stage.
+  def _prepare_stage(self,
+                     worker_handler_factory,  # type: Callable[[Optional[str], int], List[WorkerHandler]]
+                     pipeline_components,  # type: beam_runner_api_pb2.Components
+                     stage,  # type: fn_api_runner_transforms.Stage
+                     pcoll_buffers,  # type: DefaultDict[bytes, _ListBuffer]
+                     safe_coders,
+                     grouping_buffer_bytes=None  # type: Optional[int]
+                    ):
+    # type: (...) -> _PreparedStage
+    """Sets up an individual stage for processing bundles.
+
+    This builds the stage's process bundle descriptor, stores its side inputs
+    into state and resolves its input and output buffers.
 
     Args:
       worker_handler_factory: A ``callable`` that takes in an environment id
@@ -782,6 +1143,8 @@ class FnApiRunner(runner.PipelineRunner):
         PCollection IDs to list that functions as buffer for the
         ``beam.PCollection``.
       safe_coders (dict): TODO
+      grouping_buffer_bytes: the byte budget of newly created grouping
+        buffers, see ``_GroupingBuffer``.
     """
     def iterable_state_write(values, element_coder_impl):
       # type: (...) -> bytes
@@ -859,7 +1222,8 @@ class FnApiRunner(runner.PipelineRunner):
               pipeline_components
               .pcollections[output_pcoll].windowing_strategy_id]
           pcoll_buffers[buffer_id] = _GroupingBuffer(
-              pre_gbk_coder, post_gbk_coder, windowing_strategy)
+              pre_gbk_coder, post_gbk_coder, windowing_strategy,
+              max_bytes=grouping_buffer_bytes)
       else:
         # These should be the only two identifiers we produce for now,
         # but special side input writes may go here.
@@ -867,11 +1231,59 @@ class FnApiRunner(runner.PipelineRunner):
       return pcoll_buffers[buffer_id]
 
     def get_input_coder_impl(transform_id):
-      return context.coders[safe_coders[
-          beam_fn_api_pb2.RemoteGrpcPort.FromString(
-              process_bundle_descriptor.transforms[transform_id].spec.payload
-          ).coder_id
-      ]].get_impl()
+      coder_id = beam_fn_api_pb2.RemoteGrpcPort.FromString(
+          process_bundle_descriptor.transforms[transform_id].spec.payload
+      ).coder_id
+      # The coders of some inputs, e.g. those of flattens, are used as they are
+      # by the data channel and have no safe counterpart.
+      return context.coders[safe_coders.get(coder_id, coder_id)].get_impl()
+
+    def input_for(transform_id, input_id):
+      # type: (str, str) -> str
+      input_pcoll = process_bundle_descriptor.transforms[
+          transform_id].inputs[input_id]
+      for read_id, proto in process_bundle_descriptor.transforms.items():
+        if (proto.spec.urn == bundle_processor.DATA_INPUT_URN
+            and input_pcoll in proto.outputs.values()):
+          return read_id
+      raise RuntimeError(
+          'No IO transform feeds %s' % transform_id)
+
+    return _PreparedStage(
+        worker_handler_list, context, process_bundle_descriptor, data_input,
+        data_output, get_buffer, get_input_coder_impl, input_for)
+
+  def _run_stage(self,
+                 worker_handler_factory,  # type: Callable[[Optional[str], int], List[WorkerHandler]]
+                 pipeline_components,  # type: beam_runner_api_pb2.Components
+                 stage,  # type: fn_api_runner_transforms.Stage
+                 pcoll_buffers,  # type: DefaultDict[bytes, _ListBuffer]
+                 safe_coders
+                ):
+    # type: (...) -> beam_fn_api_pb2.InstructionResponse
+    """Run an individual stage.
+
+    Args:
+      worker_handler_factory: A ``callable`` that takes in an environment id
+        and a number of workers, and returns a list of ``WorkerHandler``s.
+      pipeline_components (beam_runner_api_pb2.Components): TODO
+      stage (fn_api_runner_transforms.Stage)
+      pcoll_buffers (collections.defaultdict of str: list): Mapping of
+        PCollection IDs to list that functions as buffer for the
+        ``beam.PCollection``.
+      safe_coders (dict): TODO
+    """
+    prepared = self._prepare_stage(
+        worker_handler_factory, pipeline_components, stage, pcoll_buffers,
+        safe_coders, self._grouping_buffer_bytes)
+    worker_handler_list = prepared.worker_handler_list
+    context = prepared.context
+    process_bundle_descriptor = prepared.process_bundle_descriptor
+    data_input = prepared.data_input
+    data_output = prepared.data_output
+    get_buffer = prepared.get_buffer
+    get_input_coder_impl = prepared.get_input_coder_impl
+    input_for = prepared.input_for
 
     # Change cache token across bundle repeats
     cache_token_generator = FnApiRunner.get_cache_token_generator(static=False)
@@ -888,17 +1300,6 @@ class FnApiRunner(runner.PipelineRunner):
 
     result, splits = bundle_manager.process_bundle(data_input, data_output)
 
-    def input_for(transform_id, input_id):
-      # type: (str, str) -> str
-      input_pcoll = process_bundle_descriptor.transforms[
-          transform_id].inputs[input_id]
-      for read_id, proto in process_bundle_descriptor.transforms.items():
-        if (proto.spec.urn == bundle_processor.DATA_INPUT_URN
-            and input_pcoll in proto.outputs.values()):
-          return read_id
-      raise RuntimeError(
-          'No IO transform feeds %s' % transform_id)
-
     last_result = result
     last_sent = data_input
 
@@ -1865,6 +2266,7 @@ class BundleManager(object):
     self._registered = skip_registration
     self._progress_frequency = progress_frequency
     self._worker_handler = None  # type: Optional[WorkerHandler]
+    self._process_bundle_id = None  # type: Optional[str]
     self._cache_token_generator = cache_token_generator
 
   def _send_input_to_worker(self,
@@ -1978,6 +2380,7 @@ class BundleManager(object):
       process_bundle_id = 'bundle_%s' % BundleManager._uid_counter
       self._worker_handler = self._worker_handler_list[
           BundleManager._uid_counter % len(self._worker_handler_list)]
+      self._process_bundle_id = process_bundle_id
 
     # Register the bundle descriptor, if needed - noop if already registered.
     registration_future = self._register_bundle_descriptor()
@@ -2009,15 +2412,16 @@ class BundleManager(object):
             split_manager, inputs, process_bundle_id)
 
       # Gather all output data.
-      for output in self._worker_handler.data_conn.input_elements(
-          process_bundle_id,
-          expected_outputs.keys(),
-          abort_callback=lambda: (result_future.is_done()
-                                  and result_future.get().error)):
-        if output.transform_id in expected_outputs:
+      for transform_id, payload in (
+          self._worker_handler.data_conn.input_payloads(
+              process_bundle_id,
+              expected_outputs.keys(),
+              abort_callback=lambda: (result_future.is_done()
+                                      and result_future.get().error))):
+        if transform_id in expected_outputs:
           with BundleManager._lock:
             self._get_buffer(
-                expected_outputs[output.transform_id]).append(output.data)
+                expected_outputs[transform_id]).append(payload)
 
       _LOGGER.debug('Wait for the bundle %s to finish.' % process_bundle_id)
       result = result_future.get()  # type: beam_fn_api_pb2.InstructionResponse
@@ -2036,7 +2440,47 @@ class BundleManager(object):
     return result, split_results
 
 
+class _BundlePart(object):
+  """A part of a bundle that is being processed by a single worker.
+
+  Only parts that have a single non-empty input held in memory can be split
+  to let idle workers steal their remaining elements.
+  """
+  def __init__(self,
+               bundle_manager,  # type: BundleManager
+               worker_handler,  # type: WorkerHandler
+               inputs  # type: Mapping[str, List[bytes]]
+              ):
+    # type: (...) -> None
+    self.bundle_manager = bundle_manager
+    self.worker_handler = worker_handler
+    self.inputs = inputs
+    non_empty = [name for name, data in inputs.items() if data]
+    if len(non_empty) == 1 and isinstance(inputs[non_empty[0]], list):
+      self.transform_id = non_empty[0]  # type: Optional[str]
+      self.remaining_bytes = sum(
+          len(chunk) for chunk in inputs[self.transform_id])
+    else:
+      self.transform_id = None
+      self.remaining_bytes = 0
+    self.elements = None  # type: Optional[List[Any]]
+    self.stop = None  # type: Optional[int]
+
+
 class ParallelBundleManager(BundleManager):
+  """Processes a bundle by partitioning its input across several workers.
+
+  Inputs are partitioned into parts of roughly equal byte size. Whenever a
+  worker finishes its part while others are still running, it steals work
+  from the straggler with the most remaining input: the straggler is asked to
+  split its bundle through a ``ProcessBundleSplitRequest``, and the residual
+  elements are processed on the idle worker.
+  """
+
+  # Fraction of a straggler's remaining input it keeps when work is stolen.
+  _STEAL_FRACTION_OF_REMAINDER = 0.5
+  # Seconds to wait before retrying a steal when no straggler could be split.
+  _STEAL_RETRY_INTERVAL = 0.1
 
   def __init__(
       self,
@@ -2065,6 +2509,10 @@ class ParallelBundleManager(BundleManager):
       for ix, part in enumerate(input.partition(self._num_workers)):
         part_inputs[ix][name] = part
 
+    if self._num_workers > 1 and not self._select_split_manager():
+      return self._process_parts_with_work_stealing(
+          part_inputs, expected_outputs)
+
     merged_result = None  # type: Optional[beam_fn_api_pb2.InstructionResponse]
     split_result_list = []  # type: List[beam_fn_api_pb2.ProcessBundleSplitResponse]
     with UnboundedThreadPoolExecutor() as executor:
@@ -2076,19 +2524,461 @@ class ParallelBundleManager(BundleManager):
               part, expected_outputs), part_inputs):
 
         split_result_list += split_result
-        if merged_result is None:
-          merged_result = result
-        else:
-          merged_result = beam_fn_api_pb2.InstructionResponse(
-              process_bundle=beam_fn_api_pb2.ProcessBundleResponse(
-                  monitoring_infos=monitoring_infos.consolidate(
-                      itertools.chain(
-                          result.process_bundle.monitoring_infos,
-                          merged_result.process_bundle.monitoring_infos))),
-              error=result.error or merged_result.error)
+        merged_result = self._merge_results(merged_result, result)
 
     return merged_result, split_result_list
 
+  @staticmethod
+  def _merge_results(merged_result,  # type: Optional[beam_fn_api_pb2.InstructionResponse]
+                     result  # type: beam_fn_api_pb2.InstructionResponse
+                    ):
+    # type: (...) -> beam_fn_api_pb2.InstructionResponse
+    if merged_result is None:
+      return result
+    return beam_fn_api_pb2.InstructionResponse(
+        process_bundle=beam_fn_api_pb2.ProcessBundleResponse(
+            monitoring_infos=monitoring_infos.consolidate(
+                itertools.chain(
+                    result.process_bundle.monitoring_infos,
+                    merged_result.process_bundle.monitoring_infos))),
+        error=result.error or merged_result.error)
+
+  def _process_parts_with_work_stealing(
+      self,
+      part_inputs,  # type: List[Dict[str, List[bytes]]]
+      expected_outputs  # type: DataOutput
+  ):
+    # type: (...) -> BundleProcessResult
+    merged_result = None  # type: Optional[beam_fn_api_pb2.InstructionResponse]
+    split_result_list = []  # type: List[beam_fn_api_pb2.ProcessBundleSplitResponse]
+    running = {}  # type: Dict[futures.Future, _BundlePart]
+    idle_workers = []  # type: List[WorkerHandler]
+
+    with UnboundedThreadPoolExecutor() as executor:
+
+      def submit(worker_handler, inputs):
+        bundle_manager = BundleManager(
+            [worker_handler], self._get_buffer, self._get_input_coder_impl,
+            self._bundle_descriptor, self._progress_frequency,
+            self._registered,
+            cache_token_generator=self._cache_token_generator)
+        running[executor.submit(
+            bundle_manager.process_bundle, inputs, expected_outputs)] = (
+                _BundlePart(bundle_manager, worker_handler, inputs))
+
+      for ix, inputs in enumerate(part_inputs):
+        submit(self._worker_handler_list[
+            ix % len(self._worker_handler_list)], inputs)
+
+      while running:
+        # Only poll while there are idle workers and stragglers to steal from.
+        stealable = idle_workers and any(
+            part.transform_id for part in running.values())
+        done, _ = futures.wait(
+            list(running),
+            timeout=self._STEAL_RETRY_INTERVAL if stealable else None,
+            return_when=futures.FIRST_COMPLETED)
+        for future in done:
+          idle_workers.append(running.pop(future).worker_handler)
+          result, split_result = future.result()
+          split_result_list += split_result
+          merged_result = self._merge_results(merged_result, result)
+
+        while idle_workers:
+          candidates = sorted(
+              (part for part in running.values() if part.transform_id),
+              key=lambda part: part.remaining_bytes, reverse=True)
+          for part in candidates:
+            stolen_inputs = self._steal_from(part, split_result_list)
+            if stolen_inputs:
+              submit(idle_workers.pop(), stolen_inputs)
+              break
+          else:
+            break
+
+    return merged_result, split_result_list
+
+  def _steal_from(self,
+                  part,  # type: _BundlePart
+                  split_result_list  # type: List[beam_fn_api_pb2.ProcessBundleSplitResponse]
+                 ):
+    # type: (...) -> Optional[Dict[str, List[bytes]]]
+    """Splits a running part, returning the inputs for its residual, if any.
+
+    Residual roots of the split, i.e. the unprocessed remainder of a partially
+    processed element, are added to split_result_list to be deferred by the
+    runner.
+    """
+    process_bundle_id = part.bundle_manager._process_bundle_id
+    if process_bundle_id is None:
+      # The bundle has not started yet.
+      return None
+    coder_impl = self._get_input_coder_impl(part.transform_id)
+    if part.elements is None:
+      part.elements = list(coder_impl.decode_all(
+          b''.join(part.inputs[part.transform_id])))
+      part.stop = len(part.elements)
+    split_request = beam_fn_api_pb2.InstructionRequest(
+        process_bundle_split=beam_fn_api_pb2.ProcessBundleSplitRequest(
+            instruction_id=process_bundle_id,
+            desired_splits={
+                part.transform_id:
+                beam_fn_api_pb2.ProcessBundleSplitRequest.DesiredSplit(
+                    fraction_of_remainder=self._STEAL_FRACTION_OF_REMAINDER,
+                    estimated_input_elements=part.stop)
+            }))
+    split_response = part.worker_handler.control_conn.push(
+        split_request).get()  # type: beam_fn_api_pb2.InstructionResponse
+    if split_response.error:
+      # Either not started yet or already finished.
+      return None
+    split = split_response.process_bundle_split
+    if split.residual_roots:
+      split_result_list.append(beam_fn_api_pb2.ProcessBundleSplitResponse(
+          residual_roots=split.residual_roots))
+    residual_elements = []  # type: List[Any]
+    for channel_split in split.channel_splits:
+      if channel_split.transform_id == part.transform_id:
+        residual_elements = part.elements[
+            channel_split.first_residual_element:part.stop]
+        part.remaining_bytes = (
+            part.remaining_bytes * (channel_split.last_primary_element + 1)
+            // max(part.stop, 1))
+        part.stop = channel_split.last_primary_element + 1
+    if not residual_elements:
+      return None
+    # The worker waits for every input, so the other inputs are sent empty.
+    stolen_inputs = {
+        name: _ListBuffer() for name in part.inputs
+    }  # type: Dict[str, List[bytes]]
+    stolen_inputs[part.transform_id] = _ListBuffer(
+        [coder_impl.encode_all(residual_elements)])
+    return stolen_inputs
+
+
+class _StreamingExecutor(object):
+  """Executes a list of topologically-sorted stages in streaming mode.
+
+  Rather than running each stage once over all of its input, stages are kept
+  live: every pass over the stages runs one bundle for each stage that has new
+  input, i.e. data written by its producers since its last bundle, timers that
+  are eligible to fire, or deferred residuals whose requested delay has
+  elapsed. A ``WatermarkManager`` tracks the progress of every buffer. Grouped
+  data and event time timers are released as the watermark passes them, and
+  execution ends once every watermark has reached ``MAX_TIMESTAMP``.
+
+  Stages with side inputs only start once their side inputs are complete.
+  Each bundle is processed by a single worker.
+  """
+
+  def __init__(self,
+               runner,  # type: FnApiRunner
+               worker_handler_factory,  # type: Callable[[Optional[str], int], List[WorkerHandler]]
+               stage_context,  # type: fn_api_runner_transforms.TransformContext
+               stages  # type: List[fn_api_runner_transforms.Stage]
+              ):
+    # type: (...) -> None
+    self._runner = runner
+    self._worker_handler_factory = worker_handler_factory
+    self._components = stage_context.components
+    self._safe_coders = stage_context.safe_coders
+    self._stages = stages
+    self._watermarks = fn_api_runner_watermarks.WatermarkManager(stages)
+    self._pcoll_buffers = collections.defaultdict(_ListBuffer)  # type: DefaultDict[bytes, Any]
+    self._prepared = {}  # type: Dict[str, _PreparedStage]
+    self._bundle_managers = {}  # type: Dict[str, BundleManager]
+    # The buffer read by each data input transform, by stage. These must be
+    # captured before the stages are prepared, which rewrites their payloads.
+    self._read_buffer_ids = {
+        stage.name: {
+            transform.unique_name: transform.spec.payload
+            for transform in stage.transforms
+            if transform.spec.urn == bundle_processor.DATA_INPUT_URN}
+        for stage in stages}  # type: Dict[str, Dict[str, bytes]]
+    # The number of chunks of each materialized buffer already read, keyed by
+    # (stage name, buffer id).
+    self._read_positions = collections.defaultdict(int)  # type: DefaultDict[Tuple[str, bytes], int]
+    self._pending_impulses = set(
+        stage.name for stage in stages
+        if fn_api_runner_transforms.IMPULSE_BUFFER
+        in self._read_buffer_ids[stage.name].values())
+    # Deferred residuals of each stage, as tuples of (data input transform id,
+    # encoded element, watermark hold, earliest processing time).
+    self._residuals = collections.defaultdict(list)  # type: DefaultDict[str, List[Tuple[str, bytes, timestamp.Timestamp, float]]]
+    # Unfired timers of each stage, keyed by (data input transform id, key,
+    # window) and holding (windowed timer, watermark hold).
+    self._timers = collections.defaultdict(dict)  # type: DefaultDict[str, Dict[Tuple[str, Any, BoundedWindow], Tuple[windowed_value.WindowedValue, timestamp.Timestamp]]]
+    self._processing_time_timer_inputs = set()  # type: Set[str]
+    for stage in stages:
+      for transform in stage.transforms:
+        if transform.spec.urn in fn_api_runner_transforms.PAR_DO_URNS:
+          payload = proto_utils.parse_Bytes(
+              transform.spec.payload, beam_runner_api_pb2.ParDoPayload)
+          for tag, spec in payload.timer_specs.items():
+            if (spec.time_domain
+                == beam_runner_api_pb2.TimeDomain.PROCESSING_TIME):
+              self._processing_time_timer_inputs.add(
+                  self._producer_of(stage, transform.inputs[tag]))
+    self.monitoring_infos_by_stage = {}  # type: Dict[str, List[metrics_pb2.MonitoringInfo]]
+    self.metrics_by_stage = {}  # type: Dict[str, beam_fn_api_pb2.Metrics]
+
+  @staticmethod
+  def _producer_of(stage, pcoll_id):
+    # type: (fn_api_runner_transforms.Stage, str) -> str
+    return only_element(
+        transform.unique_name for transform in stage.transforms
+        if pcoll_id in transform.outputs.values())
+
+  def run(self):
+    # type: () -> None
+    for stage_name in self._pending_impulses:
+      self._watermarks.set_hold(stage_name, timestamp.MIN_TIMESTAMP)
+    self._watermarks.update()
+    while True:
+      processed_any = False
+      for stage in self._stages:
+        if self._process_stage(stage):
+          processed_any = True
+          # Let downstream stages see the new watermarks in this same pass.
+          self._watermarks.update()
+      self._release_read_chunks()
+      if processed_any:
+        continue
+      if self._watermarks.is_done():
+        break
+      wait_secs = self._time_until_next_wakeup()
+      if wait_secs is None:
+        raise RuntimeError(
+            'Streaming execution is blocked with no pending work; '
+            'watermarks can no longer advance.')
+      time.sleep(wait_secs)
+
+  def _prepare(self, stage):
+    # type: (fn_api_runner_transforms.Stage) -> _PreparedStage
+    # Grouped data is read incrementally, which spilling does not support.
+    prepared = self._runner._prepare_stage(
+        self._worker_handler_factory, self._components, stage,
+        self._pcoll_buffers, self._safe_coders, grouping_buffer_bytes=None)
+    self._prepared[stage.name] = prepared
+    # The descriptor is registered with the first worker only, which then
+    # processes all bundles of the stage.
+    self._bundle_managers[stage.name] = BundleManager(
+        prepared.worker_handler_list[:1], prepared.get_buffer,
+        prepared.get_input_coder_impl, prepared.process_bundle_descriptor,
+        self._runner._progress_frequency,
+        cache_token_generator=FnApiRunner.get_cache_token_generator(
+            static=False))
+    return prepared
+
+  def _process_stage(self, stage):
+    # type: (fn_api_runner_transforms.Stage) -> bool
+    """Runs a bundle over the new input of the stage, if there is any."""
+    if not self._watermarks.side_inputs_ready(stage.name):
+      # The stage may not read its main input yet, so it must hold back its
+      # output watermark until it does.
+      self._watermarks.set_hold(stage.name, self._watermark_hold(stage))
+      self._watermarks.update()
+      return False
+    prepared = self._prepared.get(stage.name) or self._prepare(stage)
+    inputs = self._collect_inputs(stage)
+    if not any(inputs.values()):
+      return False
+
+    result, splits = self._bundle_managers[stage.name].process_bundle(
+        inputs, prepared.data_output)
+    self.metrics_by_stage[stage.name] = result.process_bundle.metrics
+    self.monitoring_infos_by_stage[stage.name] = list(
+        monitoring_infos.consolidate(itertools.chain(
+            self.monitoring_infos_by_stage.get(stage.name, []),
+            result.process_bundle.monitoring_infos)))
+
+    now = time.time()
+    for delayed_application in result.process_bundle.residual_roots:
+      application = delayed_application.application
+      if application.output_watermarks:
+        hold = min(timestamp.Timestamp.from_proto(watermark)
+                   for watermark in application.output_watermarks.values())
+      else:
+        hold = timestamp.MIN_TIMESTAMP
+      delay = timestamp.Duration.from_proto(
+          delayed_application.requested_time_delay)
+      self._residuals[stage.name].append((
+          prepared.input_for(application.transform_id, application.input_id),
+          application.element,
+          hold,
+          now + float(delay)))
+    split_residuals = collections.defaultdict(_ListBuffer)  # type: DefaultDict[str, _ListBuffer]
+    self._runner._add_residuals_and_channel_splits_to_deferred_inputs(
+        splits, prepared.get_input_coder_impl, prepared.input_for, inputs,
+        split_residuals)
+    for read_id, elements in split_residuals.items():
+      self._residuals[stage.name].extend(
+          (read_id, element, timestamp.MIN_TIMESTAMP, now)
+          for element in elements)
+
+    self._collect_written_timers(stage, prepared)
+    self._watermarks.set_hold(stage.name, self._watermark_hold(stage))
+    return True
+
+  def _collect_inputs(self, stage):
+    # type: (fn_api_runner_transforms.Stage) -> Dict[str, _ListBuffer]
+    """Returns the data to send to each data input of the stage's next bundle.
+    """
+    inputs = {}  # type: Dict[str, _ListBuffer]
+    for read_id, buffer_id in self._read_buffer_ids[stage.name].items():
+      if buffer_id == fn_api_runner_transforms.IMPULSE_BUFFER:
+        if stage.name in self._pending_impulses:
+          self._pending_impulses.remove(stage.name)
+          inputs[read_id] = _ListBuffer([ENCODED_IMPULSE_VALUE])
+        else:
+          inputs[read_id] = _ListBuffer()
+        continue
+      kind, _ = split_buffer_id(buffer_id)
+      if kind == 'timers':
+        inputs[read_id] = self._fire_timers(stage, read_id)
+      elif kind == 'group':
+        if buffer_id in self._pcoll_buffers:
+          inputs[read_id] = _ListBuffer(
+              self._pcoll_buffers[buffer_id].extract_ready(
+                  self._watermarks.buffer_watermark(buffer_id)))
+        else:
+          inputs[read_id] = _ListBuffer()
+      else:
+        buffer = self._pcoll_buffers[buffer_id]
+        position = self._read_positions[stage.name, buffer_id]
+        inputs[read_id] = _ListBuffer(buffer[position:])
+        self._read_positions[stage.name, buffer_id] = len(buffer)
+
+    now = time.time()
+    residuals = self._residuals[stage.name]
+    for residual in [r for r in residuals if r[3] <= now]:
+      residuals.remove(residual)
+      inputs[residual[0]].append(residual[1])
+    return inputs
+
+  def _collect_written_timers(self, stage, prepared):
+    # type: (fn_api_runner_transforms.Stage, _PreparedStage) -> None
+    """Moves the timers set during the last bundle to the pending timers."""
+    input_watermark = self._watermarks.input_watermark(stage.name)
+    pending_timers = self._timers[stage.name]
+    for read_id, timer_writes in stage.timer_pcollections:
+      windowed_timer_coder_impl = prepared.context.coders[
+          self._components.pcollections[timer_writes].coder_id].get_impl()
+      written_timers = prepared.get_buffer(
+          create_buffer_id(timer_writes, kind='timers'))
+      for elements_data in written_timers:
+        input_stream = create_InputStream(elements_data)
+        while input_stream.size() > 0:
+          windowed_key_timer = windowed_timer_coder_impl.decode_from_stream(
+              input_stream, True)
+          key, timer = windowed_key_timer.value
+          # TODO: Explode and merge windows.
+          assert len(windowed_key_timer.windows) == 1
+          timer_key = read_id, key, windowed_key_timer.windows[0]
+          if timer['timestamp'] > timestamp.MAX_TIMESTAMP:
+            # The timer was cleared.
+            pending_timers.pop(timer_key, None)
+          elif read_id in self._processing_time_timer_inputs:
+            # Hold the output at the watermark the timer was set at.
+            pending_timers[timer_key] = windowed_key_timer, input_watermark
+          else:
+            pending_timers[timer_key] = (
+                windowed_key_timer, timer['timestamp'])
+      written_timers[:] = []
+
+  def _fire_timers(self, stage, read_id):
+    # type: (fn_api_runner_transforms.Stage, str) -> _ListBuffer
+    """Removes and encodes the timers of the given input that are due.
+
+    Event time timers are due once the input watermark of the stage reaches
+    their timestamp; processing time timers once the wall clock does, or once
+    the input watermark reaches ``MAX_TIMESTAMP``.
+    """
+    input_watermark = self._watermarks.input_watermark(stage.name)
+    if read_id in self._processing_time_timer_inputs:
+      fire_until = (timestamp.MAX_TIMESTAMP
+                    if input_watermark >= timestamp.MAX_TIMESTAMP
+                    else timestamp.Timestamp.now())
+    else:
+      fire_until = input_watermark
+    pending_timers = self._timers[stage.name]
+    out = None
+    for timer_key, (windowed_key_timer, _) in list(pending_timers.items()):
+      if (timer_key[0] == read_id
+          and windowed_key_timer.value[1]['timestamp'] <= fire_until):
+        if out is None:
+          out = create_OutputStream()
+          windowed_timer_coder_impl = self._runner_coder_impl(stage, read_id)
+        windowed_timer_coder_impl.encode_to_stream(
+            windowed_key_timer, out, True)
+        del pending_timers[timer_key]
+    return _ListBuffer([out.get()] if out else [])
+
+  def _runner_coder_impl(self, stage, read_id):
+    # type: (fn_api_runner_transforms.Stage, str) -> CoderImpl
+    for timer_read_id, timer_writes in stage.timer_pcollections:
+      if timer_read_id == read_id:
+        return self._prepared[stage.name].context.coders[
+            self._components.pcollections[timer_writes].coder_id].get_impl()
+    raise ValueError('No timers are read by %s' % read_id)
+
+  def _watermark_hold(self, stage):
+    # type: (fn_api_runner_transforms.Stage) -> Optional[timestamp.Timestamp]
+    """Returns the earliest timestamp of the work pending for the stage."""
+    holds = [hold for _, _, hold, _ in self._residuals[stage.name]]
+    holds.extend(hold for _, hold in self._timers[stage.name].values())
+    for buffer_id in self._read_buffer_ids[stage.name].values():
+      if buffer_id == fn_api_runner_transforms.IMPULSE_BUFFER:
+        if stage.name in self._pending_impulses:
+          holds.append(timestamp.MIN_TIMESTAMP)
+        continue
+      kind, _ = split_buffer_id(buffer_id)
+      if kind == 'group' and buffer_id in self._pcoll_buffers:
+        buffer_hold = self._pcoll_buffers[buffer_id].watermark_hold()
+        if buffer_hold is not None:
+          holds.append(buffer_hold)
+      elif kind == 'materialize' and (
+          self._read_positions[stage.name, buffer_id]
+          < len(self._pcoll_buffers[buffer_id])):
+        holds.append(timestamp.MIN_TIMESTAMP)
+    return min(holds) if holds else None
+
+  def _release_read_chunks(self):
+    # type: () -> None
+    """Drops the chunks of materialized buffers that all readers have read.
+
+    Buffers that are also read as side inputs are kept in full.
+    """
+    side_input_buffers = self._watermarks.side_input_buffers()
+    positions_by_buffer = collections.defaultdict(list)  # type: DefaultDict[bytes, List[int]]
+    for stage_name, read_buffer_ids in self._read_buffer_ids.items():
+      for buffer_id in read_buffer_ids.values():
+        if split_buffer_id(buffer_id)[0] == 'materialize':
+          positions_by_buffer[buffer_id].append(
+              self._read_positions[stage_name, buffer_id])
+    for buffer_id, positions in positions_by_buffer.items():
+      released = min(positions)
+      if released and buffer_id not in side_input_buffers:
+        del self._pcoll_buffers[buffer_id][:released]
+        for stage_name, read_buffer_ids in self._read_buffer_ids.items():
+          if buffer_id in read_buffer_ids.values():
+            self._read_positions[stage_name, buffer_id] -= released
+
+  def _time_until_next_wakeup(self):
+    # type: () -> Optional[float]
+    """Returns the seconds until a deferred residual or timer becomes due."""
+    wakeups = [ready_at
+               for residuals in self._residuals.values()
+               for _, _, _, ready_at in residuals]
+    for timers in self._timers.values():
+      wakeups.extend(
+          float(windowed_key_timer.value[1]['timestamp'])
+          for (read_id, _, _), (windowed_key_timer, _) in timers.items()
+          if read_id in self._processing_time_timer_inputs)
+    if not wakeups:
+      return None
+    return max(0, min(wakeups) - time.time())
+
 
 class ProgressRequester(threading.Thread):
   """ Thread that asks SDK Worker for progress reports with a certain frequency.
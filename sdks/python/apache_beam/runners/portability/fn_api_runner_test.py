@@ -38,6 +38,7 @@ from typing import Dict
 # patches unittest.TestCase to be python3 compatible
 import future.tests.base  # pylint: disable=unused-import
 import hamcrest  # pylint: disable=ungrouped-imports
+import mock
 from hamcrest.core.matcher import Matcher
 from hamcrest.core.string_description import StringDescription
 from nose.plugins.attrib import attr
@@ -53,6 +54,8 @@ from apache_beam.metrics.metricbase import MetricName
 from apache_beam.options.pipeline_options import DebugOptions
 from apache_beam.options.pipeline_options import PipelineOptions
 from apache_beam.runners.portability import fn_api_runner
+from apache_beam.runners.portability import fn_api_runner_transforms
+from apache_beam.runners.portability.fn_api_runner_transforms import only_element
 from apache_beam.runners.worker import data_plane
 from apache_beam.runners.worker import sdk_worker
 from apache_beam.runners.worker import statesampler
@@ -66,6 +69,7 @@ from apache_beam.transforms import environments
 from apache_beam.transforms import userstate
 from apache_beam.transforms import window
 from apache_beam.utils import timestamp
+from apache_beam.utils import windowed_value
 
 if statesampler.FAST_SAMPLER:
   DEFAULT_SAMPLING_PERIOD_MS = statesampler.DEFAULT_SAMPLING_PERIOD_MS
@@ -1237,6 +1241,268 @@ class FnApiRunnerTestWithBundleRepeatAndMultiWorkers(FnApiRunnerTest):
     raise unittest.SkipTest("This test is for a single worker only.")
 
 
+class FnApiRunnerTestWithSpillingGroupingBuffer(FnApiRunnerTest):
+
+  def create_pipeline(self):
+    # Spill every appended chunk of grouped data to disk.
+    return beam.Pipeline(
+        runner=fn_api_runner.FnApiRunner(grouping_buffer_bytes=1))
+
+
+class FnApiRunnerTestWithSpillingGroupingBufferAndMultiWorkers(
+    FnApiRunnerTest):
+
+  def create_pipeline(self):
+    pipeline_options = PipelineOptions(direct_num_workers=2,
+                                       direct_runner_grouping_buffer_bytes=1)
+    p = beam.Pipeline(
+        runner=fn_api_runner.FnApiRunner(),
+        options=pipeline_options)
+    #TODO(BEAM-8444): Fix these tests..
+    p.options.view_as(DebugOptions).experiments.remove('beam_fn_api')
+    return p
+
+  def test_metrics(self):
+    raise unittest.SkipTest("This test is for a single worker only.")
+
+  def test_sdf_with_sdf_initiated_checkpointing(self):
+    raise unittest.SkipTest("This test is for a single worker only.")
+
+  def test_sdf_with_watermark_tracking(self):
+    raise unittest.SkipTest("This test is for a single worker only.")
+
+
+class FnApiRunnerTestWithParallelStages(FnApiRunnerTest):
+
+  def create_pipeline(self):
+    return beam.Pipeline(
+        runner=fn_api_runner.FnApiRunner(max_parallel_stages=4))
+
+
+class FnApiRunnerTestWithParallelStagesAndMultiWorkers(FnApiRunnerTest):
+
+  def create_pipeline(self):
+    pipeline_options = PipelineOptions(direct_num_workers=2,
+                                       direct_runner_max_parallel_stages=4)
+    p = beam.Pipeline(
+        runner=fn_api_runner.FnApiRunner(),
+        options=pipeline_options)
+    #TODO(BEAM-8444): Fix these tests..
+    p.options.view_as(DebugOptions).experiments.remove('beam_fn_api')
+    return p
+
+  def test_metrics(self):
+    raise unittest.SkipTest("This test is for a single worker only.")
+
+  def test_sdf_with_sdf_initiated_checkpointing(self):
+    raise unittest.SkipTest("This test is for a single worker only.")
+
+  def test_sdf_with_watermark_tracking(self):
+    raise unittest.SkipTest("This test is for a single worker only.")
+
+
+class FnApiRunnerTestWithStreaming(FnApiRunnerTest):
+
+  def create_pipeline(self):
+    return beam.Pipeline(
+        runner=fn_api_runner.FnApiRunner(),
+        options=PipelineOptions(streaming=True))
+
+  def test_late_ready_side_input_with_windowed_gbk(self):
+
+    class SlowExpandStringsDoFn(beam.DoFn):
+      def process(
+          self,
+          element,
+          restriction_tracker=beam.DoFn.RestrictionParam(
+              ExpandStringsProvider())):
+        cur = restriction_tracker.current_restriction().start
+        if restriction_tracker.try_claim(cur):
+          yield element[cur]
+          restriction_tracker.defer_remainder(timestamp.Duration(seconds=0.1))
+
+    with self.create_pipeline() as p:
+      # The side input is only ready once its deferred residuals ran, long
+      # after the main input of the stage reading it was written.
+      side = (p
+              | 'side' >> beam.Create(['abcdef'])
+              | beam.ParDo(SlowExpandStringsDoFn())
+              | beam.combiners.Count.Globally())
+      with_side_input = (
+          p
+          | 'main' >> beam.Create([('a', 1), ('b', 3), ('a', 11)])
+          | 'MainReshuffle' >> beam.Reshuffle()
+          | 'AddOffset' >> beam.Map(lambda kv, offset: (kv[0], kv[1] + offset),
+                                    beam.pvalue.AsSingleton(side)))
+      without_side_input = (
+          p
+          | 'other' >> beam.Create([('a', 5)])
+          | 'OtherReshuffle' >> beam.Reshuffle())
+      res = ((with_side_input, without_side_input)
+             | beam.Flatten()
+             | beam.Map(lambda kv: window.TimestampedValue(kv, kv[1]))
+             | beam.WindowInto(window.FixedWindows(10))
+             | beam.GroupByKey()
+             | beam.MapTuple(lambda k, values: (k, sorted(values))))
+      # Every window of every key is grouped exactly once, i.e. the data of
+      # the stage waiting for its side input is not treated as late.
+      assert_that(res, equal_to([('a', [5, 7]), ('b', [9]), ('a', [17])]))
+
+
+class ListBufferTest(unittest.TestCase):
+
+  def test_partition_balances_bytes(self):
+    buffer = fn_api_runner._ListBuffer(
+        [b'a' * 10, b'b', b'c' * 5, b'd' * 4, b'e'])
+    self.assertEqual(
+        [[b'a' * 10, b'e'], [b'b', b'c' * 5, b'd' * 4]], buffer.partition(2))
+
+  def test_partition_more_parts_than_chunks(self):
+    buffer = fn_api_runner._ListBuffer([b'a', b'bb'])
+    self.assertEqual([[b'bb'], [b'a'], []], buffer.partition(3))
+
+
+class _SlowOnFirstWorkerDoFn(beam.DoFn):
+  """Outputs the keys of its input slowly, but only on one of the workers."""
+
+  # Shared by reference, as this class is pickled by name.
+  _instances = []
+
+  def setup(self):
+    self._slow = not self._instances
+    self._instances.append(self)
+
+  def process(self, element):
+    if self._slow:
+      time.sleep(0.05)
+    yield element[0]
+
+
+class WorkStealingTest(unittest.TestCase):
+
+  def test_idle_worker_steals_from_straggler(self):
+    steals = []
+    steal_from = fn_api_runner.ParallelBundleManager._steal_from
+
+    def recording_steal_from(self, part, split_result_list):
+      stolen_inputs = steal_from(self, part, split_result_list)
+      if stolen_inputs:
+        steals.append(stolen_inputs)
+      return stolen_inputs
+
+    _SlowOnFirstWorkerDoFn._instances = []
+    with mock.patch.object(fn_api_runner.ParallelBundleManager,
+                           '_steal_from', recording_steal_from):
+      with beam.Pipeline(
+          runner=fn_api_runner.FnApiRunner(),
+          options=PipelineOptions(direct_num_workers=2)) as p:
+        res = (p
+               | beam.Create([(k, k) for k in range(40)])
+               | beam.GroupByKey()
+               | beam.ParDo(_SlowOnFirstWorkerDoFn()))
+        assert_that(res, equal_to(list(range(40))))
+
+    self.assertTrue(steals)
+
+
+class GroupingBufferTest(unittest.TestCase):
+
+  def _encode(self, coder, elements):
+    return coder.get_impl().encode_all(
+        [window.GlobalWindows.windowed_value(e) for e in elements])
+
+  def _decode(self, coder, partitions):
+    return [[(wv.value[0], list(wv.value[1]))
+             for chunk in part
+             for wv in coder.get_impl().decode_all(chunk)]
+            for part in partitions]
+
+  def _grouped(self, max_bytes, num_partitions):
+    pre_gbk_coder = beam.coders.WindowedValueCoder(
+        beam.coders.TupleCoder(
+            [beam.coders.StrUtf8Coder(), beam.coders.VarIntCoder()]))
+    post_gbk_coder = beam.coders.WindowedValueCoder(
+        beam.coders.TupleCoder(
+            [beam.coders.StrUtf8Coder(),
+             beam.coders.IterableCoder(beam.coders.VarIntCoder())]))
+    buffer = fn_api_runner._GroupingBuffer(
+        pre_gbk_coder, post_gbk_coder, core.Windowing(window.GlobalWindows()),
+        max_bytes=max_bytes)
+    buffer.append(self._encode(pre_gbk_coder, [('b', 1), ('a', 2)]))
+    buffer.append(self._encode(pre_gbk_coder, [('c', 3), ('b', 4)]))
+    buffer.append(self._encode(pre_gbk_coder, [('a', 5)]))
+    return self._decode(post_gbk_coder, buffer.partition(num_partitions))
+
+  def test_spilled_runs_are_merged(self):
+    self.assertEqual(
+        [[('a', [2, 5]), ('b', [1, 4]), ('c', [3])]],
+        self._grouped(max_bytes=1, num_partitions=1))
+
+  def test_spilled_partitions(self):
+    partitions = self._grouped(max_bytes=1, num_partitions=2)
+    self.assertEqual(
+        [[('a', [2, 5]), ('c', [3])], [('b', [1, 4])]], partitions)
+
+  def test_spilling_matches_in_memory(self):
+    self.assertEqual(
+        sorted(sum(self._grouped(max_bytes=None, num_partitions=1), [])),
+        sorted(sum(self._grouped(max_bytes=1 << 20, num_partitions=1), [])))
+    self.assertEqual(
+        sorted(sum(self._grouped(max_bytes=None, num_partitions=1), [])),
+        sorted(sum(self._grouped(max_bytes=1, num_partitions=1), [])))
+
+  def test_extract_ready(self):
+    window_coder = beam.coders.coders.IntervalWindowCoder()
+    pre_gbk_coder = beam.coders.WindowedValueCoder(
+        beam.coders.TupleCoder(
+            [beam.coders.StrUtf8Coder(), beam.coders.VarIntCoder()]),
+        window_coder)
+    post_gbk_coder = beam.coders.WindowedValueCoder(
+        beam.coders.TupleCoder(
+            [beam.coders.StrUtf8Coder(),
+             beam.coders.IterableCoder(beam.coders.VarIntCoder())]),
+        window_coder)
+    buffer = fn_api_runner._GroupingBuffer(
+        pre_gbk_coder, post_gbk_coder, core.Windowing(window.FixedWindows(10)))
+    buffer.append(pre_gbk_coder.get_impl().encode_all([
+        windowed_value.WindowedValue(
+            ('k', t), t, [window.IntervalWindow(t - t % 10, t - t % 10 + 10)])
+        for t in [1, 12, 3]]))
+    self.assertEqual(timestamp.Timestamp(1), buffer.watermark_hold())
+    self.assertEqual([], buffer.extract_ready(timestamp.Timestamp(5)))
+    self.assertEqual(
+        [('k', [1, 3])],
+        self._decode(post_gbk_coder, [buffer.extract_ready(
+            timestamp.Timestamp(10))])[0])
+    self.assertEqual(timestamp.Timestamp(12), buffer.watermark_hold())
+    self.assertEqual(
+        [('k', [12])],
+        self._decode(post_gbk_coder, [buffer.extract_ready(
+            timestamp.MAX_TIMESTAMP)])[0])
+    self.assertIsNone(buffer.watermark_hold())
+
+
+class StageDependenciesTest(unittest.TestCase):
+
+  def test_independent_branches(self):
+    p = beam.Pipeline()
+    _ = p | 'A' >> beam.Create([('a', 1)]) | beam.GroupByKey()
+    _ = p | 'B' >> beam.Create([1]) | beam.Map(lambda x: x)
+    _, stages = fn_api_runner.FnApiRunner().create_stages(p.to_runner_api())
+    dependencies = fn_api_runner_transforms.stage_dependencies(stages)
+
+    def stage_of(prefix):
+      return only_element(
+          stage.name for stage in stages
+          if any(t.unique_name.startswith(prefix) for t in stage.transforms))
+
+    self.assertEqual(
+        frozenset([stage_of('A/')]),
+        dependencies[stage_of('GroupByKey/Read')])
+    self.assertEqual(frozenset(), dependencies[stage_of('B/')])
+    self.assertEqual(frozenset(), dependencies[stage_of('A/')])
+
+
 class FnApiRunnerSplitTest(unittest.TestCase):
 
   def create_pipeline(self):
@@ -1285,10 +1285,12 @@ def inject_timer_pcollections(stages, pipeline_context):
         payload = proto_utils.parse_Bytes(
             transform.spec.payload, beam_runner_api_pb2.ParDoPayload)
         for tag, spec in payload.timer_specs.items():
-          if len(transform.inputs) > 1:
+          if payload.side_inputs:
             raise NotImplementedError('Timers and side inputs.')
+          main_input_tag = only_element(tag for tag in transform.inputs
+                                        if tag not in payload.timer_specs)
           input_pcoll = pipeline_context.components.pcollections[
-              next(iter(transform.inputs.values()))]
+              transform.inputs[main_input_tag]]
           # Create the appropriate coder for the timer PCollection.
           key_coder_id = input_pcoll.coder_id
           if (pipeline_context.components.coders[key_coder_id].spec.urn
@@ -1365,6 +1367,41 @@ def sort_stages(stages, pipeline_context):
   return ordered
 
 
+def stage_dependencies(stages):
+  # type: (Iterable[Stage]) -> Dict[str, FrozenSet[str]]
+  """Returns the names of the stages each stage must wait for.
+
+  A stage depends on every stage writing to a buffer that it reads, either as
+  a main input or as a side input, and on the stages it must follow. Stages
+  without a dependency on each other may be executed concurrently.
+
+  This must be called before the data channels of the stages are rewritten to
+  point at the data plane.
+  """
+  stages = list(stages)
+  names = set(stage.name for stage in stages)
+  producers = collections.defaultdict(set)  # type: DefaultDict[bytes, Set[str]]
+  for stage in stages:
+    for transform in stage.transforms:
+      if transform.spec.urn == bundle_processor.DATA_OUTPUT_URN:
+        producers[transform.spec.payload].add(stage.name)
+
+  dependencies = {}  # type: Dict[str, FrozenSet[str]]
+  for stage in stages:
+    read_buffer_ids = set(
+        create_buffer_id(side_input) for side_input in stage.side_inputs())
+    read_buffer_ids.update(
+        transform.spec.payload for transform in stage.transforms
+        if transform.spec.urn == bundle_processor.DATA_INPUT_URN)
+    upstream = set(prev.name for prev in stage.must_follow
+                   if prev.name in names)
+    for buffer_id in read_buffer_ids:
+      upstream.update(producers.get(buffer_id, ()))
+    upstream.discard(stage.name)
+    dependencies[stage.name] = frozenset(upstream)
+  return dependencies
+
+
 def window_pcollection_coders(stages, pipeline_context):
   # type: (Iterable[Stage], TransformContext) -> Iterable[Stage]
   """Wrap all PCollection coders as windowed value coders.
@@ -0,0 +1,154 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Watermark tracking for the streaming mode of the FnApiRunner.
+"""
+# pytype: skip-file
+
+from __future__ import absolute_import
+
+import collections
+from builtins import object
+from typing import DefaultDict
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Set
+
+from apache_beam.portability.api import beam_runner_api_pb2
+from apache_beam.runners.portability import fn_api_runner_transforms
+from apache_beam.runners.portability.fn_api_runner_transforms import create_buffer_id
+from apache_beam.runners.portability.fn_api_runner_transforms import split_buffer_id
+from apache_beam.runners.worker import bundle_processor
+from apache_beam.utils import proto_utils
+from apache_beam.utils import timestamp
+
+# This module is experimental. No backwards-compatibility guarantees.
+
+
+class WatermarkManager(object):
+  """Tracks the watermarks of the stages and buffers of a fused pipeline.
+
+  Every buffer (a materialized or grouped PCollection) has a watermark equal to
+  the minimum output watermark of the stages writing to it. The input
+  watermark of a stage is the minimum watermark of the buffers it reads, and
+  its output watermark is additionally held back by the earliest timestamp of
+  the work the stage still has pending, e.g. unfired timers, deferred
+  residuals or grouped data whose windows are not complete yet.
+
+  Stages without inputs (other than impulse) have an input watermark of
+  ``MAX_TIMESTAMP``; they are held back only by their pending work. A
+  watermark of ``MAX_TIMESTAMP`` means no more data will arrive.
+
+  Buffer ids and holds are expected in the form produced by
+  ``fn_api_runner_transforms``, i.e. before the stages' data channels have
+  been rewritten to point at the data plane.
+  """
+
+  def __init__(self, stages):
+    # type: (Iterable[fn_api_runner_transforms.Stage]) -> None
+    self._stage_names = []  # type: List[str]
+    self._inputs = collections.defaultdict(set)  # type: DefaultDict[str, Set[bytes]]
+    self._side_inputs = collections.defaultdict(set)  # type: DefaultDict[str, Set[bytes]]
+    self._producers = collections.defaultdict(set)  # type: DefaultDict[bytes, Set[str]]
+    self._holds = {}  # type: Dict[str, timestamp.Timestamp]
+    for stage in stages:
+      self._stage_names.append(stage.name)
+      for transform in stage.transforms:
+        if transform.spec.urn == bundle_processor.DATA_INPUT_URN:
+          buffer_id = transform.spec.payload
+          if (buffer_id != fn_api_runner_transforms.IMPULSE_BUFFER
+              and split_buffer_id(buffer_id)[0] != 'timers'):
+            self._inputs[stage.name].add(buffer_id)
+        elif transform.spec.urn == bundle_processor.DATA_OUTPUT_URN:
+          buffer_id = transform.spec.payload
+          if split_buffer_id(buffer_id)[0] != 'timers':
+            self._producers[buffer_id].add(stage.name)
+        elif transform.spec.urn in fn_api_runner_transforms.PAR_DO_URNS:
+          payload = proto_utils.parse_Bytes(
+              transform.spec.payload, beam_runner_api_pb2.ParDoPayload)
+          for tag in payload.side_inputs:
+            self._side_inputs[stage.name].add(
+                create_buffer_id(transform.inputs[tag]))
+    self._output_watermarks = {
+        name: timestamp.MIN_TIMESTAMP for name in self._stage_names
+    }  # type: Dict[str, timestamp.Timestamp]
+
+  def set_hold(self, stage_name, hold):
+    # type: (str, Optional[timestamp.Timestamp]) -> None
+    """Holds the output watermark of a stage at the given timestamp.
+
+    A hold of None releases the hold.
+    """
+    if hold is None:
+      self._holds.pop(stage_name, None)
+    else:
+      self._holds[stage_name] = hold
+
+  def update(self):
+    # type: () -> None
+    """Recomputes all watermarks from the current holds.
+
+    Stages are visited in the (topological) order they were given in, so a
+    single pass propagates watermarks through the whole pipeline.
+    """
+    for stage_name in self._stage_names:
+      self._output_watermarks[stage_name] = min(
+          self.input_watermark(stage_name),
+          self._holds.get(stage_name, timestamp.MAX_TIMESTAMP))
+
+  def buffer_watermark(self, buffer_id):
+    # type: (bytes) -> timestamp.Timestamp
+    return self._min_watermark(
+        self._output_watermarks[stage_name]
+        for stage_name in self._producers.get(buffer_id, ()))
+
+  def input_watermark(self, stage_name):
+    # type: (str) -> timestamp.Timestamp
+    return self._min_watermark(
+        self.buffer_watermark(buffer_id)
+        for buffer_id in self._inputs.get(stage_name, ()))
+
+  def output_watermark(self, stage_name):
+    # type: (str) -> timestamp.Timestamp
+    return self._output_watermarks[stage_name]
+
+  def side_inputs_ready(self, stage_name):
+    # type: (str) -> bool
+    """Whether all side inputs of the stage have been completely computed."""
+    return all(
+        self.buffer_watermark(buffer_id) >= timestamp.MAX_TIMESTAMP
+        for buffer_id in self._side_inputs.get(stage_name, ()))
+
+  def side_input_buffers(self):
+    # type: () -> Set[bytes]
+    """The buffers read as a side input by any stage."""
+    return set().union(*self._side_inputs.values())
+
+  def is_done(self):
+    # type: () -> bool
+    return all(watermark >= timestamp.MAX_TIMESTAMP
+               for watermark in self._output_watermarks.values())
+
+  @staticmethod
+  def _min_watermark(watermarks):
+    # type: (Iterable[timestamp.Timestamp]) -> timestamp.Timestamp
+    result = timestamp.MAX_TIMESTAMP
+    for watermark in watermarks:
+      result = min(result, watermark)
+    return result
@@ -0,0 +1,87 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+"""Unit tests for the watermark tracking of the FnApiRunner streaming mode."""
+# pytype: skip-file
+
+from __future__ import absolute_import
+
+import logging
+import unittest
+
+import apache_beam as beam
+from apache_beam.runners.portability import fn_api_runner
+from apache_beam.runners.portability.fn_api_runner_watermarks import WatermarkManager
+from apache_beam.utils import timestamp
+
+
+class WatermarkManagerTest(unittest.TestCase):
+
+  def setUp(self):
+    # Three stages: the impulse and the input to the GroupByKey, the
+    # GroupByKey output, and a ParDo reading the grouped data as a side input.
+    p = beam.Pipeline()
+    grouped = (p
+               | beam.Create([('a', 1)])
+               | beam.GroupByKey())
+    _ = (p
+         | 'Other' >> beam.Create([None])
+         | beam.Map(lambda x, side: x, beam.pvalue.AsList(grouped)))
+    _, stages = fn_api_runner.FnApiRunner().create_stages(p.to_runner_api())
+    self.stages = {stage.name: stage for stage in stages}
+    self.manager = WatermarkManager(stages)
+    self.first = [name for name, stage in self.stages.items()
+                  if any('Impulse' in t.unique_name for t in stage.transforms)
+                  and any(t.unique_name.startswith('Create/')
+                          for t in stage.transforms)][0]
+    self.group = [name for name, stage in self.stages.items()
+                  if any('GroupByKey/Read' in t.unique_name
+                         for t in stage.transforms)][0]
+    self.side = [name for name, stage in self.stages.items()
+                 if any(t.unique_name.startswith('Map(')
+                        for t in stage.transforms)][0]
+
+  def test_holds_propagate_downstream(self):
+    self.manager.set_hold(self.first, timestamp.Timestamp(5))
+    self.manager.update()
+    self.assertEqual(
+        timestamp.Timestamp(5), self.manager.output_watermark(self.first))
+    self.assertEqual(
+        timestamp.Timestamp(5), self.manager.input_watermark(self.group))
+    self.assertFalse(self.manager.side_inputs_ready(self.side))
+    self.assertFalse(self.manager.is_done())
+
+  def test_done_once_all_holds_are_released(self):
+    self.manager.set_hold(self.first, None)
+    self.manager.set_hold(self.group, timestamp.Timestamp(1))
+    self.manager.update()
+    self.assertEqual(
+        timestamp.MAX_TIMESTAMP, self.manager.input_watermark(self.group))
+    self.assertEqual(
+        timestamp.Timestamp(1), self.manager.output_watermark(self.group))
+    self.assertFalse(self.manager.side_inputs_ready(self.side))
+    self.manager.set_hold(self.group, None)
+    self.manager.update()
+    self.assertTrue(self.manager.side_inputs_ready(self.side))
+    self.assertTrue(self.manager.is_done())
+
+  def test_side_input_buffers(self):
+    self.assertEqual(1, len(self.manager.side_input_buffers()))
+
+
+if __name__ == '__main__':
+  logging.getLogger().setLevel(logging.INFO)
+  unittest.main()
@@ -196,14 +196,15 @@ class DataInputOperation(RunnerIOOperation):
   def process_encoded(self, encoded_windowed_values):
     # type: (bytes) -> None
     input_stream = coder_impl.create_InputStream(encoded_windowed_values)
+    decode_from_stream = self.windowed_coder_impl.decode_from_stream
+    output = self.output
+    splitting_lock = self.splitting_lock
     while input_stream.size() > 0:
-      with self.splitting_lock:
+      with splitting_lock:
         if self.index == self.stop - 1:
           return
         self.index += 1
-      decoded_value = self.windowed_coder_impl.decode_from_stream(
-          input_stream, True)
-      self.output(decoded_value)
+      output(decode_from_stream(input_stream, True))
 
   def try_split(self, fraction_of_remainder, total_buffer_size):
     with self.splitting_lock:
@@ -805,10 +806,9 @@ class BundleProcessor(object):
         input_op_by_transform_id[input_op.transform_id] = input_op
 
       for data_channel, expected_transforms in data_channels.items():
-        for data in data_channel.input_elements(
+        for transform_id, payload in data_channel.input_payloads(
             instruction_id, expected_transforms):
-          input_op_by_transform_id[
-              data.transform_id].process_encoded(data.data)
+          input_op_by_transform_id[transform_id].process_encoded(payload)
 
       # Finish all operations.
       for op in self.ops.values():
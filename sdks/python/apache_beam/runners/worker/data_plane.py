@@ -33,6 +33,7 @@ import time
 from builtins import object
 from builtins import range
 from typing import TYPE_CHECKING
+from typing import Any
 from typing import Callable
 from typing import DefaultDict
 from typing import Dict
@@ -40,6 +41,7 @@ from typing import Iterable
 from typing import Iterator
 from typing import List
 from typing import Optional
+from typing import Tuple
 
 import grpc
 from future.utils import raise_
@@ -61,6 +63,12 @@ _LOGGER = logging.getLogger(__name__)
 
 _DEFAULT_SIZE_FLUSH_THRESHOLD = 10 << 20  # 10MB
 _DEFAULT_TIME_FLUSH_THRESHOLD_MS = 0  # disable time-based flush by default
+# When sending is slower than producing, output streams are flushed at about
+# the size that can be sent in this many seconds, but no less than the minimum.
+_TARGET_FLUSH_SEND_SECS = 0.1
+_MIN_SIZE_FLUSH_THRESHOLD = 64 << 10  # 64KB
+# Bound on the bytes an SDK worker queues for sending to the runner.
+_DEFAULT_CLIENT_MAX_BYTES_IN_FLIGHT = 256 << 20  # 256MB
 
 
 if TYPE_CHECKING:
@@ -84,15 +92,19 @@ class ClosableOutputStream(OutputStream):
   @staticmethod
   def create(close_callback,
              flush_callback,
-             data_buffer_time_limit_ms):
+             data_buffer_time_limit_ms,
+             size_flush_threshold=_DEFAULT_SIZE_FLUSH_THRESHOLD):
     if data_buffer_time_limit_ms > 0:
       return TimeBasedBufferingClosableOutputStream(
           close_callback,
           flush_callback=flush_callback,
+          size_flush_threshold=size_flush_threshold,
           time_flush_threshold_ms=data_buffer_time_limit_ms)
     else:
       return SizeBasedBufferingClosableOutputStream(
-          close_callback, flush_callback=flush_callback)
+          close_callback,
+          flush_callback=flush_callback,
+          size_flush_threshold=size_flush_threshold)
 
 
 class SizeBasedBufferingClosableOutputStream(ClosableOutputStream):
@@ -225,6 +237,22 @@ class DataChannel(with_metaclass(abc.ABCMeta, object)):  # type: ignore[misc]
     """
     raise NotImplementedError(type(self))
 
+  def input_payloads(self,
+                     instruction_id,  # type: str
+                     expected_transforms,  # type: Collection[str]
+                     abort_callback=None  # type: Optional[Callable[[], bool]]
+                    ):
+    # type: (...) -> Iterator[Tuple[str, bytes]]
+    """Returns an iterable of (transform_id, data) pairs for instruction_id.
+
+    This is equivalent to input_elements, but yields only the transform id and
+    payload of each Element.Data. Channels may override it to avoid copying
+    the payload out of the received protos more than once.
+    """
+    for data in self.input_elements(
+        instruction_id, expected_transforms, abort_callback):
+      yield data.transform_id, data.data
+
   @abc.abstractmethod
   def output_stream(self,
                     instruction_id,  # type: str
@@ -303,15 +331,34 @@ class InMemoryDataChannel(DataChannel):
 
 
 class _GrpcDataChannel(DataChannel):
-  """Base class for implementing a BeamFnData-based DataChannel."""
+  """Base class for implementing a BeamFnData-based DataChannel.
+
+  If max_bytes_in_flight is set, output streams block once that many bytes
+  are queued for sending, until gRPC has taken enough of them. This pushes
+  back on the operations producing output when the other side is slow.
+
+  Output streams are created with a flush threshold adapted to the observed
+  send rate, so that buffers stay small when sending is slow.
+  """
 
   _WRITES_FINISHED = object()
 
-  def __init__(self, data_buffer_time_limit_ms=0):
-    # type: (Optional[int]) -> None
+  def __init__(self,
+               data_buffer_time_limit_ms=0,  # type: Optional[int]
+               max_bytes_in_flight=None  # type: Optional[int]
+              ):
+    # type: (...) -> None
     self._data_buffer_time_limit_ms = data_buffer_time_limit_ms
-    self._to_send = queue.Queue()  # type: queue.Queue[beam_fn_api_pb2.Elements.Data]
-    self._received = collections.defaultdict(lambda: queue.Queue(maxsize=5))  # type: DefaultDict[str, queue.Queue[beam_fn_api_pb2.Elements.Data]]
+    self._max_bytes_in_flight = max_bytes_in_flight
+    # Element.Data protos to send, with the size of their payload.
+    self._to_send = queue.Queue()  # type: queue.Queue[Tuple[beam_fn_api_pb2.Elements.Data, int]]
+    self._send_condition = threading.Condition()
+    self._bytes_in_flight = 0
+    self._throttled_secs = 0.0
+    self._send_rate = None  # type: Optional[float]
+    # Received Element.Data protos are queued together with their payload,
+    # which is read out of the proto once, on the reading thread.
+    self._received = collections.defaultdict(lambda: queue.Queue(maxsize=5))  # type: DefaultDict[str, queue.Queue[Tuple[beam_fn_api_pb2.Elements.Data, bytes]]]
     self._receive_lock = threading.Lock()
     self._reads_finished = threading.Event()
     self._closed = False
@@ -320,12 +367,71 @@ class _GrpcDataChannel(DataChannel):
   def close(self):
     self._to_send.put(self._WRITES_FINISHED)
     self._closed = True
+    with self._send_condition:
+      self._send_condition.notify_all()
+
+  def send_stats(self):
+    # type: () -> Dict[str, Any]
+    """Returns statistics about the data waiting to be sent.
+
+    These are the number of queued Element.Data protos, the bytes of payload
+    they hold and the limit on it, the current flush threshold of new output
+    streams and the total seconds producers were blocked on the limit.
+    """
+    with self._send_condition:
+      return {
+          'queue_depth': self._to_send.qsize(),
+          'bytes_in_flight': self._bytes_in_flight,
+          'max_bytes_in_flight': self._max_bytes_in_flight,
+          'size_flush_threshold': self._size_flush_threshold(),
+          'throttled_secs': self._throttled_secs,
+      }
+
+  def _size_flush_threshold(self):
+    # type: () -> int
+    threshold = _DEFAULT_SIZE_FLUSH_THRESHOLD
+    if self._send_rate is not None:
+      threshold = min(threshold, self._send_rate * _TARGET_FLUSH_SEND_SECS)
+    if self._max_bytes_in_flight:
+      threshold = min(threshold, self._max_bytes_in_flight // 2)
+    return int(max(threshold, _MIN_SIZE_FLUSH_THRESHOLD))
+
+  def _send(self, data, size):
+    # type: (beam_fn_api_pb2.Elements.Data, int) -> None
+    with self._send_condition:
+      if self._max_bytes_in_flight and size:
+        start = None
+        # A single message may exceed the limit if nothing else is in flight.
+        while (self._bytes_in_flight
+               and self._bytes_in_flight + size > self._max_bytes_in_flight
+               and not self._closed):
+          if start is None:
+            start = time.time()
+          self._send_condition.wait(1)
+        if start is not None:
+          self._throttled_secs += time.time() - start
+      self._bytes_in_flight += size
+      self._to_send.put((data, size))
+
+  def _sent(self, size, send_secs):
+    # type: (int, float) -> None
+    with self._send_condition:
+      self._bytes_in_flight -= size
+      # Only sends that took a noticeable time say anything about the rate
+      # at which the other side accepts data.
+      if size and send_secs > 0.001:
+        rate = size / send_secs
+        if self._send_rate is None:
+          self._send_rate = rate
+        else:
+          self._send_rate = 0.8 * self._send_rate + 0.2 * rate
+      self._send_condition.notify_all()
 
   def wait(self, timeout=None):
     self._reads_finished.wait(timeout)
 
   def _receiving_queue(self, instruction_id):
-    # type: (str) -> queue.Queue[beam_fn_api_pb2.Elements.Data]
+    # type: (str) -> queue.Queue[Tuple[beam_fn_api_pb2.Elements.Data, bytes]]
     with self._receive_lock:
       return self._received[instruction_id]
 
@@ -348,13 +454,33 @@ class _GrpcDataChannel(DataChannel):
       instruction_id(str): instruction_id for which data is read
       expected_transforms(collection): expected transforms
     """
+    for data, _ in self._input_data(
+        instruction_id, expected_transforms, abort_callback):
+      yield data
+
+  def input_payloads(self,
+                     instruction_id,  # type: str
+                     expected_transforms,  # type: Collection[str]
+                     abort_callback=None  # type: Optional[Callable[[], bool]]
+                    ):
+    # type: (...) -> Iterator[Tuple[str, bytes]]
+    for data, payload in self._input_data(
+        instruction_id, expected_transforms, abort_callback):
+      yield data.transform_id, payload
+
+  def _input_data(self,
+                  instruction_id,  # type: str
+                  expected_transforms,  # type: Collection[str]
+                  abort_callback=None  # type: Optional[Callable[[], bool]]
+                 ):
+    # type: (...) -> Iterator[Tuple[beam_fn_api_pb2.Elements.Data, bytes]]
     received = self._receiving_queue(instruction_id)
     done_transforms = []  # type: List[str]
     abort_callback = abort_callback or (lambda: False)
     try:
       while len(done_transforms) < len(expected_transforms):
         try:
-          data = received.get(timeout=1)
+          data, payload = received.get(timeout=1)
         except queue.Empty:
           if self._closed:
             raise RuntimeError('Channel closed prematurely.')
@@ -364,11 +490,11 @@ class _GrpcDataChannel(DataChannel):
             t, v, tb = self._exc_info
             raise_(t, v, tb)
         else:
-          if not data.data and data.transform_id in expected_transforms:
+          if not payload and data.transform_id in expected_transforms:
             done_transforms.append(data.transform_id)
           else:
             assert data.transform_id not in done_transforms
-            yield data
+            yield data, payload
     finally:
       # Instruction_ids are not reusable so Clean queue once we are done with
       #  an instruction_id
@@ -379,50 +505,58 @@ class _GrpcDataChannel(DataChannel):
     def add_to_send_queue(data):
       # type: (bytes) -> None
       if data:
-        self._to_send.put(
+        self._send(
             beam_fn_api_pb2.Elements.Data(
                 instruction_id=instruction_id,
                 transform_id=transform_id,
-                data=data))
+                data=data),
+            len(data))
 
     def close_callback(data):
       # type: (bytes) -> None
       add_to_send_queue(data)
       # End of stream marker.
-      self._to_send.put(
+      self._send(
           beam_fn_api_pb2.Elements.Data(
               instruction_id=instruction_id,
               transform_id=transform_id,
-              data=b''))
+              data=b''),
+          0)
 
     return ClosableOutputStream.create(
         close_callback,
         add_to_send_queue,
-        self._data_buffer_time_limit_ms)
+        self._data_buffer_time_limit_ms,
+        self._size_flush_threshold())
 
   def _write_outputs(self):
     # type: () -> Iterator[beam_fn_api_pb2.Elements]
     done = False
     while not done:
-      data = [self._to_send.get()]
+      items = [self._to_send.get()]
       try:
         # Coalesce up to 100 other items.
         for _ in range(100):
-          data.append(self._to_send.get_nowait())
+          items.append(self._to_send.get_nowait())
       except queue.Empty:
         pass
-      if data[-1] is self._WRITES_FINISHED:
+      if items[-1] is self._WRITES_FINISHED:
         done = True
-        data.pop()
-      if data:
-        yield beam_fn_api_pb2.Elements(data=data)
+        items.pop()
+      if items:
+        start = time.time()
+        yield beam_fn_api_pb2.Elements(data=[data for data, _ in items])
+        # gRPC only asks for the next message once it has sent this one.
+        self._sent(sum(size for _, size in items), time.time() - start)
 
   def _read_inputs(self, elements_iterator):
     # type: (Iterable[beam_fn_api_pb2.Elements]) -> None
     try:
       for elements in elements_iterator:
         for data in elements.data:
-          self._receiving_queue(data.instruction_id).put(data)
+          # Accessing a bytes field copies it, so do it once, here, rather
+          # than on the thread processing the bundle.
+          self._receiving_queue(data.instruction_id).put((data, data.data))
     except:  # pylint: disable=bare-except
       if not self._closed:
         _LOGGER.exception('Failed to read inputs in the data plane.')
@@ -431,6 +565,8 @@ class _GrpcDataChannel(DataChannel):
     finally:
       self._closed = True
       self._reads_finished.set()
+      with self._send_condition:
+        self._send_condition.notify_all()
 
   def set_inputs(self, elements_iterator):
     # type: (Iterable[beam_fn_api_pb2.Elements]) -> None
@@ -446,10 +582,12 @@ class GrpcClientDataChannel(_GrpcDataChannel):
 
   def __init__(self,
                data_stub,  # type: beam_fn_api_pb2_grpc.BeamFnDataStub
-               data_buffer_time_limit_ms=0  # type: Optional[int]
+               data_buffer_time_limit_ms=0,  # type: Optional[int]
+               max_bytes_in_flight=_DEFAULT_CLIENT_MAX_BYTES_IN_FLIGHT  # type: Optional[int]
                ):
     # type: (...) -> None
-    super(GrpcClientDataChannel, self).__init__(data_buffer_time_limit_ms)
+    super(GrpcClientDataChannel, self).__init__(
+        data_buffer_time_limit_ms, max_bytes_in_flight)
     self.set_inputs(data_stub.Data(self._write_outputs()))
 
 
@@ -505,7 +643,8 @@ class GrpcClientDataChannelFactory(DataChannelFactory):
   def __init__(self,
                credentials=None,
                worker_id=None,  # type: Optional[str]
-               data_buffer_time_limit_ms=0  # type: Optional[int]
+               data_buffer_time_limit_ms=0,  # type: Optional[int]
+               max_bytes_in_flight=None  # type: Optional[int]
                ):
     # type: (...) -> None
     self._data_channel_cache = {}  # type: Dict[str, GrpcClientDataChannel]
@@ -513,6 +652,10 @@ class GrpcClientDataChannelFactory(DataChannelFactory):
     self._credentials = None
     self._worker_id = worker_id
     self._data_buffer_time_limit_ms = data_buffer_time_limit_ms
+    # A limit of 0 disables the bound on outbound data.
+    self._max_bytes_in_flight = (
+        _DEFAULT_CLIENT_MAX_BYTES_IN_FLIGHT if max_bytes_in_flight is None
+        else max_bytes_in_flight)
     if credentials is not None:
       _LOGGER.info('Using secure channel creds.')
       self._credentials = credentials
@@ -541,10 +684,18 @@ class GrpcClientDataChannelFactory(DataChannelFactory):
               grpc_channel, WorkerIdInterceptor(self._worker_id))
           self._data_channel_cache[url] = GrpcClientDataChannel(
               beam_fn_api_pb2_grpc.BeamFnDataStub(grpc_channel),
-              self._data_buffer_time_limit_ms)
+              self._data_buffer_time_limit_ms,
+              self._max_bytes_in_flight)
 
     return self._data_channel_cache[url]
 
+  def send_stats(self):
+    # type: () -> Dict[str, Dict[str, Any]]
+    """Returns the send_stats() of every cached channel, by url."""
+    with self._lock:
+      channels = list(self._data_channel_cache.items())
+    return {url: channel.send_stats() for url, channel in channels}
+
   def close(self):
     # type: () -> None
     _LOGGER.info('Closing all cached grpc data channels.')
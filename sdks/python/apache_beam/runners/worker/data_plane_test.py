@@ -107,6 +107,59 @@ class DataChannelTest(unittest.TestCase):
       data_channel_client.wait()
       data_channel_service.wait()
 
+  @timeout(5)
+  def test_bounded_bytes_in_flight(self):
+    channel = data_plane._GrpcDataChannel(max_bytes_in_flight=5)
+    writes = channel._write_outputs()
+    stream = channel.output_stream('0', '1')
+    stream.write(b'abcd')
+    stream.flush()
+    self.assertEqual(channel.send_stats()['bytes_in_flight'], 4)
+
+    # The second flush blocks until the first one has been sent.
+    stream.write(b'efgh')
+    flushed = threading.Event()
+
+    def flush():
+      stream.flush()
+      flushed.set()
+
+    threading.Thread(target=flush).start()
+    self.assertFalse(flushed.wait(0.2))
+    self.assertEqual(
+        [data.data for data in next(writes).data], [b'abcd'])
+    # Asking for the next message releases the previous one.
+    self.assertEqual(
+        [data.data for data in next(writes).data], [b'efgh'])
+    self.assertTrue(flushed.wait(1))
+    stats = channel.send_stats()
+    self.assertEqual(stats['max_bytes_in_flight'], 5)
+    self.assertEqual(stats['bytes_in_flight'], 4)
+    self.assertGreater(stats['throttled_secs'], 0)
+    channel.close()
+
+  def test_client_factory_max_bytes_in_flight(self):
+    self.assertEqual(
+        data_plane.GrpcClientDataChannelFactory()._max_bytes_in_flight,
+        data_plane._DEFAULT_CLIENT_MAX_BYTES_IN_FLIGHT)
+    # A limit of 0 disables the bound rather than using the default.
+    self.assertEqual(
+        data_plane.GrpcClientDataChannelFactory(
+            max_bytes_in_flight=0)._max_bytes_in_flight, 0)
+
+  def test_client_factory_send_stats(self):
+    factory = data_plane.GrpcClientDataChannelFactory()
+    channel = data_plane._GrpcDataChannel(max_bytes_in_flight=10)
+    factory._data_channel_cache['localhost:1234'] = channel
+    stream = channel.output_stream('0', '1')
+    stream.write(b'abcd')
+    stream.flush()
+    stats = factory.send_stats()
+    self.assertEqual(list(stats), ['localhost:1234'])
+    self.assertEqual(stats['localhost:1234']['queue_depth'], 1)
+    self.assertEqual(stats['localhost:1234']['bytes_in_flight'], 4)
+    channel.close()
+
   def test_in_memory_data_channel(self):
     channel = data_plane.InMemoryDataChannel()
     self._data_channel_test(channel, channel.inverse())
@@ -158,6 +211,13 @@ class DataChannelTest(unittest.TestCase):
              transform_id=transform_2,
              data=b'ghi')])
 
+    # Payloads only.
+    send('3', transform_1, b'jkl')
+    self.assertEqual(
+        list(itertools.islice(
+            to_channel.input_payloads('3', [transform_1]), 1)),
+        [(transform_1, b'jkl')])
+
 
 if __name__ == '__main__':
   logging.getLogger().setLevel(logging.INFO)
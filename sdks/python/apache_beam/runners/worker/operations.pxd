@@ -111,13 +111,26 @@ cdef class PGBKCVOperation(Operation):
   cdef public object combine_fn
   cdef public object combine_fn_add_input
   cdef public object combine_fn_compact
+  cdef public object combine_fn_add_inputs
+  cdef list pending_entries
+  cdef long pending_count
   cdef public bint is_default_windowing
   cdef public object timestamp_combiner
   cdef dict table
-  cdef long max_keys
+  cdef public long max_keys
+  cdef public long max_bytes
   cdef long key_count
+  cdef public object output_coder_impl
+  cdef double average_entry_bytes
+  cdef long elements_until_size_sample
+  cdef public object flush_counter
+  cdef public object flushed_keys_counter
+  cdef public object flushed_bytes_counter
 
   cpdef output_key(self, wkey, value, timestamp)
+  cpdef add_pending_inputs(self)
+  cpdef sample_entry_size(self, WindowedValue wkv, accumulator)
+  cpdef flush_cold_entries(self)
 
 
 cdef class FlattenOperation(Operation):
@@ -62,6 +62,8 @@ from apache_beam.transforms import window
 from apache_beam.transforms.combiners import PhasedCombineFnExecutor
 from apache_beam.transforms.combiners import curry_combine_fn
 from apache_beam.transforms.window import GlobalWindows
+from apache_beam.utils.counters import Counter
+from apache_beam.utils.counters import CounterName
 from apache_beam.utils.windowed_value import WindowedValue
 
 if TYPE_CHECKING:
@@ -888,6 +890,31 @@ class PGBKOperation(Operation):
 
 
 class PGBKCVOperation(Operation):
+  """Combines values per key before a shuffle.
+
+  Accumulators are kept in a table that is bounded both by the number of keys
+  and by the estimated encoded size of its entries. The size of an entry is
+  estimated with the output coder every ``SIZE_SAMPLE_PERIOD`` elements. When
+  the table is full, about a tenth of it is output to make room. Entries
+  updated since the previous flush get a second chance and are kept, so hot
+  keys keep being combined locally.
+
+  If the combine fn implements add_inputs, values are buffered per key and
+  added in batches, which saves a call per element for hot keys.
+  """
+
+  # The default bound on the estimated encoded size of all table entries.
+  DEFAULT_MAX_BYTES = 32 << 20
+
+  # The number of values buffered for add_inputs before they are added.
+  ADD_INPUTS_BATCH_SIZE = 1000
+
+  # The number of elements between samples of the size of an entry.
+  SIZE_SAMPLE_PERIOD = 1000
+
+  FLUSHES_URN = 'beam:metric:pgbkcv:flushes:v1'
+  FLUSHED_KEYS_URN = 'beam:metric:pgbkcv:flushed_keys:v1'
+  FLUSHED_BYTES_URN = 'beam:metric:pgbkcv:flushed_bytes:v1'
 
   def __init__(
       self, name_context, spec, counter_factory, state_sampler, windowing=None):
@@ -906,6 +933,17 @@ class PGBKCVOperation(Operation):
       self.combine_fn_compact = None
     else:
       self.combine_fn_compact = self.combine_fn.compact
+    base_add_inputs = (
+        core.CombineFn.add_inputs if sys.version_info >= (3,)
+        else core.CombineFn.add_inputs.__func__)
+    # Some combine fns implement add_inputs as a staticmethod.
+    if getattr(fn.add_inputs, '__func__', fn.add_inputs) is base_add_inputs:
+      self.combine_fn_add_inputs = None
+    else:
+      self.combine_fn_add_inputs = self.combine_fn.add_inputs
+    # Entries with values waiting to be added with add_inputs.
+    self.pending_entries = []
+    self.pending_count = 0
     if windowing:
       self.is_default_windowing = windowing.is_default()
       tsc_type = windowing.timestamp_combiner
@@ -917,7 +955,6 @@ class PGBKCVOperation(Operation):
       self.timestamp_combiner = None
     # Optimization for the (known tiny accumulator, often wide keyspace)
     # combine functions.
-    # TODO(b/36567833): Bound by in-memory size rather than key count.
     self.max_keys = (
         1000 * 1000 if
         isinstance(fn, (combiners.CountCombineFn, combiners.MeanCombineFn)) or
@@ -925,8 +962,29 @@ class PGBKCVOperation(Operation):
         # combiners to the short list above.
         (isinstance(fn, core.CallableWrapperCombineFn) and
          fn._fn in (min, max, sum)) else 100 * 1000)  # pylint: disable=protected-access
+    self.max_bytes = self.DEFAULT_MAX_BYTES
+    output_coders = self.spec.output_coders
+    self.output_coder_impl = (
+        output_coders[0].get_impl() if output_coders and output_coders[0]
+        else None)
+    self.average_entry_bytes = 0
+    # Sample the first element, so the size bound applies from the start.
+    self.elements_until_size_sample = 1
     self.key_count = 0
+    # Maps each (windowed) key to [accumulator, timestamp, updated, pending],
+    # where updated tells whether the entry was updated since the previous
+    # flush and pending lists the values not yet added to the accumulator.
     self.table = {}
+    self.flush_counter = counter_factory.get_counter(
+        CounterName('pgbk-flushes', step_name=self.name_context.step_name),
+        Counter.SUM)
+    self.flushed_keys_counter = counter_factory.get_counter(
+        CounterName('pgbk-flushed-keys', step_name=self.name_context.step_name),
+        Counter.SUM)
+    self.flushed_bytes_counter = counter_factory.get_counter(
+        CounterName(
+            'pgbk-flushed-bytes', step_name=self.name_context.step_name),
+        Counter.SUM)
 
   def process(self, wkv):
     # type: (WindowedValue) -> None
@@ -940,35 +998,110 @@ class PGBKCVOperation(Operation):
         wkey = tuple(wkv.windows), key
       entry = self.table.get(wkey, None)
       if entry is None:
-        if self.key_count >= self.max_keys:
-          target = self.key_count * 9 // 10
-          old_wkeys = []
-          # TODO(robertwb): Use an LRU cache?
-          for old_wkey, old_wvalue in self.table.items():
-            old_wkeys.append(old_wkey)  # Can't mutate while iterating.
-            self.output_key(old_wkey, old_wvalue[0], old_wvalue[1])
-            self.key_count -= 1
-            if self.key_count <= target:
-              break
-          for old_wkey in reversed(old_wkeys):
-            del self.table[old_wkey]
+        if (self.key_count >= self.max_keys
+            or self.key_count * self.average_entry_bytes > self.max_bytes):
+          self.flush_cold_entries()
         self.key_count += 1
-        # We save the accumulator as a one element list so we can efficiently
-        # mutate when new values are added without searching the cache again.
-        entry = self.table[wkey] = [self.combine_fn.create_accumulator(), None]
+        # We save the accumulator as a list so we can efficiently mutate when
+        # new values are added without searching the cache again.
+        entry = self.table[wkey] = [
+            self.combine_fn.create_accumulator(), None, False, None]
         if not self.is_default_windowing:
           # Conditional as the timestamp attribute is lazily initialized.
           entry[1] = wkv.timestamp
-      entry[0] = self.combine_fn_add_input(entry[0], value)
+      else:
+        entry[2] = True
+      if self.combine_fn_add_inputs is None:
+        entry[0] = self.combine_fn_add_input(entry[0], value)
+      else:
+        if entry[3] is None:
+          entry[3] = [value]
+          self.pending_entries.append(entry)
+        else:
+          entry[3].append(value)
+        self.pending_count += 1
+        if self.pending_count >= self.ADD_INPUTS_BATCH_SIZE:
+          self.add_pending_inputs()
       if not self.is_default_windowing and self.timestamp_combiner:
         entry[1] = self.timestamp_combiner.combine(entry[1], wkv.timestamp)
+      self.elements_until_size_sample -= 1
+      if self.elements_until_size_sample <= 0:
+        self.sample_entry_size(wkv, entry[0])
+
+  def add_pending_inputs(self):
+    for entry in self.pending_entries:
+      entry[0] = self.combine_fn_add_inputs(entry[0], entry[3])
+      entry[3] = None
+    self.pending_entries = []
+    self.pending_count = 0
+
+  def sample_entry_size(self, wkv, accumulator):
+    self.elements_until_size_sample = self.SIZE_SAMPLE_PERIOD
+    if self.output_coder_impl is None:
+      return
+    # The output coder is windowed, so the sample keeps the element's windows.
+    size = self.output_coder_impl.estimate_size(
+        wkv.with_value((wkv.value[0], accumulator)))
+    if self.average_entry_bytes:
+      # An exponential moving average, so growing accumulators are tracked.
+      self.average_entry_bytes = (7 * self.average_entry_bytes + size) / 8.0
+    else:
+      self.average_entry_bytes = size
+
+  def flush_cold_entries(self):
+    """Outputs and removes about a tenth of the table.
+
+    Entries are visited in insertion order. Entries updated since the previous
+    flush are moved to the end of the table instead of being output, unless
+    there are not enough other entries to flush.
+    """
+    self.add_pending_inputs()
+    target = self.key_count * 9 // 10
+    to_flush = []
+    updated = []
+    for wkey, entry in self.table.items():
+      if self.key_count - len(to_flush) <= target:
+        break
+      if entry[2]:
+        updated.append(wkey)
+      else:
+        to_flush.append(wkey)
+    num_updated_to_flush = max(0, self.key_count - len(to_flush) - target)
+    to_flush.extend(updated[:num_updated_to_flush])
+    for wkey in to_flush:
+      entry = self.table.pop(wkey)
+      self.output_key(wkey, entry[0], entry[1])
+    for wkey in updated[num_updated_to_flush:]:
+      entry = self.table.pop(wkey)
+      entry[2] = False
+      self.table[wkey] = entry
+    self.key_count -= len(to_flush)
+    self.flush_counter.update(1)
+    self.flushed_keys_counter.update(len(to_flush))
+    self.flushed_bytes_counter.update(
+        int(len(to_flush) * self.average_entry_bytes))
 
   def finish(self):
+    self.add_pending_inputs()
     for wkey, value in self.table.items():
       self.output_key(wkey, value[0], value[1])
     self.table = {}
     self.key_count = 0
 
+  def monitoring_infos(self, transform_id):
+    # type: (str) -> Dict[FrozenSet, metrics_pb2.MonitoringInfo]
+    all_monitoring_infos = super(PGBKCVOperation, self).monitoring_infos(
+        transform_id)
+    for urn, counter in [
+        (self.FLUSHES_URN, self.flush_counter),
+        (self.FLUSHED_KEYS_URN, self.flushed_keys_counter),
+        (self.FLUSHED_BYTES_URN, self.flushed_bytes_counter)]:
+      if counter.value():
+        mi = monitoring_infos.int64_counter(
+            urn, counter.value(), ptransform=transform_id)
+        all_monitoring_infos[monitoring_infos.to_key(mi)] = mi
+    return all_monitoring_infos
+
   def output_key(self, wkey, accumulator, timestamp):
     if self.combine_fn_compact is None:
       value = accumulator
@@ -0,0 +1,130 @@
+#
+# Licensed to the Apache Software Foundation (ASF) under one or more
+# contributor license agreements.  See the NOTICE file distributed with
+# this work for additional information regarding copyright ownership.
+# The ASF licenses this file to You under the Apache License, Version 2.0
+# (the "License"); you may not use this file except in compliance with
+# the License.  You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+"""Unit tests for worker operations."""
+
+# pytype: skip-file
+
+from __future__ import absolute_import
+
+import logging
+import unittest
+
+from apache_beam import coders
+from apache_beam.internal import pickler
+from apache_beam.runners import common
+from apache_beam.runners.worker import operation_specs
+from apache_beam.runners.worker import operations
+from apache_beam.runners.worker import statesampler
+from apache_beam.transforms import combiners
+from apache_beam.transforms import core
+from apache_beam.transforms import window
+from apache_beam.utils.counters import CounterFactory
+from apache_beam.utils.windowed_value import WindowedValue
+
+
+class _CollectingOperation(operations.Operation):
+  """Records the elements it receives."""
+
+  def __init__(self, name, counter_factory, state_sampler):
+    super(_CollectingOperation, self).__init__(
+        name, None, counter_factory, state_sampler)
+    self.elements = []
+
+  def process(self, o):
+    self.elements.append(o)
+
+
+class PGBKCVOperationTest(unittest.TestCase):
+
+  def create_operation(self, windowfn=None):
+    windowfn = windowfn or window.GlobalWindows()
+    window_coder = windowfn.get_window_coder()
+    output_coder = coders.WindowedValueCoder(
+        coders.TupleCoder([coders.StrUtf8Coder(), coders.VarIntCoder()]),
+        window_coder)
+    counter_factory = CounterFactory()
+    state_sampler = statesampler.StateSampler('stage', counter_factory)
+    spec = operation_specs.WorkerPartialGroupByKey(
+        pickler.dumps((combiners.CountCombineFn(), [], {})),
+        None,
+        [output_coder])
+    op = operations.PGBKCVOperation(
+        common.NameContext('pgbkcv'), spec, counter_factory, state_sampler,
+        core.Windowing(windowfn))
+    self.collected = _CollectingOperation(
+        'collect', counter_factory, state_sampler)
+    op.add_receiver(self.collected)
+    op.setup()
+    op.start()
+    return op
+
+  def outputs(self):
+    return [element.value for element in self.collected.elements]
+
+  def test_fixed_windows(self):
+    op = self.create_operation(window.FixedWindows(10))
+    for key, timestamp in [('a', 1), ('a', 2), ('a', 15), ('b', 3)]:
+      op.process(WindowedValue(
+          (key, None), timestamp,
+          [window.IntervalWindow(timestamp // 10 * 10,
+                                 timestamp // 10 * 10 + 10)]))
+    op.finish()
+    self.assertEqual(
+        sorted([((element.value[0], element.windows[0].start), element.value[1])
+                for element in self.collected.elements]),
+        [(('a', 0), 2), (('a', 10), 1), (('b', 0), 1)])
+
+  def test_flushes_when_max_bytes_is_reached(self):
+    op = self.create_operation()
+    # Every entry takes a few bytes, so the table holds only a few of them.
+    op.max_bytes = 20
+    for i in range(100):
+      op.process(WindowedValue(('key%d' % i, None), 0, [window.GlobalWindow()]))
+    self.assertGreater(len(self.collected.elements), 0)
+    self.assertGreater(op.flush_counter.value(), 0)
+    self.assertEqual(op.flushed_keys_counter.value(),
+                     len(self.collected.elements))
+    self.assertGreater(op.flushed_bytes_counter.value(), 0)
+    op.finish()
+    self.assertEqual(sorted(self.outputs()),
+                     sorted(('key%d' % i, 1) for i in range(100)))
+
+  def test_flush_keeps_updated_keys(self):
+    op = self.create_operation()
+    op.max_keys = 10
+
+    def process(key):
+      op.process(WindowedValue((key, None), 0, [window.GlobalWindow()]))
+
+    process('hot')
+    for i in range(9):
+      process('cold%d' % i)
+    process('hot')
+    # The table is full, so the first entries are flushed to make room, but
+    # 'hot' was updated since it was added and gets a second chance.
+    process('cold9')
+    self.assertEqual([('cold0', 1)], self.outputs())
+    self.assertEqual(1, op.flush_counter.value())
+    self.assertEqual(1, op.flushed_keys_counter.value())
+    op.finish()
+    self.assertIn(('hot', 2), self.outputs())
+
+
+if __name__ == '__main__':
+  logging.getLogger().setLevel(logging.INFO)
+  unittest.main()
@@ -33,6 +33,7 @@ import traceback
 from builtins import object
 from concurrent import futures
 from typing import TYPE_CHECKING
+from typing import Any
 from typing import Callable
 from typing import DefaultDict
 from typing import Dict
@@ -77,14 +78,18 @@ class SdkHarness(object):
                worker_id=None,  # type: Optional[str]
                # Caching is disabled by default
                state_cache_size=0,
+               # Cached state is not bounded by size by default
+               state_cache_bytes=None,
                # time-based data buffering is disabled by default
                data_buffer_time_limit_ms=0,
+               # Outbound data is bounded by the data plane default if None
+               data_max_bytes_in_flight=None,
                profiler_factory=None  # type: Optional[Callable[..., Profile]]
                ):
     self._alive = True
     self._worker_index = 0
     self._worker_id = worker_id
-    self._state_cache = StateCache(state_cache_size)
+    self._state_cache = StateCache(state_cache_size, state_cache_bytes)
     if credentials is None:
       _LOGGER.info('Creating insecure control channel for %s.', control_address)
       self._control_channel = GRPCChannelFactory.insecure_channel(
@@ -99,7 +104,10 @@ class SdkHarness(object):
     self._control_channel = grpc.intercept_channel(
         self._control_channel, WorkerIdInterceptor(self._worker_id))
     self._data_channel_factory = data_plane.GrpcClientDataChannelFactory(
-        credentials, self._worker_id, data_buffer_time_limit_ms)
+        credentials,
+        self._worker_id,
+        data_buffer_time_limit_ms,
+        data_max_bytes_in_flight)
     self._state_handler_factory = GrpcStateHandlerFactory(self._state_cache,
                                                           credentials)
     self._profiler_factory = profiler_factory
@@ -117,6 +125,11 @@ class SdkHarness(object):
     self._responses = queue.Queue()  # type: queue.Queue[beam_fn_api_pb2.InstructionResponse]
     _LOGGER.info('Initializing SDKHarness with unbounded number of workers.')
 
+  def data_channel_send_stats(self):
+    # type: () -> Dict[str, Dict[str, Any]]
+    """Returns the statistics of the outbound data of each data channel."""
+    return self._data_channel_factory.send_stats()
+
   def run(self):
     control_stub = beam_fn_api_pb2_grpc.BeamFnControlStub(self._control_channel)
     no_more_work = object()
@@ -740,15 +753,20 @@ class CachingStateHandler(object):
     if cached_value is None:
       # Cache miss, need to retrieve from the Runner
       # TODO If caching is enabled, this materializes the entire state.
-      # Further size estimation or the use of the continuation token on the
-      # runner side could fall back to materializing one item at a time.
+      # The use of the continuation token on the runner side could fall back
+      # to materializing one item at a time.
       # https://jira.apache.org/jira/browse/BEAM-8297
-      materialized = cached_value = list(
-          self._materialize_iter(state_key, coder))
+      materialized = cached_value = []
+      weight = 0
+      for data in self._materialize_raw_iter(state_key):
+        # The encoded size is used as the size estimate of the cached value.
+        weight += len(data)
+        materialized.extend(self._decode_iter(data, coder))
       self._state_cache.put(
           cache_state_key,
           self._context.cache_token,
-          materialized)
+          materialized,
+          weight)
     return iter(cached_value)
 
   def extend(self,
@@ -758,14 +776,15 @@ class CachingStateHandler(object):
              is_cached=False
             ):
     # type: (...) -> _Future
+    out = coder_impl.create_OutputStream()
+    for element in elements:
+      coder.encode_to_stream(element, out, True)
     if self._should_be_cached(is_cached):
       # Update the cache
       cache_key = self._convert_to_cache_key(state_key)
-      self._state_cache.extend(cache_key, self._context.cache_token, elements)
+      self._state_cache.extend(
+          cache_key, self._context.cache_token, elements, out.size())
     # Write to state handler
-    out = coder_impl.create_OutputStream()
-    for element in elements:
-      coder.encode_to_stream(element, out, True)
     return self._underlying.append_raw(state_key, out.get())
 
   def clear(self, state_key, is_cached=False):
@@ -782,16 +801,26 @@ class CachingStateHandler(object):
     """Materializes the state lazily, one element at a time.
        :return A generator which returns the next element if advanced.
     """
+    for data in self._materialize_raw_iter(state_key):
+      for element in self._decode_iter(data, coder):
+        yield element
+
+  def _materialize_raw_iter(self, state_key):
+    """Materializes the encoded state lazily, one response at a time."""
     continuation_token = None
     while True:
       data, continuation_token = \
           self._underlying.get_raw(state_key, continuation_token)
-      input_stream = coder_impl.create_InputStream(data)
-      while input_stream.size() > 0:
-        yield coder.decode_from_stream(input_stream, True)
+      yield data
       if not continuation_token:
         break
 
+  @staticmethod
+  def _decode_iter(data, coder):
+    input_stream = coder_impl.create_InputStream(data)
+    while input_stream.size() > 0:
+      yield coder.decode_from_stream(input_stream, True)
+
   def _should_be_cached(self, request_is_cached):
     return (self._state_cache.is_cache_enabled() and
             request_is_cached and
@@ -49,6 +49,22 @@ _LOGGER = logging.getLogger(__name__)
 
 class StatusServer(object):
 
+  def __init__(self):
+    self._harness = None
+
+  def set_harness(self, harness):
+    """Sets the SdkHarness whose data channels are reported."""
+    self._harness = harness
+
+  @classmethod
+  def get_data_channel_status(cls, send_stats):
+    lines = []
+    for url, stats in sorted(send_stats.items()):
+      lines.append('--- Data channel %s ---\n' % url)
+      for name, value in sorted(stats.items()):
+        lines.append('%s: %s\n' % (name, value))
+    return lines
+
   @classmethod
   def get_thread_dump(cls):
     lines = []
@@ -69,16 +85,24 @@ class StatusServer(object):
         Default is 0 which means any free unsecured port
     """
 
+    status_server = self
+
     class StatusHttpHandler(http.server.BaseHTTPRequestHandler):
-      """HTTP handler for serving stacktraces of all threads."""
+      """HTTP handler for serving data channel and thread information."""
 
       def do_GET(self):  # pylint: disable=invalid-name
-        """Return all thread stacktraces information for GET request."""
+        """Return the data channel statistics and all thread stacktraces
+        for GET request."""
         self.send_response(200)
         self.send_header('Content-Type', 'text/plain')
         self.end_headers()
 
-        for line in StatusServer.get_thread_dump():
+        lines = []
+        if status_server._harness is not None:
+          lines.extend(StatusServer.get_data_channel_status(
+              status_server._harness.data_channel_send_stats()))
+        lines.extend(StatusServer.get_thread_dump())
+        for line in lines:
           self.wfile.write(line.encode('utf-8'))
 
       def log_message(self, f, *args):
@@ -115,8 +139,9 @@ def main(unused_argv):
     fn_log_handler = None
 
   # Start status HTTP server thread.
+  status_server = StatusServer()
   thread = threading.Thread(name='status_http_server',
-                            target=StatusServer().start)
+                            target=status_server.start)
   thread.daemon = True
   thread.setName('status-server-demon')
   thread.start()
@@ -150,15 +175,20 @@ def main(unused_argv):
                       service_descriptor)
     # TODO(robertwb): Support credentials.
     assert not service_descriptor.oauth2_client_credentials_grant.url
-    SdkHarness(
+    harness = SdkHarness(
         control_address=service_descriptor.url,
         worker_id=_worker_id,
         state_cache_size=_get_state_cache_size(sdk_pipeline_options),
+        state_cache_bytes=_get_state_cache_bytes(sdk_pipeline_options),
         data_buffer_time_limit_ms=_get_data_buffer_time_limit_ms(
             sdk_pipeline_options),
+        data_max_bytes_in_flight=_get_data_max_bytes_in_flight(
+            sdk_pipeline_options),
         profiler_factory=profiler.Profile.factory_from_options(
             sdk_pipeline_options.view_as(ProfilingOptions))
-    ).run()
+    )
+    status_server.set_harness(harness)
+    harness.run()
     _LOGGER.info('Python sdk harness exiting.')
   except:  # pylint: disable=broad-except
     _LOGGER.exception('Python sdk harness failed: ')
@@ -205,6 +235,31 @@ def _get_state_cache_size(pipeline_options):
   return 0
 
 
+def _get_state_cache_bytes(pipeline_options):
+  """Defines the upper total size in bytes of the state items to cache.
+
+  The size of a cached item is estimated by the size of its encoded elements.
+  The maximum number of items is still bounded by state_cache_size.
+
+  Note: state_cache_bytes is an experimental flag and might not be available in
+  future releases.
+
+  Returns:
+    an int indicating the maximum total size of cached items in bytes.
+      Default is None (unbounded)
+  """
+  experiments = pipeline_options.view_as(DebugOptions).experiments
+  experiments = experiments if experiments else []
+
+  for experiment in experiments:
+    # There should only be 1 match so returning from the loop
+    if re.match(r'state_cache_bytes=', experiment):
+      return int(
+          re.match(r'state_cache_bytes=(?P<state_cache_bytes>.*)',
+                   experiment).group('state_cache_bytes'))
+  return None
+
+
 def _get_data_buffer_time_limit_ms(pipeline_options):
   """Defines the time limt of the outbound data buffering.
 
@@ -228,6 +283,29 @@ def _get_data_buffer_time_limit_ms(pipeline_options):
   return 0
 
 
+def _get_data_max_bytes_in_flight(pipeline_options):
+  """Defines the limit on outbound data queued for sending to the runner.
+
+  Note: data_max_bytes_in_flight is an experimental flag and might
+  not be available in future releases.
+
+  Returns:
+    an int indicating the maximum number of bytes of outbound data waiting
+      to be sent, 0 for no limit, or None to use the data plane default.
+  """
+  experiments = pipeline_options.view_as(DebugOptions).experiments
+  experiments = experiments if experiments else []
+
+  for experiment in experiments:
+    # There should only be 1 match so returning from the loop
+    if re.match(r'data_max_bytes_in_flight=', experiment):
+      return int(
+          re.match(
+              r'data_max_bytes_in_flight=(?P<data_max_bytes_in_flight>.*)',
+              experiment).group('data_max_bytes_in_flight'))
+  return None
+
+
 def _load_main_session(semi_persistent_directory):
   """Loads a pickled main session from the path specified."""
   if semi_persistent_directory:
@@ -23,10 +23,14 @@ from __future__ import division
 from __future__ import print_function
 
 import logging
+import threading
+import time
 import unittest
 
 # patches unittest.TestCase to be python3 compatible
 import future.tests.base  # pylint: disable=unused-import
+import mock
+from future.moves.urllib.request import urlopen
 
 from apache_beam.options.pipeline_options import PipelineOptions
 from apache_beam.runners.worker import sdk_worker_main
@@ -57,6 +61,28 @@ class SdkWorkerMainTest(unittest.TestCase):
 
     wrapped_method_for_test()
 
+  def test_status_server_data_channels(self):
+    harness = mock.Mock()
+    harness.data_channel_send_stats.return_value = {
+        'localhost:1234': {'queue_depth': 3, 'bytes_in_flight': 100}}
+    server = sdk_worker_main.StatusServer()
+    server.set_harness(harness)
+    thread = threading.Thread(target=server.start)
+    thread.daemon = True
+    thread.start()
+    while not hasattr(server, 'httpd'):
+      time.sleep(0.01)
+    try:
+      status = urlopen(
+          'http://localhost:%s' % server.httpd.server_port).read().decode()
+    finally:
+      server.httpd.shutdown()
+    self.assertIn(
+        '--- Data channel localhost:1234 ---\n'
+        'bytes_in_flight: 100\n'
+        'queue_depth: 3\n', status)
+    self.assertIn('--- Thread #', status)
+
   def test_parse_pipeline_options(self):
     expected_options = PipelineOptions([])
     expected_options.view_as(
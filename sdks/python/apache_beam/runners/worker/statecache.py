@@ -46,14 +46,15 @@ class Metrics(object):
       return # Already initialized
     self._context.metrics = collections.defaultdict(int)
 
-  def count(self, name):
-    self._context.metrics[name] += 1
+  def count(self, name, value=1):
+    self._context.metrics[name] += value
 
   def hit_miss(self, total_name, hit_miss_name):
     self._context.metrics[total_name] += 1
     self._context.metrics[hit_miss_name] += 1
 
-  def get_monitoring_infos(self, cache_size, cache_capacity):
+  def get_monitoring_infos(self, cache_size, cache_capacity,
+                           cache_weight=None, cache_weight_capacity=None):
     """Returns the metrics scoped to the current bundle."""
     metrics = self._context.metrics
     if len(metrics) == 0:
@@ -70,6 +71,11 @@ class Metrics(object):
                                                cache_size))
     gauges.append(monitoring_infos.int64_gauge(self.PREFIX + 'capacity',
                                                cache_capacity))
+    if cache_weight_capacity is not None:
+      gauges.append(monitoring_infos.int64_gauge(self.PREFIX + 'bytes',
+                                                 cache_weight))
+      gauges.append(monitoring_infos.int64_gauge(
+          self.PREFIX + 'capacity_bytes', cache_weight_capacity))
     # Counters for the summary across all metrics
     counters = [monitoring_infos.int64_counter(self.PREFIX + name + '_total',
                                                val)
@@ -98,6 +104,12 @@ class Metrics(object):
 
     return decorator
 
+  @staticmethod
+  def register(metric_name):
+    """Registers a metric which is updated explicitly via count()."""
+    Metrics.ALL_METRICS.add(metric_name)
+    return metric_name
+
   @staticmethod
   def counter(metric_name):
     """Decorator for counting function calls."""
@@ -129,15 +141,23 @@ class StateCache(object):
            if the currently stored cache_token matches the provided
     d) evict a cached element (evict)
 
+  Writes may pass the weight of the cached value, i.e. its estimated size in
+  bytes. If max_weight is set, least recently used entries are also evicted
+  while the total weight of the cache exceeds it.
+
   The operations on the cache are thread-safe for use by multiple workers.
 
   :arg max_entries The maximum number of entries to store in the cache.
-  TODO Memory-based caching: https://issues.apache.org/jira/browse/BEAM-8297
+  :arg max_weight The maximum total weight (in bytes) of all entries stored in
+    the cache, or None to only bound the number of entries.
   """
 
-  def __init__(self, max_entries):
-    _LOGGER.info('Creating state cache with size %s', max_entries)
-    self._cache = self.LRUCache(max_entries, (None, None))
+  EVICTED_BYTES = Metrics.register("evicted_bytes")
+
+  def __init__(self, max_entries, max_weight=None):
+    _LOGGER.info('Creating state cache with size %s and weight %s',
+                 max_entries, max_weight)
+    self._cache = self.LRUCache(max_entries, (None, None), max_weight)
     self._lock = threading.RLock()
     self._metrics = Metrics()
 
@@ -149,13 +169,14 @@ class StateCache(object):
     return value if token == cache_token else None
 
   @Metrics.counter("put")
-  def put(self, state_key, cache_token, value):
+  def put(self, state_key, cache_token, value, weight=0):
     assert cache_token and self.is_cache_enabled()
     with self._lock:
-      return self._cache.put(state_key, (cache_token, value))
+      self._count_evicted(
+          self._cache.put(state_key, (cache_token, value), weight))
 
   @Metrics.counter("extend")
-  def extend(self, state_key, cache_token, elements):
+  def extend(self, state_key, cache_token, elements, weight=0):
     assert cache_token and self.is_cache_enabled()
     with self._lock:
       token, value = self._cache.get(state_key)
@@ -163,7 +184,9 @@ class StateCache(object):
         if value is None:
           value = []
         value.extend(elements)
-        self._cache.put(state_key, (cache_token, value))
+        self._count_evicted(self._cache.put(
+            state_key, (cache_token, value),
+            self._cache.weight(state_key) + weight))
       else:
         # Discard cached state if tokens do not match
         self.evict(state_key)
@@ -189,6 +212,10 @@ class StateCache(object):
     with self._lock:
       self._cache.evict_all()
 
+  def _count_evicted(self, evicted_weight):
+    if evicted_weight:
+      self._metrics.count(self.EVICTED_BYTES, evicted_weight)
+
   def initialize_metrics(self):
     self._metrics.initialize()
 
@@ -198,19 +225,27 @@ class StateCache(object):
   def size(self):
     return len(self._cache)
 
+  def weight(self):
+    return self._cache.total_weight()
+
   def get_monitoring_infos(self):
     """Retrieves the monitoring infos and resets the counters."""
     with self._lock:
       size = len(self._cache)
+      weight = self._cache.total_weight()
     capacity = self._cache._max_entries
-    return self._metrics.get_monitoring_infos(size, capacity)
+    return self._metrics.get_monitoring_infos(
+        size, capacity, weight, self._cache._max_weight)
 
   class LRUCache(object):
 
-    def __init__(self, max_entries, default_entry):
+    def __init__(self, max_entries, default_entry, max_weight=None):
       self._max_entries = max_entries
+      self._max_weight = max_weight
       self._default_entry = default_entry
       self._cache = collections.OrderedDict()
+      self._weights = {}
+      self._total_weight = 0
 
     def get(self, key):
       value = self._cache.pop(key, self._default_entry)
@@ -218,16 +253,35 @@ class StateCache(object):
         self._cache[key] = value
       return value
 
-    def put(self, key, value):
+    def weight(self, key):
+      return self._weights.get(key, 0)
+
+    def total_weight(self):
+      return self._total_weight
+
+    def put(self, key, value, weight=0):
+      """Stores the value and returns the weight of the evicted entries."""
+      self.evict(key)
       self._cache[key] = value
-      while len(self._cache) > self._max_entries:
-        self._cache.popitem(last=False)
+      self._weights[key] = weight
+      self._total_weight += weight
+      evicted_weight = 0
+      while (len(self._cache) > self._max_entries
+             or (self._max_weight is not None
+                 and self._total_weight > self._max_weight)):
+        evicted_key, _ = self._cache.popitem(last=False)
+        evicted_weight += self._weights[evicted_key]
+        self._total_weight -= self._weights.pop(evicted_key)
+      return evicted_weight
 
     def evict(self, key):
       self._cache.pop(key, self._default_entry)
+      self._total_weight -= self._weights.pop(key, 0)
 
     def evict_all(self):
       self._cache.clear()
+      self._weights.clear()
+      self._total_weight = 0
 
     def __len__(self):
       return len(self._cache)
@@ -39,6 +39,7 @@ class StateCacheTest(unittest.TestCase):
     self.verify_metrics(cache, {'get': 1, 'put': 0, 'extend': 0,
                                 'miss': 1, 'hit': 0, 'clear': 0,
                                 'evict': 0,
+                                'evicted_bytes': 0,
                                 'size': 0, 'capacity': 5})
 
   def test_put_get(self):
@@ -52,6 +53,7 @@ class StateCacheTest(unittest.TestCase):
     self.verify_metrics(cache, {'get': 2, 'put': 1, 'extend': 0,
                                 'miss': 1, 'hit': 1, 'clear': 0,
                                 'evict': 0,
+                                'evicted_bytes': 0,
                                 'size': 1, 'capacity': 5})
 
   def test_overwrite(self):
@@ -64,6 +66,7 @@ class StateCacheTest(unittest.TestCase):
     self.verify_metrics(cache, {'get': 2, 'put': 2, 'extend': 0,
                                 'miss': 1, 'hit': 1, 'clear': 0,
                                 'evict': 0,
+                                'evicted_bytes': 0,
                                 'size': 1, 'capacity': 2})
 
   def test_extend(self):
@@ -85,6 +88,7 @@ class StateCacheTest(unittest.TestCase):
     self.verify_metrics(cache, {'get': 3, 'put': 1, 'extend': 3,
                                 'miss': 1, 'hit': 2, 'clear': 0,
                                 'evict': 1,
+                                'evicted_bytes': 0,
                                 'size': 1, 'capacity': 3})
 
   def test_clear(self):
@@ -106,6 +110,7 @@ class StateCacheTest(unittest.TestCase):
     self.verify_metrics(cache, {'get': 5, 'put': 1, 'extend': 0,
                                 'miss': 3, 'hit': 2, 'clear': 3,
                                 'evict': 1,
+                                'evicted_bytes': 0,
                                 'size': 2, 'capacity': 5})
 
   def test_max_size(self):
@@ -120,6 +125,7 @@ class StateCacheTest(unittest.TestCase):
     self.verify_metrics(cache, {'get': 0, 'put': 4, 'extend': 0,
                                 'miss': 0, 'hit': 0, 'clear': 0,
                                 'evict': 0,
+                                'evicted_bytes': 0,
                                 'size': 2, 'capacity': 2})
 
   def test_evict_all(self):
@@ -134,6 +140,7 @@ class StateCacheTest(unittest.TestCase):
     self.verify_metrics(cache, {'get': 2, 'put': 2, 'extend': 0,
                                 'miss': 2, 'hit': 0, 'clear': 0,
                                 'evict': 0,
+                                'evicted_bytes': 0,
                                 'size': 0, 'capacity': 5})
 
   def test_lru(self):
@@ -178,8 +185,52 @@ class StateCacheTest(unittest.TestCase):
     self.verify_metrics(cache, {'get': 10, 'put': 11, 'extend': 1,
                                 'miss': 5, 'hit': 5, 'clear': 0,
                                 'evict': 0,
+                                'evicted_bytes': 0,
                                 'size': 5, 'capacity': 5})
 
+  def test_max_weight(self):
+    cache = self.get_cache(5, max_weight=10)
+    cache.put("key", "cache_token", "value", 4)
+    cache.put("key2", "cache_token", "value2", 4)
+    self.assertEqual(cache.size(), 2)
+    self.assertEqual(cache.weight(), 8)
+    # make "key" the most recently used entry
+    self.assertEqual(cache.get("key", "cache_token"), "value")
+    cache.put("key3", "cache_token", "value3", 4)
+    # least recently used key should be gone ("key2")
+    self.assertEqual(cache.size(), 2)
+    self.assertEqual(cache.weight(), 8)
+    self.assertEqual(cache.get("key2", "cache_token"), None)
+    # an overwrite replaces the weight of the entry
+    cache.put("key3", "cache_token", ["value3"], 1)
+    self.assertEqual(cache.weight(), 5)
+    # an extend adds to the weight of the entry
+    cache.extend("key3", "cache_token", ["another"], 6)
+    self.assertEqual(cache.size(), 1)
+    self.assertEqual(cache.weight(), 7)
+    self.assertEqual(cache.get("key", "cache_token"), None)
+    cache.evict("key3")
+    self.assertEqual(cache.weight(), 0)
+    self.verify_metrics(cache, {'get': 3, 'put': 4, 'extend': 1,
+                                'miss': 2, 'hit': 1, 'clear': 0,
+                                'evict': 1,
+                                'evicted_bytes': 8,
+                                'size': 0, 'capacity': 5,
+                                'bytes': 0, 'capacity_bytes': 10})
+
+  def test_weight_exceeding_capacity(self):
+    cache = self.get_cache(5, max_weight=10)
+    cache.put("key", "cache_token", "value", 2)
+    cache.put("key2", "cache_token", "value2", 20)
+    self.assertEqual(cache.size(), 0)
+    self.assertEqual(cache.weight(), 0)
+    self.verify_metrics(cache, {'get': 0, 'put': 2, 'extend': 0,
+                                'miss': 0, 'hit': 0, 'clear': 0,
+                                'evict': 0,
+                                'evicted_bytes': 22,
+                                'size': 0, 'capacity': 5,
+                                'bytes': 0, 'capacity_bytes': 10})
+
   def test_is_cached_enabled(self):
     cache = self.get_cache(1)
     self.assertEqual(cache.is_cache_enabled(), True)
@@ -199,11 +250,8 @@ class StateCacheTest(unittest.TestCase):
     self.assertDictEqual(metrics, expected_metrics)
     # Metrics and total metrics should be identical for a single bundle.
     # The following two gauges are not part of the total metrics:
-    try:
-      del metrics['capacity']
-      del metrics['size']
-    except KeyError:
-      pass
+    for gauge in ('capacity', 'size', 'bytes', 'capacity_bytes'):
+      metrics.pop(gauge, None)
     total_metrics = {
         info.urn.rsplit(':', 1)[1].rsplit("_total")[0]:
         info.metric.counter_data.int64_value
@@ -213,8 +261,8 @@ class StateCacheTest(unittest.TestCase):
     self.assertDictEqual(metrics, total_metrics)
 
   @staticmethod
-  def get_cache(size):
-    cache = StateCache(size)
+  def get_cache(size, max_weight=None):
+    cache = StateCache(size, max_weight)
     cache.initialize_metrics()
     return cache
 
@@ -43,8 +43,10 @@ from past.builtins import unicode
 
 from apache_beam.coders import proto2_coder_test_messages_pb2 as test_message
 from apache_beam.coders import coders
+from apache_beam.coders import typecoders
 from apache_beam.tools import utils
 from apache_beam.transforms import window
+from apache_beam.typehints import typehints
 from apache_beam.utils import windowed_value
 
 
@@ -180,8 +182,6 @@ def run_coder_benchmarks(
     num_runs, input_size, seed, verbose, filter_regex='.*'):
   random.seed(seed)
 
-  # TODO(BEAM-4441): Pick coders using type hints, for example:
-  # tuple_coder = typecoders.registry.get_coder(typing.Tuple[int, ...])
   benchmarks = [
       coder_benchmark_factory(
           coders.FastPrimitivesCoder(), small_int),
@@ -245,6 +245,24 @@ def run_coder_benchmarks(
           coders.LengthPrefixCoder(coders.FastPrimitivesCoder()),
           small_int)
   ]
+  # The same inputs encoded with the coders the registry picks from their
+  # type hints, to compare against FastPrimitivesCoder above.
+  benchmarks += [
+      coder_benchmark_factory(typecoders.registry.get_coder(hint), generate_fn)
+      for hint, generate_fn in [
+          (int, small_int),
+          (int, large_int),
+          (unicode, small_string),
+          (unicode, large_string),
+          (typehints.List[int], small_list),
+          (typehints.List[bool], large_list),
+          (typehints.Tuple[int, int], small_tuple),
+          (typehints.Tuple[bool, ...], large_tuple),
+          (typehints.Dict[int, int], small_dict),
+          (typehints.Dict[bool, bool], large_dict),
+          (typehints.Optional[int], small_int),
+      ]
+  ]
 
   suite = [utils.BenchmarkConfig(b, input_size, num_runs) for b in benchmarks
            if re.search(filter_regex, b.__name__, flags=re.I)]
@@ -23,6 +23,7 @@ from __future__ import absolute_import
 from __future__ import division
 
 import heapq
+import math
 import operator
 import random
 import sys
@@ -97,6 +98,13 @@ class MeanCombineFn(core.CombineFn):
     (sum_, count) = sum_count
     return sum_ + element, count + 1
 
+  def add_inputs(self, sum_count, elements):
+    (sum_, count) = sum_count
+    for element in elements:
+      sum_ += element
+      count += 1
+    return sum_, count
+
   def merge_accumulators(self, accumulators):
     sums, counts = zip(*accumulators)
     return sum(sums), sum(counts)
@@ -649,6 +657,88 @@ class Sample(object):
       return 'FixedSizePerKey(%d)' % self._n
 
 
+class _Reservoir(object):
+  """A uniform sample of at most n of the elements added so far.
+
+  Once the sample is full, elements are added with Li's Algorithm L, which
+  draws how many elements to skip before the next one that goes in, so that
+  skipped elements cost a comparison of counts.
+  """
+
+  def __init__(self, n, count=0, items=None):
+    self.n = n
+    self.count = count
+    self.items = [] if items is None else items
+    self._threshold = None
+    self._next = None
+    if len(self.items) == n and n:
+      # The largest of the random keys of the sampled elements, which is the
+      # n-th smallest of count uniform random numbers.
+      self._threshold = random.betavariate(n, count - n + 1)
+      self._skip()
+
+  def _skip(self):
+    # The 1-based position of the next element to go in the sample.
+    self._next = self.count + 1 + int(
+        math.log(1.0 - random.random()) / math.log1p(-self._threshold))
+
+  def _replace(self, element):
+    self.items[random.randrange(self.n)] = element
+    self._threshold *= math.exp(math.log(1.0 - random.random()) / self.n)
+    self._skip()
+
+  def add(self, element):
+    self.count += 1
+    if self._next is None:
+      if len(self.items) < self.n:
+        self.items.append(element)
+        if len(self.items) == self.n:
+          self._threshold = math.exp(math.log(1.0 - random.random()) / self.n)
+          self._skip()
+    elif self.count == self._next:
+      self._replace(element)
+
+  def add_all(self, elements):
+    if not isinstance(elements, (list, tuple)):
+      for element in elements:
+        self.add(element)
+      return
+    position = 0
+    while position < len(elements) and self._next is None:
+      self.add(elements[position])
+      position += 1
+    if self._next is None:
+      return
+    # Jump straight to the elements that go in the sample.
+    offset = self.count - position
+    end = offset + len(elements)
+    while self._next <= end:
+      self.count = self._next
+      self._replace(elements[self.count - offset - 1])
+    self.count = end
+
+  def merge(self, other):
+    """Returns a uniform sample of the elements added to both reservoirs."""
+    if not other.count:
+      return self
+    elif not self.count:
+      return other
+    # Draw from the union of both populations, without replacement, taking
+    # each draw from one of the samples at random. A sample of a population
+    # is a random subset of it, so its items can be taken in shuffled order.
+    items = [self.items[:], other.items[:]]
+    random.shuffle(items[0])
+    random.shuffle(items[1])
+    remaining = [self.count, other.count]
+    merged = []
+    for _ in range(min(self.n, self.count + other.count)):
+      side = int(
+          random.random() * (remaining[0] + remaining[1]) >= remaining[0])
+      remaining[side] -= 1
+      merged.append(items[side].pop())
+    return _Reservoir(self.n, self.count + other.count, merged)
+
+
 @with_input_types(T)
 @with_output_types(List[T])
 class SampleCombineFn(core.CombineFn):
@@ -656,30 +746,31 @@ class SampleCombineFn(core.CombineFn):
 
   def __init__(self, n):
     super(SampleCombineFn, self).__init__()
-    # Most of this combiner's work is done by a TopCombineFn. We could just
-    # subclass TopCombineFn to make this class, but since sampling is not
-    # really a kind of Top operation, we use a TopCombineFn instance as a
-    # helper instead.
-    self._top_combiner = TopCombineFn(n)
+    self._n = n
 
   def create_accumulator(self):
-    return self._top_combiner.create_accumulator()
+    return _Reservoir(self._n)
 
-  def add_input(self, heap, element):
-    # Before passing elements to the Top combiner, we pair them with random
-    # numbers. The elements with the n largest random number "keys" will be
-    # selected for the output.
-    return self._top_combiner.add_input(heap, (random.random(), element))
+  def add_input(self, reservoir, element):
+    reservoir.add(element)
+    return reservoir
 
-  def merge_accumulators(self, heaps):
-    return self._top_combiner.merge_accumulators(heaps)
+  def add_inputs(self, reservoir, elements):
+    reservoir.add_all(elements)
+    return reservoir
 
-  def compact(self, heap):
-    return self._top_combiner.compact(heap)
+  def merge_accumulators(self, reservoirs):
+    reservoirs = iter(reservoirs)
+    merged = next(reservoirs)
+    for reservoir in reservoirs:
+      merged = merged.merge(reservoir)
+    return merged
 
-  def extract_output(self, heap):
-    # Here we strip off the random number keys we added in add_input.
-    return [e for _, e in self._top_combiner.extract_output(heap)]
+  def extract_output(self, reservoir):
+    # Elements that filled the sample keep their input order, so shuffle.
+    sample = reservoir.items[:]
+    random.shuffle(sample)
+    return sample
 
 
 class _TupleCombineFnBase(core.CombineFn):
@@ -818,6 +909,9 @@ class _CurriedFn(core.CombineFn):
   def add_input(self, accumulator, element):
     return self.fn.add_input(accumulator, element, *self.args, **self.kwargs)
 
+  def add_inputs(self, accumulator, elements):
+    return self.fn.add_inputs(accumulator, elements, *self.args, **self.kwargs)
+
   def merge_accumulators(self, accumulators):
     return self.fn.merge_accumulators(accumulators, *self.args, **self.kwargs)
 
@@ -41,6 +41,7 @@ from apache_beam.testing.test_stream import TestStream
 from apache_beam.testing.util import assert_that
 from apache_beam.testing.util import equal_to
 from apache_beam.testing.util import equal_to_per_window
+from apache_beam.transforms import cy_combiners
 from apache_beam.transforms import trigger
 from apache_beam.transforms import window
 from apache_beam.transforms.core import CombineGlobally
@@ -116,6 +117,24 @@ class CombineTest(unittest.TestCase):
     assert_that(result_key_count, equal_to([('a', size)]), label='key:size')
     pipeline.run()
 
+  def test_add_inputs(self):
+    vals = [6, 3, 1, 1, 9, 1, 5, 2, 0, 6]
+    for combine_fn in [
+        combine.MeanCombineFn(), combine.CountCombineFn(),
+        cy_combiners.CountCombineFn(), cy_combiners.SumInt64Fn(),
+        cy_combiners.MinInt64Fn(), cy_combiners.MaxInt64Fn(),
+        cy_combiners.MeanInt64Fn(), cy_combiners.DistributionInt64Fn(),
+        cy_combiners.SumFloatFn(), cy_combiners.MinFloatFn(),
+        cy_combiners.MaxFloatFn(), cy_combiners.MeanFloatFn(),
+        cy_combiners.AnyCombineFn(), cy_combiners.AllCombineFn()]:
+      expected = combine_fn.create_accumulator()
+      for val in vals:
+        expected = combine_fn.add_input(expected, val)
+      actual = combine_fn.add_inputs(combine_fn.create_accumulator(), vals[:4])
+      actual = combine_fn.add_inputs(actual, iter(vals[4:]))
+      self.assertEqual(combine_fn.extract_output(actual),
+                       combine_fn.extract_output(expected))
+
   def test_top(self):
     pipeline = TestPipeline()
 
@@ -345,6 +364,28 @@ class CombineTest(unittest.TestCase):
     assert_that(result, matcher())
     pipeline.run()
 
+  def test_sample_combine_fn(self):
+    combine_fn = combine.SampleCombineFn(10)
+    counts = [0] * 100
+    for _ in range(1000):
+      accumulators = [
+          combine_fn.add_inputs(combine_fn.create_accumulator(),
+                                list(range(0, 5))),
+          combine_fn.add_inputs(combine_fn.create_accumulator(),
+                                iter(range(5, 60))),
+          combine_fn.create_accumulator()]
+      accumulator = combine_fn.add_inputs(
+          combine_fn.merge_accumulators(accumulators), list(range(60, 90)))
+      for element in range(90, 100):
+        accumulator = combine_fn.add_input(accumulator, element)
+      sample = combine_fn.extract_output(accumulator)
+      self.assertEqual(len(set(sample)), 10)
+      for element in sample:
+        counts[element] += 1
+    # Each element is sampled 100 times on average.
+    self.assertLess(max(counts), 170)
+    self.assertGreater(min(counts), 40)
+
   def test_tuple_combine_fn(self):
     with TestPipeline() as p:
       result = (
@@ -841,7 +841,9 @@ class CombineFn(WithTypeHints, HasDisplayData, urns.RunnerApiFn):
 
     This is provided in case the implementation affords more efficient
     bulk addition of elements. The default implementation simply loops
-    over the inputs invoking add_input for each one.
+    over the inputs invoking add_input for each one. If it is overridden,
+    lifted combiners buffer the values of each key and add them with
+    add_inputs, in lists.
 
     Args:
       mutable_accumulator: the current accumulator,
@@ -24,6 +24,7 @@ cdef double _NEG_INF, _POS_INF, _NAN
 cdef class CountAccumulator(object):
   cdef readonly int64_t value
   cpdef add_input(self, unused_element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=CountAccumulator)
   cpdef merge(self, accumulators)
 
@@ -31,12 +32,14 @@ cdef class CountAccumulator(object):
 cdef class SumInt64Accumulator(object):
   cdef readonly int64_t value
   cpdef add_input(self, int64_t element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=SumInt64Accumulator)
   cpdef merge(self, accumulators)
 
 cdef class MinInt64Accumulator(object):
   cdef readonly int64_t value
   cpdef add_input(self, int64_t element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=MinInt64Accumulator)
   cpdef merge(self, accumulators)
 
@@ -44,6 +47,7 @@ cdef class MinInt64Accumulator(object):
 cdef class MaxInt64Accumulator(object):
   cdef readonly int64_t value
   cpdef add_input(self, int64_t element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=MaxInt64Accumulator)
   cpdef merge(self, accumulators)
 
@@ -52,6 +56,7 @@ cdef class MeanInt64Accumulator(object):
   cdef readonly int64_t sum
   cdef readonly int64_t count
   cpdef add_input(self, int64_t element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=MeanInt64Accumulator)
   cpdef merge(self, accumulators)
 
@@ -62,6 +67,7 @@ cdef class DistributionInt64Accumulator(object):
   cdef readonly int64_t min
   cdef readonly int64_t max
   cpdef add_input(self, int64_t element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=DistributionInt64Accumulator)
   cpdef merge(self, accumulators)
 
@@ -69,6 +75,7 @@ cdef class DistributionInt64Accumulator(object):
 cdef class SumDoubleAccumulator(object):
   cdef readonly double value
   cpdef add_input(self, double element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=SumDoubleAccumulator)
   cpdef merge(self, accumulators)
 
@@ -76,6 +83,7 @@ cdef class SumDoubleAccumulator(object):
 cdef class MinDoubleAccumulator(object):
   cdef readonly double value
   cpdef add_input(self, double element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=MinDoubleAccumulator)
   cpdef merge(self, accumulators)
 
@@ -83,6 +91,7 @@ cdef class MinDoubleAccumulator(object):
 cdef class MaxDoubleAccumulator(object):
   cdef readonly double value
   cpdef add_input(self, double element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=MaxDoubleAccumulator)
   cpdef merge(self, accumulators)
 
@@ -91,6 +100,7 @@ cdef class MeanDoubleAccumulator(object):
   cdef readonly double sum
   cdef readonly int64_t count
   cpdef add_input(self, double element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=MeanDoubleAccumulator)
   cpdef merge(self, accumulators)
 
@@ -98,6 +108,7 @@ cdef class MeanDoubleAccumulator(object):
 cdef class AllAccumulator(object):
   cdef readonly bint value
   cpdef add_input(self, bint element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=AllAccumulator)
   cpdef merge(self, accumulators)
 
@@ -105,6 +116,7 @@ cdef class AllAccumulator(object):
 cdef class AnyAccumulator(object):
   cdef readonly bint value
   cpdef add_input(self, bint element)
+  cpdef add_inputs(self, elements)
   @cython.locals(accumulator=AnyAccumulator)
   cpdef merge(self, accumulators)
 
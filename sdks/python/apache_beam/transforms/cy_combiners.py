@@ -48,6 +48,11 @@ class AccumulatorCombineFn(core.CombineFn):
     accumulator.add_input(element)
     return accumulator
 
+  @staticmethod
+  def add_inputs(accumulator, elements):
+    accumulator.add_inputs(elements)
+    return accumulator
+
   def merge_accumulators(self, accumulators):
     accumulator = self._accumulator_type()
     accumulator.merge(accumulators)
@@ -81,6 +86,10 @@ class CountAccumulator(object):
   def add_input(self, unused_element):
     self.value += 1
 
+  def add_inputs(self, elements):
+    for unused_element in elements:
+      self.value += 1
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       self.value += accumulator.value
@@ -100,6 +109,10 @@ class SumInt64Accumulator(object):
       raise OverflowError(element)
     self.value += element
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       self.value += accumulator.value
@@ -123,6 +136,10 @@ class MinInt64Accumulator(object):
     if element < self.value:
       self.value = element
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       if accumulator.value < self.value:
@@ -143,6 +160,10 @@ class MaxInt64Accumulator(object):
     if element > self.value:
       self.value = element
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       if accumulator.value > self.value:
@@ -164,6 +185,10 @@ class MeanInt64Accumulator(object):
     self.sum += element
     self.count += 1
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       self.sum += accumulator.sum
@@ -193,6 +218,10 @@ class DistributionInt64Accumulator(object):
     self.min = min(self.min, element)
     self.max = max(self.max, element)
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       self.sum += accumulator.sum
@@ -246,6 +275,10 @@ class SumDoubleAccumulator(object):
     element = float(element)
     self.value += element
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       self.value += accumulator.value
@@ -263,6 +296,10 @@ class MinDoubleAccumulator(object):
     if element < self.value:
       self.value = element
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       if accumulator.value < self.value:
@@ -281,6 +318,10 @@ class MaxDoubleAccumulator(object):
     if element > self.value:
       self.value = element
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       if accumulator.value > self.value:
@@ -300,6 +341,10 @@ class MeanDoubleAccumulator(object):
     self.sum += element
     self.count += 1
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       self.sum += accumulator.sum
@@ -332,6 +377,10 @@ class AllAccumulator(object):
   def add_input(self, element):
     self.value &= not not element
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       self.value &= accumulator.value
@@ -347,6 +396,10 @@ class AnyAccumulator(object):
   def add_input(self, element):
     self.value |= not not element
 
+  def add_inputs(self, elements):
+    for element in elements:
+      self.add_input(element)
+
   def merge(self, accumulators):
     for accumulator in accumulators:
       self.value |= accumulator.value
@@ -375,6 +428,12 @@ class DataflowDistributionCounterFn(AccumulatorCombineFn):
   """
   _accumulator_type = DataflowDistributionCounter
 
+  @staticmethod
+  def add_inputs(accumulator, elements):
+    for element in elements:
+      accumulator.add_input(element)
+    return accumulator
+
 
 class ComparableValue(object):
   """A way to allow comparing elements in a rich fashion."""
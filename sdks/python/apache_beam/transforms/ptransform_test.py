@@ -501,6 +501,18 @@ class PTransformTest(unittest.TestCase):
     assert_that(result, equal_to([(1, [1, 2, 3]), (2, [1, 2]), (3, [1])]))
     pipeline.run()
 
+  def test_group_by_key_with_dict_keys(self):
+    pipeline = TestPipeline()
+    pcoll = pipeline | 'start' >> beam.Create(
+        [({'a': 1, 'b': 2}, 1), ({'a': 1, 'b': 2}, 2), ({'a': 1}, 3)])
+    result = (pcoll
+              | 'Group' >> beam.GroupByKey()
+              | 'SortKeys' >> beam.MapTuple(
+                  lambda k, vs: (sorted(k.items()), sorted(vs))))
+    assert_that(result, equal_to([([('a', 1), ('b', 2)], [1, 2]),
+                                  ([('a', 1)], [3])]))
+    pipeline.run()
+
   def test_group_by_key_reiteration(self):
     class MyDoFn(beam.DoFn):
       def process(self, gbk_result):
@@ -355,6 +355,79 @@ class ApproximateUniqueTest(unittest.TestCase):
     pipeline.run()
 
 
+class HllCountTest(unittest.TestCase):
+  """Unit tests for HllCount. Its hash is the same in every process, so the
+  estimates are deterministic."""
+
+  def test_hll_count_invalid_precision(self):
+    for precision in [3, 21, 10.0]:
+      with self.assertRaises(ValueError) as e:
+        beam.HllCount.Init.Globally(precision=precision)
+      self.assertEqual(
+          e.exception.args[0],
+          beam.HllCount._INPUT_PRECISION_ERR_MSG % (4, 20, precision))
+
+  def test_hll_count_globally(self):
+    precision = 12
+    max_err = 3 * 1.04 / math.sqrt(2 ** precision)
+    with TestPipeline() as pipeline:
+      small = (pipeline
+               | 'create_small' >> beam.Create(list(range(100)) * 3)
+               | 'init_small' >> beam.HllCount.Init.Globally(precision)
+               | 'extract_small' >> beam.HllCount.Extract.Globally()
+               | 'compare_small' >> beam.Map(lambda x: abs(x - 100) <= 2))
+      large = (pipeline
+               | 'create_large' >> beam.Create(range(20000))
+               | 'init_large' >> beam.HllCount.Init.Globally(precision)
+               | 'extract_large' >> beam.HllCount.Extract.Globally()
+               | 'compare_large'
+               >> beam.Map(lambda x: abs(x - 20000) / 20000 <= max_err))
+      assert_that(small, equal_to([True]), label='assert:small')
+      assert_that(large, equal_to([True]), label='assert:large')
+
+  def test_hll_count_merge_partial_per_key(self):
+    precision = 12
+    max_err = 3 * 1.04 / math.sqrt(2 ** precision)
+    expected = {'a': 15000, 'b': 20}
+    with TestPipeline() as pipeline:
+      first = (pipeline
+               | 'create_first'
+               >> beam.Create([('a', i) for i in range(10000)] +
+                              [('b', i) for i in range(10)])
+               | 'init_first' >> beam.HllCount.Init.PerKey(precision))
+      second = (pipeline
+                | 'create_second'
+                >> beam.Create([('a', i) for i in range(5000, 15000)] +
+                               [('b', i) for i in range(5, 20)])
+                | 'init_second' >> beam.HllCount.Init.PerKey(precision))
+      result = ((first, second)
+                | beam.Flatten()
+                | beam.HllCount.MergePartial.PerKey()
+                | beam.HllCount.Extract.PerKey()
+                | beam.MapTuple(
+                    lambda k, x: (k, abs(x - expected[k]) / expected[k] <=
+                                  max_err)))
+      assert_that(result, equal_to([('a', True), ('b', True)]))
+
+  def test_hll_count_merge_partial_sketches_from_values(self):
+    combine_fn = beam.transforms.stats.HllCountInitCombineFn(
+        10, beam.coders.VarIntCoder())
+    sketches = [
+        combine_fn.extract_output(
+            combine_fn.add_inputs(combine_fn.create_accumulator(), values))
+        for values in [range(50), range(25, 2000), []]]
+    merge_fn = beam.transforms.stats.HllCountMergePartialCombineFn()
+    merged = merge_fn.extract_output(
+        merge_fn.add_inputs(merge_fn.create_accumulator(), sketches))
+    # Sketches are the same whatever the order they are merged in.
+    self.assertEqual(merged, merge_fn.extract_output(
+        merge_fn.add_inputs(merge_fn.create_accumulator(), sketches[::-1])))
+    self.assertLessEqual(
+        abs(beam.HllCount.Extract.estimate(merged) - 2000) / 2000, 0.1)
+    self.assertEqual(beam.HllCount.Extract.estimate(
+        merge_fn.extract_output(merge_fn.create_accumulator())), 0)
+
+
 class ApproximateQuantilesTest(unittest.TestCase):
   _kv_data = [("a", 1), ("a", 2), ("a", 3), ("b", 1), ("b", 10), ("b", 10),
               ("b", 100)]
@@ -529,6 +602,58 @@ class ApproximateQuantilesTest(unittest.TestCase):
       assert_that(key_with_reversed, equal_to([["ccccc", "aaa", "b"]]),
                   label='checkWithKeyAndReversed')
 
+  def test_numeric_quantiles(self):
+    with TestPipeline() as p:
+      data = list(range(101))
+      random.shuffle(data)
+      pc = p | Create(data)
+      globally = (pc | 'Globally' >>
+                  beam.ApproximateQuantiles.Globally(5, numeric=True))
+      reversed_globally = (pc | 'Globally reversed' >>
+                           beam.ApproximateQuantiles.Globally(
+                               5, reverse=True, numeric=True))
+      per_key = (p
+                 | 'Create KV' >> Create(self._kv_data)
+                 | 'Per Key' >>
+                 beam.ApproximateQuantiles.PerKey(2, numeric=True))
+
+      assert_that(globally, equal_to([[0, 25, 50, 75, 100]]),
+                  label='checkGlobally')
+      assert_that(reversed_globally, equal_to([[100, 75, 50, 25, 0]]),
+                  label='checkReversed')
+      assert_that(per_key, equal_to([('a', [1, 3]), ('b', [1, 100])]),
+                  label='checkPerKey')
+
+  def test_large_numeric_quantiles(self):
+    with TestPipeline() as p:
+      pc = p | Create([float(x) for x in range(100001)])
+      quantiles = pc | beam.ApproximateQuantiles.Globally(
+          11, numeric=True, epsilon=0.01)
+      aprox_quantiles = self._approx_quantile_generator(size=100001,
+                                                        num_of_quantiles=11,
+                                                        absoluteError=1000)
+      assert_that(quantiles, self._quantiles_matcher(aprox_quantiles))
+
+  def test_numeric_quantiles_with_key(self):
+    with self.assertRaises(ValueError) as e:
+      beam.ApproximateQuantiles.Globally(3, key=len, numeric=True)
+    self.assertEqual(e.exception.args[0],
+                     beam.ApproximateQuantiles._NUMERIC_KEY_ERR_MSG)
+
+  def test_kll_quantiles_merge(self):
+    combine_fn = beam.transforms.stats.KllQuantilesCombineFn(5, epsilon=0.01)
+    data = list(range(100000))
+    random.shuffle(data)
+    accumulators = [
+        combine_fn.add_inputs(combine_fn.create_accumulator(), data[i::4])
+        for i in range(4)]
+    quantiles = combine_fn.extract_output(
+        combine_fn.merge_accumulators(accumulators))
+    self.assertEqual(quantiles[0], 0)
+    self.assertEqual(quantiles[-1], 99999)
+    for actual, expected in zip(quantiles[1:-1], [25000, 50000, 75000]):
+      self.assertLessEqual(abs(actual - expected), 1000)
+
   @staticmethod
   def _display_data_matcher(instance):
     expected_items = [
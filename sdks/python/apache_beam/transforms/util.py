@@ -29,6 +29,7 @@ import random
 import re
 import sys
 import time
+import uuid
 import warnings
 from builtins import filter
 from builtins import object
@@ -50,7 +51,7 @@ from apache_beam import typehints
 from apache_beam.metrics import Metrics
 from apache_beam.portability import common_urns
 from apache_beam.transforms import window
-from apache_beam.transforms.combiners import CountCombineFn
+from apache_beam.transforms.core import CombineFn
 from apache_beam.transforms.core import CombinePerKey
 from apache_beam.transforms.core import DoFn
 from apache_beam.transforms.core import FlatMap
@@ -74,6 +75,7 @@ from apache_beam.transforms.window import TimestampedValue
 from apache_beam.utils import windowed_value
 from apache_beam.utils.annotations import deprecated
 from apache_beam.utils.annotations import experimental
+from apache_beam.utils.timestamp import Timestamp
 
 if TYPE_CHECKING:
   from apache_beam import pvalue
@@ -734,32 +736,128 @@ class GroupIntoBatches(PTransform):
   buffered until they are equal to batch size provided in the argument at which
   point they are output to the output Pcollection.
 
+  Batches can also be bounded by the estimated encoded size of their elements,
+  and by how long their first element may wait in processing time.
+
   Windows are preserved (batches will contain elements from the same window)
 
   GroupIntoBatches is experimental. Its use case will depend on the runner if
   it has support of States and Timers.
   """
 
-  def __init__(self, batch_size):
+  def __init__(self, batch_size, max_buffering_duration_secs=None,
+               batch_size_bytes=None, clock=time.time):
     """Create a new GroupIntoBatches with batch size.
 
     Arguments:
       batch_size: (required) How many elements should be in a batch
+      max_buffering_duration_secs: (optional) How many seconds of processing
+        time a batch may wait for more elements before it is output
+      batch_size_bytes: (optional) The estimated encoded size in bytes at
+        which a batch is output, even if it has fewer than batch_size elements
+      clock: (optional) an alternative to time.time (mostly for testing)
     """
     warnings.warn('Use of GroupIntoBatches transform requires State/Timer '
                   'support from the runner')
     self.batch_size = batch_size
+    self.max_buffering_duration_secs = max_buffering_duration_secs
+    self.batch_size_bytes = batch_size_bytes
+    self.clock = clock
 
   def expand(self, pcoll):
     input_coder = coders.registry.get_coder(pcoll)
     return pcoll | ParDo(_pardo_group_into_batches(
-        self.batch_size, input_coder))
+        self.batch_size, input_coder, self.max_buffering_duration_secs,
+        self.batch_size_bytes, self.clock))
+
+  class WithShardedKey(PTransform):
+    """Like GroupIntoBatches, but spreads the elements of each key over shards
+    that are batched separately.
+
+    Each worker thread adds its own shard id to the keys of the elements it
+    processes, so a hot key is batched in parallel. The output batches hold
+    the original elements.
+    """
+
+    def __init__(self, batch_size, max_buffering_duration_secs=None,
+                 batch_size_bytes=None, clock=time.time):
+      """Create a new GroupIntoBatches.WithShardedKey with batch size.
+
+      Arguments are the same as those of GroupIntoBatches.
+      """
+      self.batch_size = batch_size
+      self.max_buffering_duration_secs = max_buffering_duration_secs
+      self.batch_size_bytes = batch_size_bytes
+      self.clock = clock
+
+    def expand(self, pcoll):
+      return (pcoll
+              | 'AddShardId' >> ParDo(_AddShardIdFn())
+              | 'Batch' >> GroupIntoBatches(
+                  self.batch_size, self.max_buffering_duration_secs,
+                  self.batch_size_bytes, self.clock)
+              | 'RemoveShardId' >> Map(
+                  lambda batch: [(key, value) for (key, _), value in batch]))
+
+
+class _AddShardIdFn(DoFn):
+  def setup(self):
+    self._shard_id = uuid.uuid4().bytes
+
+  def process(self, element):
+    key, value = element
+    yield (key, self._shard_id), value
+
+
+class _CountAndBytesCombineFn(CombineFn):
+  """Counts the elements of a batch and sums their estimated sizes."""
+
+  def create_accumulator(self):
+    return 0, 0
 
+  def add_input(self, count_and_bytes, size):
+    count, bytes_ = count_and_bytes
+    return count + 1, bytes_ + size
 
-def _pardo_group_into_batches(batch_size, input_coder):
+  def merge_accumulators(self, accumulators):
+    count, bytes_ = 0, 0
+    for accumulator_count, accumulator_bytes in accumulators:
+      count += accumulator_count
+      bytes_ += accumulator_bytes
+    return count, bytes_
+
+  def extract_output(self, count_and_bytes):
+    return count_and_bytes
+
+
+def _pardo_group_into_batches(batch_size, input_coder,
+                              max_buffering_duration_secs=None,
+                              batch_size_bytes=None, clock=time.time):
   ELEMENT_STATE = BagStateSpec('values', input_coder)
-  COUNT_STATE = CombiningValueStateSpec('count', input_coder, CountCombineFn())
+  COUNT_STATE = CombiningValueStateSpec(
+      'count',
+      coders.TupleCoder([coders.VarIntCoder(), coders.VarIntCoder()]),
+      _CountAndBytesCombineFn())
   EXPIRY_TIMER = TimerSpec('expiry', TimeDomain.WATERMARK)
+  BUFFERING_TIMER = TimerSpec('buffering', TimeDomain.REAL_TIME)
+
+  def add(element, element_state, count_state):
+    """Buffers element, returning the number of buffered elements and the batch
+    to output, if it is full."""
+    element_state.add(element)
+    count_state.add(
+        input_coder.estimate_size(element) if batch_size_bytes else 0)
+    count, size = count_state.read()
+    if count >= batch_size or (batch_size_bytes and size >= batch_size_bytes):
+      return count, flush(element_state, count_state)
+    return count, None
+
+  def flush(element_state, count_state):
+    batch = [element for element in element_state.read()]
+    if batch:
+      element_state.clear()
+      count_state.clear()
+    return batch
 
   class _GroupIntoBatchesDoFn(DoFn):
 
@@ -771,24 +869,44 @@ def _pardo_group_into_batches(batch_size, input_coder):
       # Allowed lateness not supported in Python SDK
       # https://beam.apache.org/documentation/programming-guide/#watermarks-and-late-data
       expiry_timer.set(window.end)
-      element_state.add(element)
-      count_state.add(1)
-      count = count_state.read()
-      if count >= batch_size:
-        batch = [element for element in element_state.read()]
+      _, batch = add(element, element_state, count_state)
+      if batch:
         yield batch
-        element_state.clear()
-        count_state.clear()
 
     @on_timer(EXPIRY_TIMER)
     def expiry(self, element_state=DoFn.StateParam(ELEMENT_STATE),
                count_state=DoFn.StateParam(COUNT_STATE)):
-      batch = [element for element in element_state.read()]
+      batch = flush(element_state, count_state)
+      if batch:
+        yield batch
+
+  class _GroupIntoBatchesWithBufferingTimerDoFn(_GroupIntoBatchesDoFn):
+
+    def process(self, element,
+                window=DoFn.WindowParam,
+                element_state=DoFn.StateParam(ELEMENT_STATE),
+                count_state=DoFn.StateParam(COUNT_STATE),
+                expiry_timer=DoFn.TimerParam(EXPIRY_TIMER),
+                buffering_timer=DoFn.TimerParam(BUFFERING_TIMER)):
+      expiry_timer.set(window.end)
+      count, batch = add(element, element_state, count_state)
+      if batch:
+        yield batch
+      elif count == 1:
+        # Setting the timer again for the first element of the next batch
+        # replaces the one set for the previous batch.
+        buffering_timer.set(
+            Timestamp.of(clock() + max_buffering_duration_secs))
+
+    @on_timer(BUFFERING_TIMER)
+    def buffering_expiry(self, element_state=DoFn.StateParam(ELEMENT_STATE),
+                         count_state=DoFn.StateParam(COUNT_STATE)):
+      batch = flush(element_state, count_state)
       if batch:
         yield batch
-        element_state.clear()
-        count_state.clear()
 
+  if max_buffering_duration_secs:
+    return _GroupIntoBatchesWithBufferingTimerDoFn()
   return _GroupIntoBatchesDoFn()
 
 
@@ -594,6 +594,62 @@ class GroupIntoBatchesTest(unittest.TestCase):
                                         GroupIntoBatchesTest.BATCH_SIZE))]))
     pipeline.run()
 
+  def test_batch_size_bytes(self):
+    with TestPipeline() as pipeline:
+      collection = (pipeline
+                    | beam.Create([('key', 'x' * 100)] * 10)
+                    | util.GroupIntoBatches(
+                        GroupIntoBatchesTest.NUM_ELEMENTS,
+                        batch_size_bytes=250))
+      # About 100 bytes per element, so every third element fills a batch.
+      assert_that(collection | beam.Map(len), equal_to([3, 3, 3, 1]))
+
+  def test_count_and_bytes_combine_fn(self):
+    combine_fn = util._CountAndBytesCombineFn()
+    self.assertEqual((0, 0), combine_fn.merge_accumulators([]))
+    self.assertEqual(
+        (3, 30),
+        combine_fn.merge_accumulators(
+            [combine_fn.add_input(combine_fn.create_accumulator(), 10),
+             (2, 20)]))
+
+  def test_with_max_buffering_duration(self):
+    data = GroupIntoBatchesTest._create_test_data()
+    # Processing time starts at 0 on the test clock of pipelines that read a
+    # TestStream. The buffering timer of the first three elements fires when
+    # it is advanced past the buffering duration, before the batch is full.
+    test_stream = (TestStream()
+                   .advance_watermark_to(0)
+                   .add_elements(data[:3])
+                   .advance_processing_time(101)
+                   .add_elements(data[3:])
+                   .advance_watermark_to_infinity())
+    pipeline = TestPipeline(options=StandardOptions(streaming=True))
+    collection = (pipeline
+                  | test_stream
+                  | util.GroupIntoBatches(
+                      GroupIntoBatchesTest.BATCH_SIZE,
+                      max_buffering_duration_secs=100,
+                      clock=lambda: 0))
+    assert_that(collection | beam.Map(len), equal_to([3, 5, 2]))
+    pipeline.run()
+
+  def test_with_sharded_key(self):
+    data = GroupIntoBatchesTest._create_test_data()
+    with TestPipeline() as pipeline:
+      collection = (pipeline
+                    | beam.Create(data)
+                    | util.GroupIntoBatches.WithShardedKey(
+                        GroupIntoBatchesTest.BATCH_SIZE))
+      assert_that(
+          collection
+          | beam.Map(
+              lambda batch: len(batch) <= GroupIntoBatchesTest.BATCH_SIZE)
+          | beam.CombineGlobally(all),
+          equal_to([True]), label='assert:batch_size')
+      assert_that(collection | beam.FlatMap(lambda batch: batch),
+                  equal_to(data), label='assert:elements')
+
   def test_in_streaming_mode(self):
     timestamp_interval = 1
     offset = itertools.count(0)
@@ -22,6 +22,7 @@ from __future__ import absolute_import
 import sys
 import threading
 import weakref
+from concurrent import futures
 from concurrent.futures import _base
 
 try:  # Python3
@@ -170,3 +171,46 @@ class UnboundedThreadPoolExecutor(_base.Executor):
       if wait:
         for worker in self._workers:
           worker.join()
+
+
+class BoundedThreadPoolExecutor(_base.Executor):
+  """A thread pool whose submit blocks while max_workers tasks are pending.
+
+  Unlike a plain ThreadPoolExecutor, it does not queue up an unbounded number
+  of tasks when they are submitted faster than they complete.
+  """
+
+  def __init__(self, max_workers):
+    self._executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+    self._slots = threading.BoundedSemaphore(max_workers)
+
+  def submit(self, fn, *args, **kwargs):
+    self._slots.acquire()
+    try:
+      future = self._executor.submit(fn, *args, **kwargs)
+    except:
+      self._slots.release()
+      raise
+    future.add_done_callback(lambda unused_future: self._slots.release())
+    return future
+
+  def shutdown(self, wait=True):
+    self._executor.shutdown(wait)
+
+
+_shared_bounded_executors_lock = threading.Lock()
+_shared_bounded_executors = {}
+
+
+def shared_bounded_executor(owner, max_workers):
+  """Returns the BoundedThreadPoolExecutor of this process for owner.
+
+  All the users of the same owner and max_workers, e.g. every instance of a
+  DoFn class in a worker, share one executor, so that the number of tasks in
+  flight is bounded per process rather than per user.
+  """
+  key = owner, max_workers
+  with _shared_bounded_executors_lock:
+    if key not in _shared_bounded_executors:
+      _shared_bounded_executors[key] = BoundedThreadPoolExecutor(max_workers)
+    return _shared_bounded_executors[key]
@@ -15,7 +15,7 @@
 # limitations under the License.
 #
 
-"""Unit tests for UnboundedThreadPoolExecutor."""
+"""Unit tests for UnboundedThreadPoolExecutor and BoundedThreadPoolExecutor."""
 
 # pytype: skip-file
 
@@ -30,7 +30,9 @@ import unittest
 # patches unittest.TestCase to be python3 compatible
 import future.tests.base  # pylint: disable=unused-import
 
+from apache_beam.utils.thread_pool_executor import BoundedThreadPoolExecutor
 from apache_beam.utils.thread_pool_executor import UnboundedThreadPoolExecutor
+from apache_beam.utils.thread_pool_executor import shared_bounded_executor
 
 
 class UnboundedThreadPoolExecutorTest(unittest.TestCase):
@@ -112,5 +114,60 @@ class UnboundedThreadPoolExecutorTest(unittest.TestCase):
       self.assertEqual(5, len(self._worker_idents))
 
 
+class BoundedThreadPoolExecutorTest(unittest.TestCase):
+  def setUp(self):
+    self._lock = threading.Lock()
+    self._in_flight = 0
+    self._max_in_flight = 0
+
+  def count_and_sleep(self, sleep_time):
+    with self._lock:
+      self._in_flight += 1
+      self._max_in_flight = max(self._max_in_flight, self._in_flight)
+    time.sleep(sleep_time)
+    with self._lock:
+      self._in_flight -= 1
+
+  def test_submit_blocks_at_max_workers(self):
+    futures = []
+    with BoundedThreadPoolExecutor(3) as executor:
+      for _ in range(0, 10):
+        futures.append(executor.submit(self.count_and_sleep, 0.05))
+        # Submitting never runs ahead of the tasks by more than max_workers.
+        self.assertLessEqual(
+            len([future for future in futures if not future.done()]), 3)
+
+    for future in futures:
+      future.result(timeout=10)
+    self.assertLessEqual(self._max_in_flight, 3)
+
+  def test_exception_propagation(self):
+    with BoundedThreadPoolExecutor(1) as executor:
+      future = executor.submit(self.count_and_sleep, 'not a number')
+      with self.assertRaises(TypeError):
+        future.result(timeout=10)
+      # The failed task gave back its slot.
+      executor.submit(self.count_and_sleep, 0).result(timeout=10)
+
+  def test_failed_submit_releases_slot(self):
+    executor = BoundedThreadPoolExecutor(1)
+    executor.shutdown()
+    for _ in range(0, 2):
+      with self.assertRaises(RuntimeError):
+        executor.submit(self.count_and_sleep, 0)
+
+  def test_shared_per_owner_and_size(self):
+    class Owner(object):
+      pass
+
+    class OtherOwner(object):
+      pass
+
+    executor = shared_bounded_executor(Owner, 2)
+    self.assertIs(executor, shared_bounded_executor(Owner, 2))
+    self.assertIsNot(executor, shared_bounded_executor(Owner, 3))
+    self.assertIsNot(executor, shared_bounded_executor(OtherOwner, 2))
+
+
 if __name__ == '__main__':
   unittest.main()